@@ -0,0 +1,193 @@
+# Copyright EPFL contributors.
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Info: This script reads the main.elf of an application and the cached X-HEEP configuration
+# (build/xheep_config_cache.json) and splits the loadable segments of the ELF into one preload
+# image per memory bank (ram0.hex, ram1.hex...), in the $readmemh format: one 32-bit word per line,
+# indexed by the word address inside the bank.
+# The bytes of each segment are mapped to the banks holding them as the memory subsystem does,
+# following the word interleaving of the IL banks (il_level/il_offset), so that a testbench can load
+# every SRAM bank directly (tb_loadBankHEX, +firmware_banks=<dir>) in zero simulated time, instead
+# of writing main.hex word by word through the bus.
+# The segments are placed at their load address, as objcopy does for main.hex. The bytes outside
+# the banks (e.g. the code stored in the flash with LINKER=flash_load or flash_exec) are skipped.
+
+import argparse
+import os
+import struct
+import sys
+
+from mem_usage import ElfFile, get_banks, BANK_WORD_B
+from x_heep_gen.snapshot import StaleSnapshotError
+
+
+def bank_slices(bank, address, size):
+    """
+    Yields the bytes of a memory range that are stored in a bank, as extended slices.
+    In an interleaved group, the byte k of the word selected by the address bits [il_level+1:2]
+    belongs to the bank with that il_offset, so the bytes of a bank sharing the same k are
+    separated by 4*2**il_level bytes in the range and by 4 bytes in the bank.
+
+    Parameters:
+    bank    - bank dictionary, as returned by get_banks
+    address - start address of the range
+    size    - size in bytes of the range
+
+    Yields:
+    (src, dst, count) - the count bytes at offsets src, src+stride... of the range are stored at
+                        offsets dst, dst+step... of the bank (stride and step returned by bank_strides)
+    """
+    start = max(address, bank['start_add'])
+    end = min(address + size, bank['end_add'])
+    if start >= end:
+        return
+    if bank['il_level'] == 0:
+        yield start - address, start - bank['start_add'], end - start
+        return
+
+    stride = BANK_WORD_B << bank['il_level']
+    for k in range(BANK_WORD_B):
+        # First byte k of a word of the bank at or after start
+        lane = bank['il_offset']*BANK_WORD_B + k
+        first = bank['start_add'] + (start - bank['start_add'] - lane + stride - 1)//stride*stride + lane
+        if first >= end:
+            continue
+        count = (end - 1 - first)//stride + 1
+        yield first - address, (first - bank['start_add'])//stride*BANK_WORD_B + k, count
+
+
+def bank_strides(bank):
+    """
+    Returns the distance in bytes between the bytes of a slice yielded by bank_slices, in the
+    memory range and in the bank.
+    """
+    if bank['il_level'] == 0:
+        return 1, 1
+    return BANK_WORD_B << bank['il_level'], BANK_WORD_B
+
+
+def split_segments(elf, banks):
+    """
+    Splits the loadable segments of an ELF file over the memory banks.
+
+    Parameters:
+    elf   - ElfFile of the application
+    banks - List of bank dictionaries, as returned by get_banks
+
+    Returns:
+    images  - List with the content of each bank (bytearray of bank['size'] bytes, zero filled)
+    loaded  - List with the bytes of each bank written by a segment (bytearray of bank['size'] bytes, 1 when written)
+    skipped - List of (address, size) of the segment bytes outside the banks
+    """
+    images = [bytearray(bank['size']) for bank in banks]
+    loaded = [bytearray(bank['size']) for bank in banks]
+    skipped = []
+
+    for segment in elf.segments():
+        if segment['Type'] != 'LOAD' or segment['FileSiz'] == 0:
+            continue
+        address = segment['PhysAddr']
+        data = elf._map[segment['Offset']:segment['Offset'] + segment['FileSiz']]
+
+        copied = 0
+        for bank, image, mask in zip(banks, images, loaded):
+            stride, step = bank_strides(bank)
+            for src, dst, count in bank_slices(bank, address, len(data)):
+                image[dst:dst + (count - 1)*step + 1:step] = data[src:src + (count - 1)*stride + 1:stride]
+                mask[dst:dst + (count - 1)*step + 1:step] = b'\x01'*count
+                copied += count
+        if copied < len(data):
+            skipped.append((address, len(data) - copied))
+
+    return images, loaded, skipped
+
+
+def format_image(image, mask=None):
+    """
+    Formats the content of a bank for $readmemh, one 32-bit little endian word per line.
+
+    Parameters:
+    image - content of the bank
+    mask  - bytes of the bank written by a segment. When given, only the words holding one of
+            them are written, each run of words being preceded by its @<word address> record
+
+    Returns:
+    text - content of the preload file
+    """
+    words = [f'{word:08x}' for (word,) in struct.iter_unpack('<I', image)]
+    if mask is None:
+        return '\n'.join(words) + '\n'
+
+    lines = []
+    previous = None
+    for idx in range(len(words)):
+        if not any(mask[idx*BANK_WORD_B:(idx + 1)*BANK_WORD_B]):
+            continue
+        if previous != idx - 1:
+            lines.append(f'@{idx:x}')
+        lines.append(words[idx])
+        previous = idx
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def write_bank_images(elf_path, out_dir, cache_path='build/xheep_config_cache.json', sparse=False):
+    """
+    Writes the preload file of every memory bank for an application.
+
+    Parameters:
+    elf_path   - path of the ELF file of the application
+    out_dir    - folder where the ram<bank name>.hex files are written
+    cache_path - path of the cached X-HEEP configuration
+    sparse     - only write the words loaded by the application (see format_image)
+
+    Returns:
+    paths   - List with the path of the preload file of each bank
+    skipped - List of (address, size) of the segment bytes outside the banks
+    """
+    banks, _ = get_banks(cache_path)
+    with ElfFile(elf_path) as elf:
+        images, loaded, skipped = split_segments(elf, banks)
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for bank, image, mask in zip(banks, images, loaded):
+        path = os.path.join(out_dir, f"ram{bank['name']}.hex")
+        with open(path, 'w') as file:
+            file.write(format_image(image, mask if sparse else None))
+        paths.append(path)
+    return paths, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Splits the segments of an application into one $readmemh "
+                                                 "preload file per memory bank.")
+    parser.add_argument('build_dir', nargs='?', default='sw/build',
+                        help="Folder where the application was built (default: sw/build)")
+    parser.add_argument('--cache', default='build/xheep_config_cache.json',
+                        help="Cached X-HEEP configuration (default: build/xheep_config_cache.json)")
+    parser.add_argument('--out', default=None,
+                        help="Folder of the preload files (default: <build_dir>/banks)")
+    parser.add_argument('--sparse', action='store_true',
+                        help="Only write the words loaded by the application, with @<address> records")
+    args = parser.parse_args()
+
+    elf_path = os.path.join(args.build_dir, 'main.elf')
+    out_dir = args.out if args.out else os.path.join(args.build_dir, 'banks')
+
+    try:
+        paths, skipped = write_bank_images(elf_path, out_dir, args.cache, args.sparse)
+    except FileNotFoundError as e:
+        print(f"{e.filename} not found. Will not write the bank preload files.")
+        sys.exit(1)
+    except (StaleSnapshotError, ValueError) as e:
+        print(f"{e}. Will not write the bank preload files.")
+        sys.exit(1)
+
+    for address, size in skipped:
+        print(f"{size} bytes loaded at 0x{address:08x} are outside the memory banks and were skipped")
+    print(f"Bank preload files written to {out_dir}: {', '.join(os.path.basename(p) for p in paths)}")
+
+
+if __name__ == '__main__':
+    main()
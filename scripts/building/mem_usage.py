@@ -4,147 +4,267 @@
 #
 # Author: Juan Sapriza <juan.sapriza@epfl.ch>
 #
-# Info: This script parses the generated main.map and core_v_mini_mcu_pkg.sv files to 
-# display the usage of the different memory banks of the generated MCU for code (text) and data. 
+# Info: This script reads the main.elf of an application and the cached X-HEEP configuration
+# (build/xheep_config_cache.json) to display the usage of the different memory banks of the
+# generated MCU for code (text) and data, and writes the same information, along with the size
+# of every symbol, to a JSON report.
 # The script considers the possibility of having interleaved (IL) memory banks at the end of the
-# continuous memory banks. In the IL banks, data is distributed homogeneously across banks (although
-# this does not necessarily need to be the case). 
-# The code extracts the number and size of the memory banks from the MCU package. 
-# Then extracts the regions (code and data) from the main.map file -- i.e. where code and data can 
-# be stored.  
-# Later extracts the utilization of those regions by looking for the addresses in which text and data
-# has been written in the main.map file. 
-# For the IL data (ildt) only the length is extracted, for simplicity. We assume an homogeneous distribution.
-
-import subprocess
-import re
-
-
-def is_readelf_available():
-    try:
-        subprocess.run(["readelf", "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return True
-    except FileNotFoundError:
-        return False
-
-
-def get_banks_and_sizes(mcu_pkg_size):
+# continuous memory banks.
+# The number and size of the memory banks, and the regions where code and data can be stored (the
+# linker sections ram0, ram1, ram2...), are taken from the memory subsystem of the configuration.
+# The utilization of those regions is extracted from the program headers (segments) of the ELF,
+# which is memory-mapped and parsed in-process (no readelf needed).
+# The bytes of each segment are then mapped to the banks holding them, following the word interleaving
+# of the IL banks (il_level/il_offset), to compute exactly how many bytes of every bank are used.
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../util'))
+
+from x_heep_gen.snapshot import load_snapshot, StaleSnapshotError
+
+
+# ELF constants
+ELF_MAGIC       = b'\x7fELF'
+ELFCLASS32      = 1
+ELFCLASS64      = 2
+ELFDATA2LSB     = 1
+ELFDATA2MSB     = 2
+PT_LOAD         = 1
+SHT_SYMTAB      = 2
+SHT_NOBITS      = 8
+SHF_ALLOC       = 0x2
+SHN_UNDEF       = 0
+SHN_LORESERVE   = 0xff00
+SHN_ABS         = 0xfff1
+
+SEGMENT_TYPES   = {0: 'NULL', 1: 'LOAD', 2: 'DYNAMIC', 3: 'INTERP', 4: 'NOTE', 6: 'PHDR', 7: 'TLS', 0x70000003: 'RISCV_ATTRIBUTES'}
+SYMBOL_TYPES    = {0: 'NOTYPE', 1: 'OBJECT', 2: 'FUNC', 3: 'SECTION', 4: 'FILE', 5: 'COMMON', 6: 'TLS'}
+SYMBOL_BINDS    = {0: 'LOCAL', 1: 'GLOBAL', 2: 'WEAK'}
+
+# Size in bytes of the words spread over the banks of an interleaved group
+BANK_WORD_B     = 4
+
+# struct formats (without byte order) of the ELF header fields following e_ident, of the
+# program headers and of the section headers, for 32 and 64 bits ELF files
+ELF_FORMATS = {
+    ELFCLASS32: {
+        'header' : 'HHIIIIIHHHHHH',
+        'phdr'   : 'IIIIIIII',   # type, offset, vaddr, paddr, filesz, memsz, flags, align
+        'shdr'   : 'IIIIIIIIII', # name, type, flags, addr, offset, size, link, info, addralign, entsize
+        'sym'    : 'IIIBBH',     # name, value, size, info, other, shndx
+    },
+    ELFCLASS64: {
+        'header' : 'HHIQQQIHHHHHH',
+        'phdr'   : 'IIQQQQQQ',   # type, flags, offset, vaddr, paddr, filesz, memsz, align
+        'shdr'   : 'IIQQQQIIQQ',
+        'sym'    : 'IBBHQQ',     # name, info, other, shndx, value, size
+    },
+}
+
+
+class ElfFile:
     """
-    Parses the core_v_mini_mcu_pkg.sv file to extract the count of memory banks and their sizes. 
-    It looks for the definitions:
-    localparam int unsigned NUM_BANKS = 5;
-    localparam int unsigned NUM_BANKS_IL = 2;
-
-    To obtain the total and IL count. 
-
-    Later looks for 
-    localparam logic [31:0] RAM0_SIZE = 32'h00008000;
-    To extract the size of each. 
-    They are all assumed to be contiguous. 
+    Minimal in-process reader of the segments, sections and symbols of an ELF file.
+    The file is memory-mapped, so only the headers and tables that are read are loaded.
 
     Parameters:
-    mcu_pkg_size - path of the .sv file, relative to the location from which this script is called (e.g. the Makefile)
+    path - path of the ELF file
 
-    Returns: 
-    num_banks       - Total count of memory banks
-    num_il_banks    - How many of those banks are IL
-    sizes_B         - Size in bytes of each bank
+    Raises ValueError if the file is not a valid ELF file.
     """
-    num_banks = 0
-    num_il_banks = 0
-    sizes_B = []
-    try:
-        with open(mcu_pkg_size, 'r') as file:
-            for line in file:
-                if "NUM_BANKS =" in line:
-                    num_banks = int(line.split('=')[1].strip().strip(';'))
-                elif "NUM_BANKS_IL =" in line:
-                    num_il_banks = int(line.split('=')[1].strip().strip(';'))
-                else: 
-                    match = re.search(r"RAM(\d+)_SIZE = 32'h([0-9A-Fa-f]+);", line)
-                    if match:
-                        size_B      = int(match.group(2), 16)
-                        sizes_B.append(size_B)               
-    except FileNotFoundError:
-        print("File not found. Please check the path and try again.")
-    return num_banks, num_il_banks, sizes_B
 
-def get_memory_sections(map_path):
-    """
-    Parses the main.map file to obtain the origin and length of each region. 
-    These are called ram0 (code), ram1 (data) and ram2 (IL data) - but that does not necessarily 
-    correspond with an index of memory banks. 
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty")
+
+        try:
+            self._parse_header()
+        except (ValueError, struct.error) as e:
+            self.close()
+            raise ValueError(f"{path} is not a valid ELF file: {e}")
+
+        self._segments = None
+        self._sections = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _parse_header(self):
+        ident = self._map[:16]
+        if ident[:4] != ELF_MAGIC:
+            raise ValueError("wrong magic number")
+        self.elf_class = ident[4]
+        if self.elf_class not in ELF_FORMATS:
+            raise ValueError(f"unknown class {self.elf_class}")
+        if ident[5] == ELFDATA2LSB:
+            byte_order = '<'
+        elif ident[5] == ELFDATA2MSB:
+            byte_order = '>'
+        else:
+            raise ValueError(f"unknown data encoding {ident[5]}")
+
+        formats = ELF_FORMATS[self.elf_class]
+        self._phdr = struct.Struct(byte_order + formats['phdr'])
+        self._shdr = struct.Struct(byte_order + formats['shdr'])
+        self._sym  = struct.Struct(byte_order + formats['sym'])
+
+        (self.type, self.machine, _, self.entry, self._phoff, self._shoff, _, _,
+         self._phentsize, self._phnum, self._shentsize, self._shnum,
+         self._shstrndx) = struct.unpack_from(byte_order + formats['header'], self._map, 16)
+
+    def _string(self, table_offset, index):
+        start = table_offset + index
+        end = self._map.find(b'\0', start)
+        return self._map[start:end].decode('utf-8', errors='replace')
+
+    def segments(self):
+        """
+        Returns the program headers, as a list of dictionaries.
+        """
+        if self._segments is None:
+            self._segments = []
+            for i in range(self._phnum):
+                fields = self._phdr.unpack_from(self._map, self._phoff + i*self._phentsize)
+                if self.elf_class == ELFCLASS32:
+                    p_type, offset, vaddr, paddr, filesz, memsz, flags, align = fields
+                else:
+                    p_type, flags, offset, vaddr, paddr, filesz, memsz, align = fields
+                self._segments.append({
+                    'Type'    : SEGMENT_TYPES.get(p_type, hex(p_type)),
+                    'Offset'  : offset,
+                    'VirtAddr': vaddr,
+                    'PhysAddr': paddr,
+                    'FileSiz' : filesz,
+                    'MemSiz'  : memsz,
+                    'Flg'     : ('R' if flags & 4 else ' ') + ('W' if flags & 2 else ' ') + ('E' if flags & 1 else ' '),
+                    'Align'   : align,
+                })
+        return self._segments
+
+    def sections(self):
+        """
+        Returns the section headers, as a list of dictionaries.
+        """
+        if self._sections is None:
+            headers = [self._shdr.unpack_from(self._map, self._shoff + i*self._shentsize)
+                       for i in range(self._shnum)]
+            names_offset = headers[self._shstrndx][4] if self._shnum else 0
+            self._sections = []
+            for name, sh_type, flags, addr, offset, size, link, info, addralign, entsize in headers:
+                self._sections.append({
+                    'name'    : self._string(names_offset, name),
+                    'type'    : sh_type,
+                    'flags'   : flags,
+                    'addr'    : addr,
+                    'offset'  : offset,
+                    'size'    : size,
+                    'link'    : link,
+                    'entsize' : entsize,
+                })
+        return self._sections
+
+    def section_to_segment(self):
+        """
+        Maps every segment to the allocated sections it contains, as readelf does.
+
+        Returns:
+        mapping - Dictionary with the list of section names of each segment, indexed by segment index
+        """
+        mapping = {}
+        sections = [s for s in self.sections() if s['flags'] & SHF_ALLOC]
+        for idx, seg in enumerate(self.segments()):
+            start = seg['VirtAddr']
+            end = start + seg['MemSiz']
+            mapping[idx] = [s['name'] for s in sections
+                            if start <= s['addr'] and (s['addr'] + s['size'] <= end if s['size'] else s['addr'] < end)]
+        return mapping
+
+    def symbols(self):
+        """
+        Returns the symbols of the symbol table, as a list of dictionaries.
+        """
+        sections = self.sections()
+        symbols = []
+        for symtab in sections:
+            if symtab['type'] != SHT_SYMTAB:
+                continue
+            strtab_offset = sections[symtab['link']]['offset']
+            entsize = symtab['entsize'] or self._sym.size
+            for i in range(symtab['size'] // entsize):
+                fields = self._sym.unpack_from(self._map, symtab['offset'] + i*entsize)
+                if self.elf_class == ELFCLASS32:
+                    name, value, size, info, other, shndx = fields
+                else:
+                    name, info, other, shndx, value, size = fields
+                if shndx == SHN_UNDEF:
+                    section = None
+                elif shndx == SHN_ABS:
+                    section = 'ABS'
+                elif shndx < SHN_LORESERVE and shndx < len(sections):
+                    section = sections[shndx]['name']
+                else:
+                    section = None
+                symbols.append({
+                    'name'    : self._string(strtab_offset, name),
+                    'address' : value,
+                    'size'    : size,
+                    'type'    : SYMBOL_TYPES.get(info & 0xf, str(info & 0xf)),
+                    'bind'    : SYMBOL_BINDS.get(info >> 4, str(info >> 4)),
+                    'section' : section,
+                })
+        return symbols
+
 
-    The origin and size of each are defined in the configs/*.hjson files.
+def get_banks(cache_path):
+    """
+    Reads the memory banks and the linker sections from the memory subsystem of the cached X-HEEP
+    configuration, written by make mcu-gen.
 
     Parameters:
-    map_path - path of the .map file, relative to the location from which this script is called (e.g. the Makefile)
+    cache_path - path of the configuration snapshot (build/xheep_config_cache.json)
 
-    Returns: 
-    sections - Dictionary with the sections found
+    Returns:
+    banks    - List of dictionaries describing each bank, in address map order
+    sections - Dictionary with the origin and length of each linker section, named ram0, ram1... as in the linker script
     """
-    sections = {}
-    try:
-        index = 0
-        with open(map_path, 'r') as file:
-            collect = False
-            for line in file:
-                if "Name" in line and "Origin" in line and "Length" in line:
-                    collect = True
-                    continue
-                if collect:
-                    if line.strip() == '':
-                        collect = False  # Stop collecting when a blank line is encountered
-                        continue
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        name = parts[0]
-                        if name == 'FLASH': continue
-                        origin = int(parts[1], 16)
-                        length = int(parts[2], 16)
-                        attributes = parts[3]
-                        sections[name] = {'origin': origin, 'length': length, 'attributes': attributes}
-                        index += 1
-    except FileNotFoundError:
-        print("File not found. Please check the path and try again.")
-    return sections
+    xheep = load_snapshot(cache_path).get('xheep')
+    memory_ss = xheep.memory_ss()
+
+    banks = []
+    for bank in memory_ss.iter_ram_banks():
+        banks.append({
+            'name'      : bank.name(),
+            'type'      : "Cont" if bank.il_level() == 0 else "IntL",
+            'start_add' : bank.start_address(),
+            'end_add'   : bank.end_address(),
+            'size'      : bank.size(),
+            'il_level'  : bank.il_level(),
+            'il_offset' : bank.il_offset(),
+        })
 
-def get_readelf_output(elf_file):
-    """
-    Executes the readelf command on the provided ELF file with -l option to list program headers.
-    """
-    try:
-        result = subprocess.run(['readelf', '-l', elf_file], capture_output=True, text=True)
-        return result.stdout
-    except Exception as e:
-        print(f"Error running readelf: {e}")
-        return None
+    sections = {}
+    for i, section in enumerate(memory_ss.iter_linker_sections()):
+        sections[f'ram{i}'] = {'name': section.name, 'origin': section.start, 'length': section.size}
+    return banks, sections
 
-def parse_program_headers(readelf_output):
-    """
-    Parses the output of readelf to extract program headers.
-    """
-    program_headers = []
-    headers_started = False
-    for line in readelf_output.split('\n'):
-        if 'Program Headers:' in line:
-            headers_started = True
-        elif headers_started:
-            if 'LOAD' in line:
-                parts = re.split(r'\s+', line.strip())
-                program_headers.append({
-                    'Type': parts[0],
-                    'Offset': int(parts[1], 16),
-                    'VirtAddr': int(parts[2], 16),
-                    'PhysAddr': int(parts[3], 16),
-                    'FileSiz': int(parts[4], 16),
-                    'MemSiz': int(parts[5], 16),
-                    'Flg': parts[6],
-                    'Align': int(parts[7], 16)
-                })
-            if 'Section to Segment mapping:' in line:
-                break  # Stop after collecting program headers
-    return program_headers
 
 def get_regions(program_headers, section_to_segment):
     """
@@ -155,12 +275,14 @@ def get_regions(program_headers, section_to_segment):
     code_sections = {'.vectors', '.init', '.text', '.eh_frame'}
     data_sections = {'.power_manager', '.rodata', '.data', '.sdata', '.sbss', '.bss', '.heap', '.stack'}
     interleaved_data_sections = {'.data_interleaved'}
-    
+
     # List to store region dictionaries
     regions = []
 
     # Iterate through each program header
     for idx, ph in enumerate(program_headers):
+        if ph['Type'] != 'LOAD':
+            continue
         # Determine the type of region based on the sections it contains
         sections = section_to_segment[idx]
         region_type = 'd'  # default to data
@@ -177,176 +299,251 @@ def get_regions(program_headers, section_to_segment):
             'symbol': region_type,
             'start_add': ph['VirtAddr'],
             'size_B': ph['MemSiz'],
-            'end_add': ph['VirtAddr'] + ph['MemSiz']
+            'end_add': ph['VirtAddr'] + ph['MemSiz'],
+            'sections': sections,
         }
-        
+
         # Append to the list
         regions.append(region_dict)
 
     return regions
 
-def get_readelf_output(elf_file):
+
+def get_symbols(elf):
     """
-    Executes the readelf command on the provided ELF file with -l option to list program headers.
+    Returns the functions and objects of the ELF file that take memory, largest first.
     """
-    try:
-        result = subprocess.run(['readelf', '-l', elf_file], capture_output=True, text=True)
-        return result.stdout
-    except Exception as e:
-        print(f"Error running readelf: {e}")
-        return None
+    symbols = [sym for sym in elf.symbols()
+               if sym['type'] in ('FUNC', 'OBJECT') and sym['size'] > 0 and sym['section'] not in (None, 'ABS')]
+    symbols.sort(key=lambda sym: (-sym['size'], sym['address'], sym['name']))
+    return symbols
 
-def parse_program_headers(readelf_output):
+
+def region_usage(regions, name):
     """
-    Parses the output of readelf to extract program headers.
+    Returns the space used by the regions of a kind (the sum of their sizes) and the space required
+    to store them (from the start of the first to the end of the last).
     """
-    program_headers = []
-    headers_started = False
-    for line in readelf_output.split('\n'):
-        if 'Program Headers:' in line:
-            headers_started = True
-        elif headers_started:
-            if 'LOAD' in line:
-                parts = re.split(r'\s+', line.strip())
-                program_headers.append({
-                    'Type': parts[0],
-                    'Offset': int(parts[1], 16),
-                    'VirtAddr': int(parts[2], 16),
-                    'PhysAddr': int(parts[3], 16),
-                    'FileSiz': int(parts[4], 16),
-                    'MemSiz': int(parts[5], 16),
-                    'Flg': parts[6],
-                    'Align': int(parts[7], 16)
-                })
-            if 'Section to Segment mapping:' in line:
-                break  # Stop after collecting program headers
-    return program_headers
+    regions = [region for region in regions if region['name'] == name]
+    used = sum(region['size_B'] for region in regions)
+    required = max(r['end_add'] for r in regions) - min(r['start_add'] for r in regions) if regions else 0
+    return used, required
 
-def parse_section_to_segment(readelf_output):
+
+def bank_bytes_below(bank, address):
     """
-    Parses the 'Section to Segment mapping' from the output of readelf.
+    Returns how many bytes of a bank are mapped below an address. For an address inside the bank
+    this is the offset in the bank of the first byte at or after the address.
+    In an interleaved group, the consecutive words of the group are spread over its banks: the
+    word selected by the address bits [il_level+1:2] belongs to the bank with that il_offset.
+
+    Parameters:
+    bank    - bank dictionary, as returned by get_banks
+    address - any address, it does not need to be inside the bank
     """
-    mapping = {}
-    capture = False
-    segment_index = 0
-    for line in readelf_output.split('\n'):
-        if 'Section to Segment mapping:' in line:
-            capture = True
-        elif capture:
-            if line.strip().startswith("Segment"):
-                segments = re.findall(r'Segment\s+(\d+)', line)
-                if segments:
-                    segment_index = int(segments[0])
-            else:
-                sections = re.findall(r'\.\w+', line)
-                if sections:
-                    mapping[segment_index] = sections
-                segment_index += 1
-    return mapping
-
-
-if not is_readelf_available():
-    print("readelf not available. Will not print the memory utilization report.")
-    quit()
-
-# READ THE READELF OUTPUT AND PARSE TO OBTAIN THE DIFFERENT REGIONS
-output              = get_readelf_output('sw/build/main.elf')
-program_headers     = parse_program_headers(output)
-section_to_segment  = parse_section_to_segment(output)
-regions             = get_regions(program_headers, section_to_segment)
-
-# OBTAIN THE NUMBER AND SIZE OF THE BANKS
-num_banks, num_il_banks, bank_sizes_B = get_banks_and_sizes('hw/core-v-mini-mcu/include/core_v_mini_mcu_pkg.sv')
-total_size_B = sum(bank_sizes_B)
-print(f"Total space: {total_size_B/1024:0.1f} kB = Continuous:",[int(s/1024) for s in bank_sizes_B[:num_banks-num_il_banks]],"kB + Interleaved:", [int(s/1024) for s in bank_sizes_B[-num_il_banks:]] if num_il_banks else [0], "kB")
-
-# CONVERT THE BANKS INTO A LIST OF DICTIONARIES
-banks = []
-for i in range(num_banks):
-    bank = {
-        'type'  : "Cont" if i<(num_banks-num_il_banks) else "IntL",
-        'size'  : bank_sizes_B[i],
-    }
-    banks.append(bank)
+    offset = min(max(address - bank['start_add'], 0), bank['end_add'] - bank['start_add'])
+    if bank['il_level'] == 0:
+        return offset
+    stride = BANK_WORD_B << bank['il_level']
+    lines, rest = divmod(offset, stride)
+    return lines*BANK_WORD_B + min(max(rest - bank['il_offset']*BANK_WORD_B, 0), BANK_WORD_B)
+
+
+def bank_intervals(bank, regions):
+    """
+    Maps the regions to a bank.
+
+    Returns:
+    intervals - List of (start, end, symbol) tuples, sorted by start, with the offsets in the bank of the
+                bytes of each region held by the bank. Regions with no byte in the bank are left out.
+    """
+    intervals = []
+    for region in regions:
+        start = bank_bytes_below(bank, region['start_add'])
+        end = bank_bytes_below(bank, region['end_add'])
+        if end > start:
+            intervals.append((start, end, region['symbol']))
+    intervals.sort()
+    return intervals
+
+
+def merge_intervals(intervals):
+    """
+    Sweeps sorted (start, end, ...) intervals and merges the ones that overlap or touch.
+
+    Returns:
+    merged - List of disjoint (start, end) tuples, sorted by start
+    """
+    merged = []
+    for start, end, *_ in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def bank_occupancy(banks, regions):
+    """
+    Computes exactly, at byte granularity, which bytes of every bank are used by the regions, for both
+    continuous and interleaved banks. Overlapping regions are only counted once.
+
+    Parameters:
+    banks   - List of bank dictionaries, as returned by get_banks
+    regions - List of region dictionaries with start_add, end_add and symbol, as returned by get_regions
 
-# GET THE MEMORY REGIONS FOR CODE AND DATA, TRANSLATE ramx to code, data, IL
-# If there are no IL banks, create an entry with length 0
-sections = get_memory_sections('sw/build/main.map')
-try:
+    Returns:
+    occupancy - List with, for each bank, a dictionary with its name, type and size, the used bytes (used_B),
+                the utilization in percent, and the used intervals of the bank (see bank_intervals)
+    """
+    occupancy = []
+    for bank in banks:
+        intervals = bank_intervals(bank, regions)
+        used_B = sum(end - start for start, end in merge_intervals(intervals))
+        occupancy.append({
+            'name'        : bank['name'],
+            'type'        : bank['type'],
+            'size'        : bank['size'],
+            'used_B'      : used_B,
+            'utilization' : 100*used_B/bank['size'],
+            'intervals'   : intervals,
+        })
+    return occupancy
+
+
+def bank_use_map(bank_occupancy, granularity_B):
+    """
+    Draws the use of a bank, with one character for each granularity_B bytes: the symbol of the region
+    using most of these bytes, or '-' if they are all free.
+    """
+    pieces = [dict() for _ in range(-(-bank_occupancy['size'] // granularity_B))]
+    for start, end, symbol in bank_occupancy['intervals']:
+        for piece in range(start // granularity_B, (end - 1) // granularity_B + 1):
+            overlap = min(end, (piece + 1)*granularity_B) - max(start, piece*granularity_B)
+            pieces[piece][symbol] = pieces[piece].get(symbol, 0) + overlap
+    return ''.join(max(piece, key=piece.get) if piece else '-' for piece in pieces)
+
+
+def get_bank_utilization(elf_path, cache_path='build/xheep_config_cache.json'):
+    """
+    Computes the utilization of every memory bank by an application.
+
+    Parameters:
+    elf_path   - path of the ELF file of the application
+    cache_path - path of the cached X-HEEP configuration
+
+    Returns:
+    occupancy - List with the occupancy of each bank, see bank_occupancy
+    """
+    banks, _ = get_banks(cache_path)
+    with ElfFile(elf_path) as elf:
+        regions = get_regions(elf.segments(), elf.section_to_segment())
+    return bank_occupancy(banks, regions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Displays the usage of the memory banks by an application "
+                                                 "and writes it, with the size of every symbol, to a JSON report.")
+    parser.add_argument('build_dir', nargs='?', default='sw/build',
+                        help="Folder where the application was built (default: sw/build)")
+    parser.add_argument('--cache', default='build/xheep_config_cache.json',
+                        help="Cached X-HEEP configuration (default: build/xheep_config_cache.json)")
+    parser.add_argument('--json', default=None,
+                        help="Path of the JSON report (default: <build_dir>/mem_usage.json)")
+    args = parser.parse_args()
+
+    elf_path = os.path.join(args.build_dir, 'main.elf')
+    json_path = args.json if args.json else os.path.join(args.build_dir, 'mem_usage.json')
+
+    # OBTAIN THE BANKS AND THE LINKER SECTIONS FROM THE CACHED CONFIGURATION
+    try:
+        banks, sections = get_banks(args.cache)
+    except FileNotFoundError:
+        print(f"{args.cache} not found, generate it with make mcu-gen. Will not print the memory utilization report.")
+        return
+    except StaleSnapshotError as e:
+        print(f"{e}. Will not print the memory utilization report.")
+        return
+
+    # READ THE ELF FILE TO OBTAIN THE DIFFERENT REGIONS
+    try:
+        with ElfFile(elf_path) as elf:
+            program_headers    = elf.segments()
+            section_to_segment = elf.section_to_segment()
+            regions            = get_regions(program_headers, section_to_segment)
+            symbols            = get_symbols(elf)
+    except FileNotFoundError:
+        print(f"{elf_path} not found. Will not print the memory utilization report.")
+        return
+    except ValueError as e:
+        print(f"{e}. Will not print the memory utilization report.")
+        return
+
+    num_banks = len(banks)
+    num_il_banks = len([bank for bank in banks if bank['type'] == 'IntL'])
+    bank_sizes_B = [bank['size'] for bank in banks]
+    total_size_B = sum(bank_sizes_B)
+    print(f"Total space: {total_size_B/1024:0.1f} kB = Continuous:",[int(s/1024) for s in bank_sizes_B[:num_banks-num_il_banks]],"kB + Interleaved:", [int(s/1024) for s in bank_sizes_B[-num_il_banks:]] if num_il_banks else [0], "kB")
+
+    # TRANSLATE THE LINKER SECTIONS ramx TO code, data, IL
+    # If there are no IL banks, create an entry with length 0
+    # The code executed from flash is not in any bank
+    ram_start = min(bank['start_add'] for bank in banks)
+    ram_end = max(bank['end_add'] for bank in banks)
+    if 'ram0' not in sections or 'ram1' not in sections or \
+            any(region['start_add'] < ram_start or region['end_add'] > ram_end for region in regions):
+        print("Memory distribution analysis not available for LINKER=flash_exec")
+        return
     sections['code'] = sections.pop('ram0')
     sections['data'] = sections.pop('ram1')
-    sections['ildt'] = sections.pop('ram2') if num_il_banks else {'origin':sections['data']['origin'] +sections['data']['length'], 'length':0}
-except:
-    print("Memory distribution analysis not available for LINKER=flash_exec")
-    quit()
-
-# Compute the total space used for code and data
-total_space_used_code = sum(region['size_B'] for region in regions if region['name'] == 'code')
-total_space_used_data = sum(region['size_B'] for region in regions if region['name'] == 'data')
-total_space_used_ildt = sum(region['size_B'] for region in regions if region['name'] == 'IL data')
-
-# Compute the total space required to store code and data
-code_regions = [region for region in regions if region['name'] == 'code']
-data_regions = [region for region in regions if region['name'] == 'data']
-ildt_regions = [region for region in regions if region['name'] == 'IL data']
-
-min_code_start = min(region['start_add'] for region in code_regions) if code_regions else 0
-max_code_end = max(region['end_add'] for region in code_regions) if code_regions else 0
-total_space_required_code = max_code_end - min_code_start
-
-min_data_start = min(region['start_add'] for region in data_regions) if data_regions else 0
-max_data_end = max(region['end_add'] for region in data_regions) if data_regions else 0
-total_space_required_data = max_data_end - min_data_start
-
-min_ildt_start = min(region['start_add'] for region in ildt_regions) if ildt_regions else 0
-max_ildt_end = max(region['end_add'] for region in ildt_regions) if ildt_regions else 0
-total_space_required_ildt = max_ildt_end - min_ildt_start
-
-# # PRINT THE SUMMARY OF UTILIZATION
-print( "Region \t Start \tEnd\tSz(kB)\tUsd(kB)\tReq(kB)\tUtilz(%) ")
-print(f"Code:  \t{sections['code']['origin']/1024:5.1f}\t{(sections['code']['origin']+sections['code']['length'])/1024:5.1f}\t{sections['code']['length']/1024:5.1f}\t{total_space_used_code/1024:0.1f}\t{total_space_required_code/1024:5.1f}\t{100*total_space_required_code/sections['code']['length']:0.1f}")
-print(f"Data:  \t{sections['data']['origin']/1024:5.1f}\t{(sections['data']['origin']+sections['data']['length'])/1024:5.1f}\t{sections['data']['length']/1024:5.1f}\t{total_space_used_data/1024:0.1f}\t{total_space_required_data/1024:5.1f}\t{100*total_space_required_data/sections['data']['length']:0.1f}")
-if num_il_banks:
-    print(f"ILdata:\t{sections['ildt']['origin']/1024:5.1f}\t{(sections['ildt']['origin']+sections['ildt']['length'])/1024:5.1f}\t{sections['ildt']['length']/1024:5.1f}\t{total_space_used_ildt/1024:0.1f}\t{total_space_required_ildt/1024:5.1f}\t{100*total_space_required_ildt/sections['ildt']['length']:0.1f}")
-
-
-# DISPLAY THE UTILIZATION BY SHOWING THE BANKS 
-# Cont for continuous, IntL for interleaved
-# The area used by code is identified with a C
-# The area used by data is identified with a d
-# The utilization is shown at the end
-# The granularity stands for how many Bytes each character represents
-char            = '.'
-address         = 0
-granularity_B   = 32*1024/100   # To show 100 divisions per bank
-granularity_B   = 1024          # To show each division having a value of 1kB
-start_IL_B      = sum(bank_sizes_B[:-num_il_banks])
-
-print("")
-for bank_idx, bank in enumerate(banks):
-    bank['use'] = ['-']*int((bank['size']/granularity_B))
-    utilization = 0
-
-    if bank['type'] == 'Cont':
-        for piece in range(len(bank['use'])):
-            address += granularity_B
-
-            bank['use'][piece] = '-'
-            for region in regions:
-                if address> region['start_add'] and address <= region['end_add']:
-                    bank['use'][piece] = region['symbol']
-                    utilization += granularity_B
-            
-    if bank['type'] == "IntL":
-        for piece in range(len(bank['use'])):
-            address = start_IL_B + granularity_B*piece
-            bank['use'][piece] = '-'
-            for region in regions:
-                used_by_others = (region['size_B']*(num_il_banks-1)/num_il_banks)
-                if address>= region['start_add'] and address < region['end_add'] - used_by_others:
-                    bank['use'][piece] = region['symbol']
-                    utilization += granularity_B
-
-    bank['use'] = ''.join([''.join(sublist) for sublist in bank['use']])
-    print(bank['type'],bank_idx,bank['use'], f"\t{100*(utilization/bank['size']):0.1f}%")
+    sections['ildt'] = sections.pop('ram2') if num_il_banks and 'ram2' in sections else {'origin':sections['data']['origin'] +sections['data']['length'], 'length':0}
+
+    # Compute the total space used and required to store code and data
+    total_space_used_code, total_space_required_code = region_usage(regions, 'code')
+    total_space_used_data, total_space_required_data = region_usage(regions, 'data')
+    total_space_used_ildt, total_space_required_ildt = region_usage(regions, 'IL data')
+
+    # # PRINT THE SUMMARY OF UTILIZATION
+    print( "Region \t Start \tEnd\tSz(kB)\tUsd(kB)\tReq(kB)\tUtilz(%) ")
+    print(f"Code:  \t{sections['code']['origin']/1024:5.1f}\t{(sections['code']['origin']+sections['code']['length'])/1024:5.1f}\t{sections['code']['length']/1024:5.1f}\t{total_space_used_code/1024:0.1f}\t{total_space_required_code/1024:5.1f}\t{100*total_space_required_code/sections['code']['length']:0.1f}")
+    print(f"Data:  \t{sections['data']['origin']/1024:5.1f}\t{(sections['data']['origin']+sections['data']['length'])/1024:5.1f}\t{sections['data']['length']/1024:5.1f}\t{total_space_used_data/1024:0.1f}\t{total_space_required_data/1024:5.1f}\t{100*total_space_required_data/sections['data']['length']:0.1f}")
+    if sections['ildt']['length']:
+        print(f"ILdata:\t{sections['ildt']['origin']/1024:5.1f}\t{(sections['ildt']['origin']+sections['ildt']['length'])/1024:5.1f}\t{sections['ildt']['length']/1024:5.1f}\t{total_space_used_ildt/1024:0.1f}\t{total_space_required_ildt/1024:5.1f}\t{100*total_space_required_ildt/sections['ildt']['length']:0.1f}")
+
+
+    # DISPLAY THE UTILIZATION BY SHOWING THE BANKS
+    # Cont for continuous, IntL for interleaved
+    # The area used by code is identified with a C
+    # The area used by data is identified with a d
+    # The utilization is shown at the end
+    # The granularity stands for how many Bytes each character represents
+    granularity_B   = 1024          # To show each division having a value of 1kB
+    occupancy       = bank_occupancy(banks, regions)
+
+    print("")
+    for bank_idx, (bank, use) in enumerate(zip(banks, occupancy)):
+        bank['used_B'] = use['used_B']
+        bank['utilization'] = use['utilization']
+        bank['used'] = [list(interval) for interval in use['intervals']]
+        print(bank['type'],bank_idx,bank_use_map(use, granularity_B), f"\t{use['utilization']:0.1f}%")
+
+    # WRITE THE JSON REPORT
+    report = {
+        'elf'      : elf_path,
+        'banks'    : banks,
+        'regions'  : {
+            'code' : dict(sections['code'], used_B=total_space_used_code, required_B=total_space_required_code),
+            'data' : dict(sections['data'], used_B=total_space_used_data, required_B=total_space_required_data),
+            'ildt' : dict(sections['ildt'], used_B=total_space_used_ildt, required_B=total_space_required_ildt),
+        },
+        'segments' : [dict(ph, sections=section_to_segment[idx]) for idx, ph in enumerate(program_headers)],
+        'symbols'  : symbols,
+    }
+    with open(json_path, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"\nReport written to {json_path}")
+
 
+if __name__ == '__main__':
+    main()
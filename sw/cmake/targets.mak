@@ -15,18 +15,18 @@
 
 # Author: Jose Miranda, Juan Sapriza (jose.mirandacalero / juan.sapriza @epfl.ch)
 
-build : build/Makefile
+build : ${BUILD_DIR}/Makefile
 	@echo Build 
-	${MAKE} -s -C build
+	${MAKE} -s -C ${BUILD_DIR}
 
-setup : build/Makefile
+setup : ${BUILD_DIR}/Makefile
 
-build/Makefile : CMakeLists.txt ${CMAKE_DIR}/riscv.cmake
-	@if [ ! -d build ] ; then mkdir build ; fi
-	@cd build;  \
+${BUILD_DIR}/Makefile : CMakeLists.txt ${CMAKE_DIR}/riscv.cmake
+	@if [ ! -d ${BUILD_DIR} ] ; then mkdir -p ${BUILD_DIR} ; fi
+	@cd ${BUILD_DIR};  \
 		${CMAKE} \
 		    -G "Unix Makefiles" \
-			-DCMAKE_TOOLCHAIN_FILE=../${CMAKE_DIR}/riscv.cmake \
+			-DCMAKE_TOOLCHAIN_FILE=${ROOT_PROJECT}${CMAKE_DIR}/riscv.cmake \
 			-DROOT_PROJECT=${ROOT_PROJECT} \
 			-DSOURCE_PATH=${SOURCE_PATH} \
 			-DTARGET=${TARGET} \
@@ -38,10 +38,10 @@ build/Makefile : CMakeLists.txt ${CMAKE_DIR}/riscv.cmake
 			-DCOMPILER_PREFIX:STRING=${COMPILER_PREFIX} \
 			-DCOMPILER_FLAGS:STRING=${COMPILER_FLAGS}\
 			-DVERBOSE:STRING=${VERBOSE} \
-		    ../ 
+		    ${ROOT_PROJECT}
 
 clean:
-	rm -rf build
+	rm -rf ${BUILD_DIR}
 
 .PHONY: setup build
 .SUFFIXES:
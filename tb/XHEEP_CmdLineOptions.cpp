@@ -56,6 +56,18 @@ std::string XHEEP_CmdLineOptions::get_firmware()
   return firmware;
 }
 
+std::string XHEEP_CmdLineOptions::get_firmware_banks()
+{
+
+  std::string firmware_banks = this->getCmdOption(this->argc, this->argv, "+firmware_banks=");
+
+  if(!firmware_banks.empty()){
+    std::cout<<"[TESTBENCH]: loading the memory banks from "<<firmware_banks<<std::endl;
+  }
+
+  return firmware_banks;
+}
+
 
 unsigned long long XHEEP_CmdLineOptions::get_max_sim_time(bool& run_all)
 {
@@ -15,6 +15,7 @@ class XHEEP_CmdLineOptions // declare Calculator class
     std::string getCmdOption(int argc, char* argv[], const std::string& option); // get options from cmd lines
     bool get_use_openocd();
     std::string get_firmware();
+    std::string get_firmware_banks();
     unsigned long long get_max_sim_time(bool& run_all);
     unsigned int get_boot_sel();
     int argc;
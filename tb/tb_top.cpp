@@ -26,7 +26,7 @@ void runCycles(unsigned int ncycles, Vtestharness *dut, VerilatedFstC *m_trace){
 int main (int argc, char * argv[])
 {
 
-  std::string firmware;
+  std::string firmware, firmware_banks;
   vluint64_t max_sim_time;
   unsigned int boot_sel, exit_val;
   bool use_openocd;
@@ -47,6 +47,7 @@ int main (int argc, char * argv[])
 
   use_openocd = cmd_lines_options->get_use_openocd();
   firmware = cmd_lines_options->get_firmware();
+  firmware_banks = cmd_lines_options->get_firmware_banks();
 
   if(firmware.empty() && use_openocd==false){
       std::cout<<"You must specify the firmware if you are not using OpenOCD"<<std::endl;
@@ -92,7 +93,11 @@ int main (int argc, char * argv[])
   if(boot_sel != 1) {
     //Booting from JTAG or loading the memory from the testbench
     if(use_openocd==false) {
-      dut->tb_loadHEX(firmware.c_str());
+      if(firmware_banks.empty()) {
+        dut->tb_loadHEX(firmware.c_str());
+      } else {
+        dut->tb_loadBankHEX(firmware_banks.c_str());
+      }
       runCycles(1, dut, m_trace);
       //you need to exit from the bootrom loop if not using OpenOCD
       dut->tb_set_exit_loop();
@@ -62,7 +62,7 @@ module tb_top #(
   // we either load the provided firmware or execute a small test program that
   // doesn't do more than an infinite loop with some I/O
   initial begin : load_prog
-    automatic string firmware, arg_boot_sel, arg_execute_from_flash;
+    automatic string firmware, firmware_banks, arg_boot_sel, arg_execute_from_flash;
 
     if ($value$plusargs("firmware=%s", firmware)) begin
       $display("[TESTBENCH]: loading firmware %0s", firmware);
@@ -124,7 +124,12 @@ module tb_top #(
     end
 
     if (JTAG_DPI == 0 && boot_sel == 0) begin
-      testharness_i.tb_loadHEX(firmware);
+      if ($value$plusargs("firmware_banks=%s", firmware_banks)) begin
+        $display("[TESTBENCH]: loading the memory banks from %0s", firmware_banks);
+        testharness_i.tb_loadBankHEX(firmware_banks);
+      end else begin
+        testharness_i.tb_loadHEX(firmware);
+      end
       #CLK_PHASE_HI testharness_i.tb_set_exit_loop();
       #CLK_PHASE_LO if ($test$plusargs("verbose")) $display("[TESTBENCH] %t: memory loaded", $time);
     end else begin
@@ -10,6 +10,7 @@
 // Task for loading 'mem' with SystemVerilog system task $readmemh()
 export "DPI-C" task tb_readHEX;
 export "DPI-C" task tb_loadHEX;
+export "DPI-C" task tb_loadBankHEX;
 % for bank in memory_ss.iter_ram_banks():
 export "DPI-C" task tb_writetoSram${bank.name()};
 % endfor
@@ -88,6 +89,16 @@ task tb_loadHEX;
 
 endtask
 
+// Task for loading every SRAM bank with the preload files written by
+// scripts/building/bank_images.py (dir/ram<bank>.hex), in zero simulated time
+task tb_loadBankHEX;
+  input string dir;
+% for bank in memory_ss.iter_ram_banks():
+  $readmemh({dir, "/ram${bank.name()}.hex"},
+            x_heep_system_i.core_v_mini_mcu_i.memory_subsystem_i.ram${bank.name()}_i.tc_ram_i.sram);
+% endfor
+endtask
+
 % for bank in memory_ss.iter_ram_banks():
 task tb_writetoSram${bank.name()};
   input int addr;
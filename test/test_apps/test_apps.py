@@ -6,14 +6,46 @@ FUTURE WORK:
 """
 
 import argparse
+import collections
+import glob
+import hashlib
+import json
 import os
+import queue
+import shutil
+import signal
 import subprocess
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 # Timeout for the simulation in seconds
 SIM_TIMEOUT_S = 180
 
+# Adaptive timeouts: an app with a runtime history gets SIM_TIMEOUT_FACTOR
+# times its longest recent wall time, within [SIM_TIMEOUT_MIN_S, SIM_TIMEOUT_MAX_S].
+# Apps without history get SIM_TIMEOUT_S.
+SIM_TIMEOUT_FACTOR = 3
+SIM_TIMEOUT_MIN_S = 30
+SIM_TIMEOUT_MAX_S = 1800
+
+# Runtime history of the simulations, kept between runs, and number of
+# simulations of each app remembered
+HISTORY_FILE = os.path.abspath("build/test_apps_history.json")
+HISTORY_LENGTH = 10
+
+# Time given to the simulator to exit by itself once the program finished, in seconds
+SIM_EXIT_GRACE_S = 5
+
+# Number of output lines of the simulation kept for the failure reports
+SIM_OUTPUT_TAIL_LINES = 200
+
+# Folder where the apps are built. Every compilation worker builds in its own
+# sub-folder, and the firmware of each app is kept in firmware/ until it is simulated
+TEST_BUILD_DIR = os.path.abspath("build/test_apps")
+
 # Available compilers
 COMPILERS = ["gcc", "clang"]
 COMPILER_PATH = [os.environ.get("RISCV_XHEEP") for _ in COMPILERS]
@@ -22,12 +54,40 @@ COMPILER_PREFIXES = ["riscv32-unknown-" for _ in COMPILERS]
 # Available simulators
 SIMULATORS = ["verilator"]
 
+# Folder where the compiled apps are cached, kept between runs
+COMPILE_CACHE_DIR = os.path.abspath("build/test_apps_cache")
+
+# Files compiled into every app: everything in sw/ except the applications
+# and the build folders
+SW_DIR = "sw"
+SW_EXCLUDED_DIRS = ["applications", "build"]
+
+# Build outputs stored in the compilation cache
+CACHED_ARTIFACTS = ["main.elf", "main.hex"]
+
+# Models built by FuseSoC for the simulators that can be launched directly,
+# relative to the build folder. The first match is used.
+SIMULATOR_MODELS = {
+    "verilator": "build/openhwgroup.org_systems_core-v-mini-mcu_*/sim-verilator/Vtestharness",
+}
+
 # Pattern to look for when simulating an app to see if the app finished
 # correctly or not
 ERROR_PATTERN_DICT = {
     "verilator": r"Program Finished with value (\d+)",
 }
 
+# Pattern of the simulated time printed at the end of the simulation
+SIM_CYCLES_PATTERN_DICT = {
+    "verilator": r"Simulation finished after (\d+) clock cycles",
+}
+
+# Patterns of the simulator errors, the simulation is stopped as soon as
+# one of them is found
+SIM_FAILURE_PATTERN_DICT = {
+    "verilator": r"%Error|%Fatal|\[TESTBENCH\]: ERROR",
+}
+
 # Whitelist of apps. Has priority over the blacklist.
 # Useful if you only want to test certain apps
 WHITELIST = [
@@ -121,13 +181,150 @@ class Application:
         return all(self.compilation_success.values())
 
 
-def compile_app(an_app, compiler_path, compiler_prefix, compiler, linker):
+def tree_digest(digest, path, excluded_dirs=()):
+    """
+    Adds the relative path and the content of every file under path to the
+    hashlib digest, in a deterministic order. The folders named in
+    excluded_dirs are skipped, at the top level only.
+    """
+    for root, dirs, files in os.walk(path):
+        if root == path:
+            dirs[:] = [d for d in dirs if d not in excluded_dirs]
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode("utf-8") + b"\0")
+            with open(file_path, "rb") as f:
+                digest.update(f.read())
+            digest.update(b"\0")
+
+
+class CompileCache:
+    """
+    Content-addressed cache of the compiled apps. The key of a compilation
+    covers the app folder, the rest of sw/ (device sources, generated
+    core_v_mini_mcu.h, linker scripts, CMake files), the compiler version
+    and the compilation options. Only successful compilations are stored.
     """
-    Compile an_app with the compiler and linker. Outputs if
-    it finishes with errors or without.
+
+    def __init__(self, cache_dir=COMPILE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._compiler_versions = {}
+        # The shared sources do not change during a run
+        sw_digest = hashlib.sha256()
+        tree_digest(sw_digest, SW_DIR, SW_EXCLUDED_DIRS)
+        self._sw_digest = sw_digest.hexdigest()
+
+    def compiler_version(self, compiler_path, compiler_prefix, compiler):
+        """
+        Returns the version output of the compiler (clang links with the
+        gcc toolchain, so both are used), or None if it cannot be run.
+        """
+        toolchain = (compiler_path, compiler_prefix, compiler)
+        with self._lock:
+            if toolchain in self._compiler_versions:
+                return self._compiler_versions[toolchain]
+
+        executables = [os.path.join(compiler_path, "bin", f"{compiler_prefix}elf-gcc")]
+        if compiler == "clang":
+            executables.append(os.path.join(compiler_path, "bin", "clang"))
+        version = ""
+        try:
+            for executable in executables:
+                version += subprocess.run(
+                    [executable, "--version"], capture_output=True, check=True
+                ).stdout.decode("utf-8")
+        except (OSError, subprocess.CalledProcessError):
+            version = None
+
+        with self._lock:
+            self._compiler_versions[toolchain] = version
+        return version
+
+    def key(self, an_app, compiler_path, compiler_prefix, compiler, linker):
+        """
+        Returns the cache key of the compilation of an_app, or None if the
+        compilation cannot be cached.
+        """
+        version = self.compiler_version(compiler_path, compiler_prefix, compiler)
+        if version is None:
+            return None
+        digest = hashlib.sha256()
+        for field in [
+            self._sw_digest,
+            version,
+            compiler_prefix or "",
+            compiler or "",
+            linker or "",
+            os.environ.get("COMPILER_FLAGS", ""),
+            os.environ.get("ARCH", ""),
+            an_app.name,
+        ]:
+            digest.update(field.encode("utf-8") + b"\0")
+        tree_digest(digest, os.path.join(SW_DIR, "applications", an_app.name))
+        return digest.hexdigest()
+
+    def restore(self, key, build_dir):
+        """
+        Copies the cached build outputs to build_dir.
+
+        Returns True on a cache hit and False otherwise.
+        """
+        entry = os.path.join(self.cache_dir, key)
+        if not all(os.path.exists(os.path.join(entry, a)) for a in CACHED_ARTIFACTS):
+            return False
+        shutil.rmtree(build_dir, ignore_errors=True)
+        os.makedirs(build_dir)
+        for artifact in CACHED_ARTIFACTS:
+            shutil.copyfile(os.path.join(entry, artifact), os.path.join(build_dir, artifact))
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key, build_dir):
+        """
+        Stores the build outputs of build_dir in the cache.
+        """
+        entry = os.path.join(self.cache_dir, key)
+        if os.path.exists(entry):
+            return
+        # Written next to the entry and renamed, so that a partial entry is never used
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_entry)
+        try:
+            for artifact in CACHED_ARTIFACTS:
+                shutil.copyfile(os.path.join(build_dir, artifact), os.path.join(tmp_entry, artifact))
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Missing output or entry stored by another worker
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+
+def compile_app(
+    an_app, compiler_path, compiler_prefix, compiler, linker, build_dir=None, cache=None
+):
+    """
+    Compile an_app with the compiler and linker in build_dir (sw/build by
+    default). Outputs if it finishes with errors or without. If a
+    CompileCache is given, the outputs of an identical previous compilation
+    are reused.
 
     Returns True if the compilation succeded and False otherwise.
     """
+    cache_key = None
+    if cache:
+        cache_key = cache.key(an_app, compiler_path, compiler_prefix, compiler, linker)
+        if cache_key and cache.restore(cache_key, build_dir or os.path.join(SW_DIR, "build")):
+            print(
+                BColors.OKGREEN
+                + f"Compiled {an_app.name} with {compiler} and {linker} linker successfully (cached)."
+                + BColors.ENDC,
+                flush=True,
+            )
+            return True
+
     print(
         BColors.OKBLUE
         + f"Compiling {an_app.name} with {compiler} and linker {linker}"
@@ -136,7 +333,11 @@ def compile_app(an_app, compiler_path, compiler_prefix, compiler, linker):
     )
     try:
         compile_command = ["make", "app", f"PROJECT={an_app.name}"]
-        os.environ["RISCV_XHEEP"] = compiler_path
+        # Several apps may be compiled at the same time, so the environment
+        # of the process is left untouched
+        compile_env = dict(os.environ, RISCV_XHEEP=compiler_path)
+        if build_dir:
+            compile_command.append(f"APP_BUILD_DIR={build_dir}")
         if compiler_prefix:
             compile_command.append(f"COMPILER_PREFIX={compiler_prefix}")
         if compiler:
@@ -145,7 +346,7 @@ def compile_app(an_app, compiler_path, compiler_prefix, compiler, linker):
             compile_command.append(f"LINKER={linker}")
 
         _ = subprocess.run(
-            compile_command, capture_output=True, check=True
+            compile_command, capture_output=True, check=True, env=compile_env
         )
     except subprocess.CalledProcessError as exc:
         print(
@@ -156,6 +357,8 @@ def compile_app(an_app, compiler_path, compiler_prefix, compiler, linker):
         print(exc.stderr.decode("utf-8"), flush=True)
         return False
     else:
+        if cache_key:
+            cache.store(cache_key, build_dir or os.path.join(SW_DIR, "build"))
         print(
             BColors.OKGREEN
             + f"Compiled {an_app.name} with {compiler} and {linker} linker successfully."
@@ -165,10 +368,196 @@ def compile_app(an_app, compiler_path, compiler_prefix, compiler, linker):
         return True
 
 
-def run_app(an_app, simulator):
+class RuntimeHistory:
+    """
+    Simulated time and wall time of the last HISTORY_LENGTH simulations of
+    every app, stored in a JSON file. It gives per-app simulation timeouts
+    and the expected simulation time used to schedule the longest apps first.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._apps = {}
+        try:
+            with open(path, "r") as f:
+                history = json.load(f)
+            if history.get("version") == self.VERSION:
+                self._apps = history["apps"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            # No history yet, or an unreadable one that is started again
+            pass
+
+    def _runs(self, app_name, simulator):
+        return self._apps.get(app_name, {}).get(simulator, [])
+
+    def timeout(self, app_name, simulator):
+        """
+        Returns the simulation timeout of the app in seconds.
+        """
+        with self._lock:
+            wall_times = [run["wall_time_s"] for run in self._runs(app_name, simulator)]
+        if not wall_times:
+            return SIM_TIMEOUT_S
+        timeout = SIM_TIMEOUT_FACTOR * max(wall_times)
+        return min(max(timeout, SIM_TIMEOUT_MIN_S), SIM_TIMEOUT_MAX_S)
+
+    def expected_time(self, app_name):
+        """
+        Returns the expected wall time in seconds of the simulations of the
+        app with every simulator. Apps without history are expected to take
+        SIM_TIMEOUT_S, so that they are started early.
+        """
+        expected = 0
+        with self._lock:
+            for simulator in SIMULATORS:
+                runs = self._runs(app_name, simulator)
+                expected += runs[-1]["wall_time_s"] if runs else SIM_TIMEOUT_S
+        return expected
+
+    def record(self, app_name, simulator, result, wall_time_s, cycles=None):
+        """
+        Records a simulation that finished (passed or failed). Timed out
+        simulations are not recorded, as their wall time is only a bound.
+        """
+        if result not in (SimResult.PASSED, SimResult.FAILED):
+            return
+        with self._lock:
+            runs = self._apps.setdefault(app_name, {}).setdefault(simulator, [])
+            runs.append(
+                {
+                    "result": result,
+                    "wall_time_s": round(wall_time_s, 3),
+                    "cycles": cycles,
+                    "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+            )
+            del runs[:-HISTORY_LENGTH]
+
+    def save(self):
+        """
+        Writes the history to its file.
+        """
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.VERSION, "apps": self._apps}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+class SimMonitor:
     """
-    Runs an_app with the simulator. Checks if it times out. Outputs if
-    it finishes with errors or without.
+    Runs a simulation and reads its output while it runs. The simulation is
+    stopped as soon as the program finished (after SIM_EXIT_GRACE_S seconds
+    to exit by itself), a simulator error is printed or the timeout expires.
+    Only the last SIM_OUTPUT_TAIL_LINES lines of the output are kept.
+    """
+
+    # Possible outcomes of the simulation
+    FINISHED = "finished"
+    ERROR = "error"
+    EXITED = "exited"
+    TIMED_OUT = "timed out"
+
+    def __init__(self, finish_pattern, failure_pattern, timeout):
+        self.finish_pattern = re.compile(finish_pattern)
+        self.failure_pattern = re.compile(failure_pattern)
+        self.timeout = timeout
+        self.tail = collections.deque(maxlen=SIM_OUTPUT_TAIL_LINES)
+        self.finish_match = None
+
+    def output(self):
+        """
+        Returns the last lines of the output.
+        """
+        return "".join(self.tail)
+
+    def run(self, command, cwd=None):
+        """
+        Runs the command and returns the outcome of the simulation.
+        """
+        # In its own process group, so that the simulator launched by make
+        # or FuseSoC is stopped too
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=cwd,
+            start_new_session=True,
+        )
+        lines = queue.Queue()
+        reader = threading.Thread(target=self._read, args=(process.stdout, lines))
+        reader.daemon = True
+        reader.start()
+
+        deadline = time.monotonic() + self.timeout
+        outcome = self.EXITED
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    outcome = self.TIMED_OUT
+                    break
+                try:
+                    line = lines.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    break
+                self.tail.append(line)
+                if self.failure_pattern.search(line):
+                    outcome = self.ERROR
+                    break
+                if self.finish_match is None:
+                    self.finish_match = self.finish_pattern.search(line)
+                    if self.finish_match:
+                        outcome = self.FINISHED
+                        # Let the simulator close its logs and waveforms
+                        deadline = min(deadline, time.monotonic() + SIM_EXIT_GRACE_S)
+        finally:
+            self._stop(process)
+            reader.join()
+
+        if outcome == self.TIMED_OUT and self.finish_match:
+            # The program finished but the simulator did not exit in time
+            outcome = self.FINISHED
+        return outcome
+
+    @staticmethod
+    def _read(stream, lines):
+        for line in iter(stream.readline, b""):
+            lines.put(line.decode("utf-8", errors="replace"))
+        stream.close()
+        lines.put(None)
+
+    @staticmethod
+    def _stop(process):
+        if process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+                process.wait(timeout=SIM_EXIT_GRACE_S)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        process.wait()
+
+
+def run_app(an_app, simulator, firmware=None, model=None, history=None):
+    """
+    Runs an_app with the simulator, loading the firmware hex file (the one
+    in sw/build by default). Checks if it times out. Outputs if it finishes
+    with errors or without.
+
+    If the path of the simulator model is given, it is launched directly in
+    a folder of its own instead of going through FuseSoC, so that several
+    apps can be simulated at the same time with the same model.
+
+    If a RuntimeHistory is given, the timeout comes from the previous runs
+    of an_app and this run is recorded.
 
     Returns the SimResult for the simulation of an_app.
     """
@@ -176,46 +565,97 @@ def run_app(an_app, simulator):
         BColors.OKBLUE + f"Running {an_app.name} with {simulator}..." + BColors.ENDC,
         flush=True,
     )
-    try:
-        run_output = subprocess.run(
-            ["make", f"{simulator}-run"],
-            capture_output=True,
-            timeout=SIM_TIMEOUT_S,
-            check=False,
+    run_dir = None
+    if model:
+        # The model writes the UART log and the waveform in its working folder
+        run_dir = os.path.join(TEST_BUILD_DIR, "sim", f"{an_app.name}-{simulator}")
+        os.makedirs(run_dir, exist_ok=True)
+        run_command = [model, f"+firmware={os.path.abspath(firmware)}"]
+    else:
+        run_command = ["make", f"{simulator}-run"]
+        if firmware:
+            run_command.append(f"FIRMWARE={firmware}")
+    timeout = history.timeout(an_app.name, simulator) if history else SIM_TIMEOUT_S
+    monitor = SimMonitor(
+        ERROR_PATTERN_DICT[simulator], SIM_FAILURE_PATTERN_DICT[simulator], timeout
+    )
+    start = time.monotonic()
+    outcome = monitor.run(run_command, cwd=run_dir)
+    wall_time_s = time.monotonic() - start
+    result = sim_result(an_app, simulator, monitor, outcome, timeout, run_dir)
+
+    if history:
+        cycles = re.search(SIM_CYCLES_PATTERN_DICT[simulator], monitor.output())
+        history.record(
+            an_app.name,
+            simulator,
+            result,
+            wall_time_s,
+            int(cycles.group(1)) if cycles else None,
         )
-    except subprocess.TimeoutExpired:
+    return result
+
+
+def sim_result(an_app, simulator, monitor, outcome, timeout, run_dir):
+    """
+    Outputs the result of the simulation of an_app run by the SimMonitor,
+    the UART log being in run_dir if it was launched directly.
+
+    Returns the SimResult.
+    """
+    if outcome == SimMonitor.TIMED_OUT:
         print(
             BColors.FAIL
-            + f"Simulation of {an_app.name} with {simulator} timed out."
+            + f"Simulation of {an_app.name} with {simulator} timed out after {timeout:.0f} s."
             + BColors.ENDC,
             flush=True,
         )
         return SimResult.TIMED_OUT
-    else:
-        match = re.search(
-            ERROR_PATTERN_DICT[simulator], str(run_output.stdout.decode("utf-8"))
+
+    match = monitor.finish_match
+    if outcome == SimMonitor.FINISHED and match.group(1) == "0":
+        print(
+            BColors.OKGREEN
+            + f"Ran {an_app.name} with {simulator} successfully."
+            + BColors.ENDC,
+            flush=True,
         )
-        if match and match.group(1) == "0":
-            print(
-                BColors.OKGREEN
-                + f"Ran {an_app.name} with {simulator} successfully."
-                + BColors.ENDC,
-                flush=True,
-            )
-            return SimResult.PASSED
-        else:
-            print(
-                BColors.FAIL
-                + f"Simulation of {an_app.name} with {simulator} failed."
-                + BColors.ENDC
-            )
-            print(BColors.FAIL + str(run_output.stdout.decode("utf-8")) + BColors.ENDC)
-            return SimResult.FAILED
+        return SimResult.PASSED
+
+    output = monitor.output()
+    if run_dir:
+        # Printed by FuseSoC after the simulation
+        uart_log = os.path.join(run_dir, "uart0.log")
+        if os.path.exists(uart_log):
+            with open(uart_log, "r", errors="replace") as f:
+                output += "".join(collections.deque(f, maxlen=SIM_OUTPUT_TAIL_LINES))
+    print(
+        BColors.FAIL
+        + f"Simulation of {an_app.name} with {simulator} failed."
+        + BColors.ENDC
+    )
+    print(BColors.FAIL + output + BColors.ENDC)
+    return SimResult.FAILED
+
+
+def find_simulator_model(simulator):
+    """
+    Returns the absolute path of the model built for the simulator, or None
+    if the simulator cannot be launched directly or its model is not built.
+    """
+    if simulator not in SIMULATOR_MODELS:
+        return None
+    models = sorted(glob.glob(SIMULATOR_MODELS[simulator]))
+    if not models or not os.access(models[0], os.X_OK):
+        return None
+    return os.path.abspath(models[0])
 
 
 def build_simulator(simulator):
     """
     Build the simulator model.
+
+    Returns the path of the model (see find_simulator_model).
     """
     print(
         BColors.OKBLUE + f"Generating {simulator} model..." + BColors.ENDC,
@@ -236,6 +676,7 @@ def build_simulator(simulator):
             + BColors.ENDC,
             flush=True,
         )
+        return find_simulator_model(simulator)
 
 
 def get_apps(apps_dir):
@@ -260,6 +701,142 @@ def get_apps(apps_dir):
     return app_list
 
 
+def compile_app_with_all(an_app, toolchains, worker_dirs, firmware_dir, cache):
+    """
+    Compile an_app with every compiler of toolchains, a list of
+    (compiler_path, compiler_prefix, compiler) tuples, in the build folder of
+    a free worker taken from the worker_dirs queue. gcc is left for last, and
+    its firmware is copied to firmware_dir so that the worker can build the
+    next app while this one waits to be simulated. cache is the
+    CompileCache to use, or None.
+
+    Returns the path of the gcc firmware, or None if gcc failed.
+    """
+    build_dir = worker_dirs.get()
+    try:
+        for compiler_path, compiler_prefix, compiler in toolchains:
+            if in_list(an_app.name, CLANG_BLACKLIST) and compiler == "clang":
+                print(
+                    BColors.WARNING
+                    + f"Skipping compiling {an_app.name} with {compiler}..."
+                    + BColors.ENDC,
+                    flush=True,
+                )
+            else:
+                compilation_result = compile_app(
+                    an_app,
+                    compiler_path,
+                    compiler_prefix,
+                    compiler,
+                    "on_chip",
+                    build_dir,
+                    cache,
+                )
+                an_app.set_compilation_status(compiler, compilation_result)
+
+        if not an_app.compilation_success.get("gcc"):
+            return None
+        firmware = os.path.join(firmware_dir, f"{an_app.name}.hex")
+        shutil.copyfile(os.path.join(build_dir, "main.hex"), firmware)
+        return firmware
+    finally:
+        worker_dirs.put(build_dir)
+
+
+def simulate_app(an_app, firmware, models, history):
+    """
+    Run an_app with every simulator, loading its firmware. The simulators
+    found in the models dictionary are launched directly, and the runtimes
+    are recorded in the RuntimeHistory history if any (see run_app).
+    """
+    for simulator in SIMULATORS:
+        # Only run the app with verilator if it is not in the verilator_blacklist
+        if simulator == "verilator" and in_list(an_app.name, VERILATOR_BLACKLIST):
+            an_app.add_simulation_result(simulator, SimResult.SKIPPED)
+            print(
+                BColors.WARNING
+                + f"Skipping running {an_app.name} with verilator..."
+                + BColors.ENDC,
+                flush=True,
+            )
+        else:
+            simulation_result = run_app(
+                an_app, simulator, firmware, models.get(simulator), history
+            )
+            an_app.add_simulation_result(simulator, simulation_result)
+
+
+def test_apps(
+    app_list,
+    toolchains,
+    compile_only,
+    compile_jobs,
+    sim_jobs,
+    models,
+    cache=None,
+    history=None,
+):
+    """
+    Compile every app of app_list with every compiler of toolchains and run
+    it with the simulators. Up to compile_jobs apps are compiled and up to
+    sim_jobs apps are simulated at the same time. An app is simulated as soon
+    as it is compiled, while the other apps are still being compiled. The
+    simulator models, indexed by simulator, are shared by all the apps.
+    Compilations are skipped when they are found in the CompileCache cache.
+    With a RuntimeHistory, the apps expected to simulate for the longest
+    time are started first, to shorten the whole run.
+
+    The results are stored in the apps.
+    """
+    firmware_dir = os.path.join(TEST_BUILD_DIR, "firmware")
+    shutil.rmtree(TEST_BUILD_DIR, ignore_errors=True)
+    os.makedirs(firmware_dir)
+
+    # Every compilation worker builds in its own folder
+    worker_dirs = queue.Queue()
+    for worker in range(compile_jobs):
+        worker_dirs.put(os.path.join(TEST_BUILD_DIR, f"worker{worker}"))
+
+    with ThreadPoolExecutor(max_workers=compile_jobs) as compile_pool, ThreadPoolExecutor(
+        max_workers=sim_jobs
+    ) as sim_pool:
+        scheduled_apps = app_list
+        if history and not compile_only:
+            scheduled_apps = sorted(
+                app_list, key=lambda app: history.expected_time(app.name), reverse=True
+            )
+
+        compilations = {}
+        for an_app in scheduled_apps:
+            # If the app is in the blacklist, print a message and skip it
+            if in_list(an_app.name, BLACKLIST):
+                print(
+                    BColors.WARNING + f"Skipping {an_app.name}..." + BColors.ENDC,
+                    flush=True,
+                )
+                continue
+            future = compile_pool.submit(
+                compile_app_with_all,
+                an_app,
+                toolchains,
+                worker_dirs,
+                firmware_dir,
+                cache,
+            )
+            compilations[future] = an_app
+
+        simulations = []
+        for future in as_completed(compilations):
+            an_app = compilations[future]
+            firmware = future.result()
+            # Run the app with every simulator if the compilation was successful
+            if not compile_only and firmware and an_app.compilation_succeeded():
+                simulations.append(sim_pool.submit(simulate_app, an_app, firmware, models, history))
+
+        for future in as_completed(simulations):
+            future.result()
+
+
 def filter_results(app_list):
     """
     Filters the results from compiling or running the apps and divides
@@ -383,6 +960,8 @@ def main():
     Compiles and runs all the apps in X-HEEP.
 
     If the --compile-only flag is set, it only compiles the apps.
+    The --jobs and --sim-jobs options set how many apps are compiled and
+    simulated at the same time.
     The script outputs the results of the tests.
     It exits with error if any app failed to compile or run. 
     """
@@ -402,6 +981,44 @@ def main():
         "--compiler-prefixes",
         help="Override default compiler prefixes. Can be a single prefix (shared among all the compilers) or a comma-separated list (a different prefix for each compiler).",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of apps compiled at the same time. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--sim-jobs",
+        type=int,
+        default=1,
+        help="Number of apps simulated at the same time. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--compile-cache",
+        default=COMPILE_CACHE_DIR,
+        help=f"Folder of the compilation cache. Defaults to {os.path.relpath(COMPILE_CACHE_DIR)}.",
+    )
+    parser.add_argument(
+        "--no-compile-cache",
+        action="store_true",
+        help="Compile every app, without reading or filling the compilation cache",
+    )
+    parser.add_argument(
+        "--history",
+        default=HISTORY_FILE,
+        help=f"File of the simulation runtime history, used for the per-app timeouts and the scheduling. Defaults to {os.path.relpath(HISTORY_FILE)}.",
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help=f"Use the same timeout ({SIM_TIMEOUT_S} s) for every app, without reading or updating the runtime history",
+    )
+    parser.add_argument(
+        "--fusesoc-run",
+        action="store_true",
+        help="Run every simulation through FuseSoC (make <simulator>-run) instead of launching the simulator model directly",
+    )
     args = parser.parse_args()
 
     # Override the default list of compilers if specified
@@ -445,57 +1062,74 @@ def main():
             )
             exit(1)
 
+    if args.jobs < 1 or args.sim_jobs < 1:
+        print(BColors.FAIL + "Error: The number of jobs must be at least 1." + BColors.ENDC)
+        exit(1)
+
+    # Compile with every compiler, leaving gcc for last so the simulation is done with gcc
+    toolchains = [
+        (compiler_path, compiler_prefix, compiler)
+        for (compiler_path, compiler_prefix, compiler) in zip(compiler_paths, compiler_prefixes, compilers)
+        if compiler != "gcc"
+    ]
+    toolchains.append(
+        (compiler_paths[compilers.index("gcc")], compiler_prefixes[compilers.index("gcc")], "gcc")
+    )
+
     # Get a list with all the applications we want to test
     app_list = get_apps("sw/applications")
 
+    # Build the simulator models once, and find the ones that can be launched directly
+    models = {}
     if not args.compile_only:
         for simulator in SIMULATORS:
-            build_simulator(simulator)
+            model = build_simulator(simulator)
+            if args.fusesoc_run:
+                continue
+            if model:
+                print(
+                    BColors.OKCYAN + f"Using the {simulator} model {model}" + BColors.ENDC,
+                    flush=True,
+                )
+                models[simulator] = model
+            else:
+                print(
+                    BColors.WARNING
+                    + f"The {simulator} model was not found, running the apps through FuseSoC..."
+                    + BColors.ENDC,
+                    flush=True,
+                )
+
+    cache = None
+    if not args.no_compile_cache:
+        cache = CompileCache(args.compile_cache)
+
+    history = None
+    if not args.no_history:
+        history = RuntimeHistory(args.history)
 
     # Compile every app and run with the simulators
-    for an_app in app_list:
-        # If the app is in the blacklist, print a message and skip it
-        if not in_list(an_app.name, BLACKLIST):
-            # Compile the app with every compiler, leaving gcc for last
-            #   so the simulation is done with gcc
-            for (compiler_path, compiler_prefix, compiler) in zip(compiler_paths, compiler_prefixes, compilers):
-                if compiler == "gcc":
-                    continue
-                if in_list(an_app.name, CLANG_BLACKLIST) and compiler == "clang":
-                    print(
-                        BColors.WARNING
-                        + f"Skipping compiling {an_app.name} with {compiler}..."
-                        + BColors.ENDC,
-                        flush=True,
-                    )
-                else:
-                    compilation_result = compile_app(an_app, compiler_path, compiler_prefix, compiler, "on_chip")
-                    an_app.set_compilation_status(compiler, compilation_result)
-            compilation_result = compile_app(an_app, compiler_paths[compilers.index("gcc")], compiler_prefixes[compilers.index("gcc")], "gcc", "on_chip")
-            an_app.set_compilation_status("gcc", compilation_result)
+    test_apps(
+        app_list,
+        toolchains,
+        args.compile_only,
+        args.jobs,
+        args.sim_jobs,
+        models,
+        cache,
+        history,
+    )
 
-            # Run the app with every simulator if the compilation was successful
-            if not args.compile_only and an_app.compilation_succeeded:
-                for simulator in SIMULATORS:
-                    # Only run the app with verilator if it is not in the verilator_blacklist
-                    if simulator == "verilator" and in_list(
-                        an_app.name, VERILATOR_BLACKLIST
-                    ):
-                        an_app.add_simulation_result(simulator, SimResult.SKIPPED)
-                        print(
-                            BColors.WARNING
-                            + f"Skipping running {an_app.name} with verilator..."
-                            + BColors.ENDC,
-                            flush=True,
-                        )
-                    else:
-                        simulation_result = run_app(an_app, simulator)
-                        an_app.add_simulation_result(simulator, simulation_result)
-        else:
-            print(
-                BColors.WARNING + f"Skipping {an_app.name}..." + BColors.ENDC,
-                flush=True,
-            )
+    if history and not args.compile_only:
+        history.save()
+
+    if cache:
+        print(
+            BColors.OKCYAN
+            + f"{cache.hits} compilations were found in {cache.cache_dir}."
+            + BColors.ENDC,
+            flush=True,
+        )
 
     # Filter and print the results
     (
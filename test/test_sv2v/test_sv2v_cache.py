@@ -0,0 +1,165 @@
+import sys
+import pathlib
+
+# Adds "x-heep/util" to the python path (to import sv2v_in_place)
+directory = pathlib.Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(directory.joinpath("util")))
+
+import sv2v_in_place
+import os
+import stat
+import tempfile
+
+
+# Fake sv2v, expanding the `include directives of the files it converts (next to
+# the file, then in the include dirs) and counting how many times it runs
+fake_sv2v = """#!{python}
+import os
+import re
+import sys
+
+incdirs = [a[len("--incdir="):] for a in sys.argv[1:] if a.startswith("--incdir=")]
+paths = [a for a in sys.argv[1:] if not a.startswith("--")]
+
+
+def expand(path):
+    out = []
+    for line in open(path):
+        match = re.match(r'\\s*`include\\s+"([^"]+)"', line)
+        if match is None:
+            out.append(line)
+            continue
+        for folder in [os.path.dirname(path)] + incdirs:
+            inc_path = os.path.join(folder, match.group(1))
+            if os.path.isfile(inc_path):
+                out.append(expand(inc_path))
+                break
+    return "".join(out)
+
+
+with open(os.path.join(os.path.dirname(sys.argv[0]), "runs"), "a") as runs:
+    runs.write("run\\n")
+sys.stdout.write("".join(expand(p) for p in paths))
+"""
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+class Sv2vTree:
+    """
+    Temporary tree with a fake sv2v, a cache folder, a source folder and an include dir
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.sv2v = os.path.join(root, "bin", "sv2v")
+        write_file(self.sv2v, fake_sv2v.format(python=sys.executable))
+        os.chmod(self.sv2v, os.stat(self.sv2v).st_mode | stat.S_IXUSR)
+        self.cache_dir = os.path.join(root, "cache")
+        self.incdir = os.path.join(root, "include")
+        self.rtl = os.path.join(root, "rtl")
+
+    def runs(self):
+        """
+        :return: the number of times sv2v ran
+        """
+        path = os.path.join(self.root, "bin", "runs")
+        if not os.path.exists(path):
+            return 0
+        with open(path) as file:
+            return len(file.readlines())
+
+    def convert(self, sources):
+        """
+        Write the sources in the source folder and convert them in place with the cache.
+
+        :param sources: dictionary of file name to content
+        :return: the content of the converted files
+        """
+        sv_paths = []
+        for name, content in sources.items():
+            sv_paths.append(os.path.join(self.rtl, name))
+            write_file(sv_paths[-1], content)
+        sv2v_in_place.transform(
+            self.sv2v,
+            [],
+            [],
+            [self.incdir],
+            [],
+            sv_paths,
+            jobs=2,
+            cache_dir=self.cache_dir,
+        )
+        converted = []
+        for path in sv_paths:
+            with open(path) as file:
+                converted.append(file.read())
+        return converted
+
+
+def run_test(name, include_path):
+    """
+    Convert a file including a .sv file, convert it again unchanged and after editing the
+    included file. The second conversion must come from the cache, the third must run sv2v.
+
+    :param name: name of the test
+    :param include_path: function of the tree returning the path of the included file
+    :return: True if the test passed
+    """
+    with tempfile.TemporaryDirectory() as root:
+        tree = Sv2vTree(root)
+        source = {"top.sv": 'module top;\n`include "prim_assert.sv"\nendmodule\n'}
+        write_file(include_path(tree), "// assert v1\n")
+
+        first = tree.convert(source)[0]
+        runs_first = tree.runs()
+        tree.convert(source)
+        runs_cached = tree.runs()
+        write_file(include_path(tree), "// assert v2\n")
+        edited = tree.convert(source)[0]
+        runs_edited = tree.runs()
+
+    passed = (
+        "assert v1" in first
+        and runs_cached == runs_first
+        and runs_edited == runs_cached + 1
+        and "assert v2" in edited
+    )
+    if passed:
+        print(f'Test "{name}" passed')
+    else:
+        print(
+            f'Test "{name}" failed: sv2v ran {runs_first}, {runs_cached}, {runs_edited} times'
+        )
+    return passed
+
+
+def main():
+    """
+    Check that the sv2v conversion cache is keyed on the files included by the converted files
+    """
+
+    test_results = []
+    test_results.append(
+        run_test(
+            "Edited .sv included from the include dir",
+            lambda tree: os.path.join(tree.incdir, "prim_assert.sv"),
+        )
+    )
+    test_results.append(
+        run_test(
+            "Edited .sv included from the folder of the file",
+            lambda tree: os.path.join(tree.rtl, "prim_assert.sv"),
+        )
+    )
+
+    if not all(test_results):
+        exit(1)  # Exit with error if any test failed
+
+
+if __name__ == "__main__":
+    main()
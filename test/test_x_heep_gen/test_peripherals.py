@@ -217,7 +217,7 @@ def __generate_argv(
     return [
         "mcu_gen.py",
         "--cached_path",
-        f"{output_dir}/example{example_number}-{extension}.pickle",
+        f"{output_dir}/example{example_number}-{extension}.json",
         "--config",
         f"{config_dir}/example{example_number}.hjson",
         "--python_config",
@@ -236,7 +236,7 @@ def __generate_cached_argv(
     return [
         "mcu_gen.py",
         "--cached_path",
-        f"{output_dir}/example{example_number}-{extension}.pickle",
+        f"{output_dir}/example{example_number}-{extension}.json",
         "-ca",
         "--outfile",
         f"{output_dir}/example{example_number}-{extension}.hjson",
@@ -108,7 +108,7 @@ def im2col_function(input_array, parameters):
     kernel_size = (filter_height, filter_width)
 
     # Convert the input array into a PyTorch tensor with the correct shape
-    input_tensor = torch.tensor(input_array).view(batch_size, channels, image_height, image_width)
+    input_tensor = torch.from_numpy(input_array).view(batch_size, channels, image_height, image_width)
 
     dilation = 1
     # Ensure kernel_size, stride, padding, and dilation are tuples
@@ -131,8 +131,8 @@ def im2col_function(input_array, parameters):
     channel_dim = padded_input.size(1)
     unfolded_tensor = unfolded.contiguous().view(-1, channel_dim * kernel_size[0] * kernel_size[1]).t()
 
-    # Convert the PyTorch tensor to a NumPy array and then to a list (simple array)
-    unfolded_array = unfolded_tensor.numpy().flatten().tolist()
+    # Convert the PyTorch tensor to a flat NumPy array
+    unfolded_array = unfolded_tensor.numpy().flatten()
 
     return unfolded_array, ""
 
@@ -140,6 +140,14 @@ def im2col_function(input_array, parameters):
 # Initialize the VerifHeep tool
 im2colVer = verifheep.VerifHeep("pynq-z2", "../../../")
 
+# Compile the application once and only write the new datasets and parameters in memory for each test.
+# The datasets are sized to their largest size in the sweep, so that their headers do not change
+input_size_max = (batch_max - 1) * (channels_max - 1) * (im_h_max - 1) * (im_w_max - 1)
+golden_size_max = ((ker_w_max - 1) * (ker_h_max - 1) * (channels_max - 1) * (batch_max - 1) *
+                   ((im_h_max - 1 + pad_top_max - 1 + pad_bottom_max - 1 - ker_h_min) // stride_d2_min + 1) *
+                   ((im_w_max - 1 + pad_left_max - 1 + pad_right_max - 1 - ker_w_min) // stride_d1_min + 1))
+im2colVer.setDataReload(True, max_sizes={"input_image_nchw": input_size_max, "golden_im2col_nchw": golden_size_max})
+
 # Connect to the pynq-z2 board
 print("Connecting to the board...")
 serial_status = im2colVer.serialBegin(f"/dev/ttyUSB{USBport}", 9600)
@@ -234,14 +242,14 @@ def main(stdscr):
                                                       'STRIDE_D2': u
                                                   }
                                                   
-                                                  im2colVer.genInputDataset(input_size, row_size=m, range_max=range_max, dataset_dir_c="../../../sw/applications/example_im2col/im2col_input.c", 
+                                                  input_data = im2colVer.genInputDataset(input_size, row_size=m, range_max=range_max, dataset_dir_c="../../../sw/applications/example_im2col/im2col_input.c", 
                                                                             dataset_dir="../../../sw/applications/example_im2col/im2col_input.h", parameters=parameters, dataset_name="input_image_nchw",
                                                                             datatype=datatype)
                                                   
                                                   im2colVer.genGoldenResult(im2col_function, golden_size, parameters, row_size=OW, golden_dir="../../../sw/applications/example_im2col/im2col_golden.h", 
                                                                             golden_dir_c="../../../sw/applications/example_im2col/im2col_golden.c", input_dataset_dir="../../../sw/applications/example_im2col/im2col_input.c",
                                                                             golden_name="golden_im2col_nchw",
-                                                                            output_datatype=datatype)
+                                                                            output_datatype=datatype, input_dataset=input_data)
                                                                                                   
                                                   im2colVer.modifyFile("../../../sw/applications/example_im2col/im2col_lib.h", start_id_pattern, f'#define START_ID 0')
                                                   
@@ -0,0 +1,510 @@
+#
+#     Copyright EPFL contributors.
+#     Licensed under the Apache License, Version 2.0, see LICENSE for details.
+#     SPDX-License-Identifier: Apache-2.0
+#
+#     Info: asyncio engine running the tests of a software-based verification on several targets at the same time,
+#           from a single controller process. Each target runs its tests one after the other, while the targets
+#           run concurrently. The engine multiplexes the I/O of all the targets:
+#           - the serial stream of the FPGA boards,
+#           - the GDB/MI channel used to load and run the applications on the FPGA boards,
+#           - the output of the simulator processes (e.g. Verilator).
+#
+#           The applications print their results with the same format as for VerifHeep: "<ID>:<cycles>:<outcome>"
+#           lines, followed by the "&" end line.
+#           Every test has a deadline, after which it is stopped and reported as timed out. Stopping the engine
+#           (e.g. with Ctrl-C) cancels the running tests and stops their processes.
+#           Every test produces a result record (see Engine.runTest).
+#
+
+import abc
+import asyncio
+import collections
+import glob
+import os
+import re
+import signal
+import time
+
+# Pattern of the result lines printed by the applications, and line ending their output
+RESULT_PATTERN = r'(\d+):(\d+):(\d+)'
+END_WORD = "&"
+
+# Word printed by the applications when their verification fails
+ERROR_WORD = "ERROR"
+
+# Default deadline of a test (compilation included), in seconds
+TEST_DEADLINE_S = 600
+
+# Time given to a process to exit by itself once stopped, in seconds
+PROCESS_EXIT_GRACE_S = 5
+
+# Number of output lines of a test kept in its result record
+OUTPUT_TAIL_LINES = 200
+
+# Verilator model built by FuseSoC, relative to the X-Heep directory, and patterns of its output
+VERILATOR_MODEL = "build/openhwgroup.org_systems_core-v-mini-mcu_*/sim-verilator/Vtestharness"
+SIM_FINISH_PATTERN = r"Program Finished with value (\d+)"
+SIM_FAILURE_PATTERN = r"%Error|%Fatal|\[TESTBENCH\]: ERROR"
+
+# Possible status of a test
+PASSED = "passed"
+FAILED = "failed"
+TIMED_OUT = "timed out"
+CANCELLED = "cancelled"
+ERROR = "error"
+
+
+class TargetError(Exception):
+    pass
+
+
+class ProcessChannel:
+    """
+    A process whose output (stdout and stderr) is read line by line. The process runs in its own process group,
+    so that the processes it launches (e.g. make) are stopped with it.
+    """
+
+    def __init__(self, command, cwd=None, stdin=False):
+        self.command = command
+        self.cwd = cwd
+        self.stdin = stdin
+        self.process = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE if self.stdin else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+    async def readLine(self):
+        # Returns the next line without its end of line, or None once the process closed its output
+        line = await self.process.stdout.readline()
+        if not line:
+            return None
+        return line.decode('utf-8', errors='replace').rstrip('\r\n')
+
+    async def write(self, text):
+        self.process.stdin.write(text.encode('utf-8'))
+        await self.process.stdin.drain()
+
+    async def wait(self):
+        return await self.process.wait()
+
+    async def stop(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            await asyncio.wait_for(self.process.wait(), PROCESS_EXIT_GRACE_S)
+        except asyncio.TimeoutError:
+            os.killpg(self.process.pid, signal.SIGKILL)
+            await self.process.wait()
+        except ProcessLookupError:
+            await self.process.wait()
+
+
+async def runCommand(command, cwd=None):
+    # Runs a command until it exits, returns its exit code and output
+    channel = ProcessChannel(command, cwd=cwd)
+    await channel.start()
+    try:
+        output = []
+        while True:
+            line = await channel.readLine()
+            if line is None:
+                break
+            output.append(line)
+        return await channel.wait(), output
+    finally:
+        await channel.stop()
+
+
+class SerialChannel:
+    """
+    Serial port read line by line by the event loop, without any thread.
+    """
+
+    def __init__(self, port, baudrate=9600):
+        self.port = port
+        self.baudrate = baudrate
+        self.ser = None
+        self.reader = None
+
+    def open(self):
+        import serial
+
+        self.ser = serial.Serial(self.port, self.baudrate, timeout=0)
+        self.reader = asyncio.StreamReader()
+        asyncio.get_running_loop().add_reader(self.ser.fileno(), self._readAvailable)
+
+    def _readAvailable(self):
+        data = self.ser.read(self.ser.in_waiting or 1)
+        if data:
+            self.reader.feed_data(data)
+
+    def flush(self):
+        # Drops the data received so far, e.g. left by a previous test
+        self.ser.reset_input_buffer()
+        self.reader = asyncio.StreamReader()
+
+    async def readLine(self):
+        line = await self.reader.readline()
+        return line.decode('utf-8', errors='replace').rstrip('\r\n')
+
+    def close(self):
+        if self.ser is not None:
+            asyncio.get_running_loop().remove_reader(self.ser.fileno())
+            self.ser.close()
+            self.ser = None
+
+
+class GdbMi:
+    """
+    GDB driven through its machine interface (GDB/MI). Every command gets a token, and waits for the result record
+    with the same token. The stop records (e.g. at a breakpoint) are queued, and the console output is kept.
+    """
+
+    MI_RECORD = re.compile(r'^(\d*)([\^*=~@&+])(.*)$')
+    MI_FIELD = re.compile(r'(\w[\w-]*)="((?:[^"\\]|\\.)*)"')
+
+    def __init__(self, gdb, elf, cwd=None):
+        self.channel = ProcessChannel([gdb, "--interpreter=mi2", "--nx", "--quiet", elf], cwd=cwd, stdin=True)
+        self.token = 0
+        self.pending = {}
+        self.stops = asyncio.Queue()
+        self.console = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+        self.dispatcher = None
+
+    async def start(self):
+        await self.channel.start()
+        self.dispatcher = asyncio.ensure_future(self._dispatch())
+
+    @classmethod
+    def fields(cls, payload):
+        # Top-level and nested "name=value" fields of a record, the first occurrence of each name is kept
+        fields = {}
+        for name, value in cls.MI_FIELD.findall(payload):
+            fields.setdefault(name, value.encode('utf-8').decode('unicode_escape'))
+        return fields
+
+    async def _dispatch(self):
+        while True:
+            line = await self.channel.readLine()
+            if line is None:
+                break
+            match = self.MI_RECORD.match(line)
+            if not match:
+                continue
+            token, kind, record = match.groups()
+            if kind in '~@&':
+                self.console.append(self.fields('s=' + record).get('s', record))
+                continue
+            record_class, _, payload = record.partition(',')
+            if kind == '^':
+                future = self.pending.pop(int(token), None) if token else None
+                if future is not None and not future.done():
+                    future.set_result((record_class, self.fields(payload)))
+            elif kind == '*' and record_class == 'stopped':
+                self.stops.put_nowait(self.fields(payload))
+
+        # GDB exited, nothing will answer anymore
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(TargetError("GDB exited"))
+        self.pending.clear()
+
+    async def command(self, command):
+        if self.dispatcher is None or self.dispatcher.done():
+            raise TargetError("GDB is not running")
+        self.token += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.token] = future
+        await self.channel.write(f"{self.token}{command}\n")
+        record_class, fields = await future
+        if record_class == 'error':
+            raise TargetError(f"GDB command {command} failed: {fields.get('msg', '')}")
+        return record_class, fields
+
+    async def waitStop(self):
+        return await self.stops.get()
+
+    async def close(self):
+        if self.dispatcher is not None and not self.dispatcher.done():
+            try:
+                await asyncio.wait_for(self.command("-gdb-exit"), PROCESS_EXIT_GRACE_S)
+            except (asyncio.TimeoutError, TargetError):
+                pass
+        await self.channel.stop()
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+
+
+class Target(abc.ABC):
+    """
+    Target running the tests, implementing at least runApp. A test is a dictionary with:
+    - "app": name of the application in sw/applications,
+    - "name": name of the test in the result records (the application name by default),
+    - "input_size": added to the results of the test, as in VerifHeep (0 by default),
+    - "pattern": pattern of the result lines (RESULT_PATTERN by default),
+    - "deadline_s": deadline of the test in seconds (TEST_DEADLINE_S by default),
+    - "make_args": additional arguments of make app, e.g. ["COMPILER=clang"].
+    """
+
+    def __init__(self, name, xheep_dir, build_dir=None, make_target=None):
+        self.name = name
+        self.xheep_dir = os.path.abspath(xheep_dir)
+        self.build_dir = os.path.abspath(build_dir) if build_dir else os.path.join(self.xheep_dir, "sw", "build")
+        self.make_target = make_target
+        self.output = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+
+    async def setUp(self):
+        pass
+
+    async def tearDown(self):
+        pass
+
+    async def abort(self):
+        # Brings the target back to a usable state after a test was stopped before its end
+        pass
+
+    async def buildApp(self, test):
+        command = ["make", "-C", self.xheep_dir, "app", f"PROJECT={test['app']}", f"APP_BUILD_DIR={self.build_dir}"]
+        if self.make_target:
+            command.append(f"TARGET={self.make_target}")
+        command += test.get("make_args", [])
+        code, output = await runCommand(command)
+        self.output.extend(output)
+        if code != 0:
+            raise TargetError(f"Compilation of {test['app']} failed")
+
+    @abc.abstractmethod
+    async def runApp(self, test):
+        # Runs the application built for the test. Returns the lines printed by the application, and whether
+        # the target reported a failure by itself
+        pass
+
+    async def readResults(self, read_line, lines):
+        # Reads the lines printed by the application until the end line, returns whether it reported a failure
+        failed = False
+        while True:
+            line = await read_line()
+            if line is None:
+                raise TargetError("Output closed before the end of the test")
+            lines.append(line)
+            self.output.append(line)
+            if ERROR_WORD in line:
+                failed = True
+            if END_WORD in line:
+                return failed
+
+
+class FpgaTarget(Target):
+    """
+    FPGA board (e.g. pynq-z2) on which the applications are loaded with GDB, through OpenOCD, and print
+    their results on the serial port.
+    """
+
+    def __init__(self, name, xheep_dir, port, baudrate=9600, board="pynq-z2", gdb=None, gdb_remote="localhost:3333", build_dir=None):
+        super().__init__(name, xheep_dir, build_dir, make_target=board)
+        self.serial = SerialChannel(port, baudrate)
+        self.gdb_path = gdb or os.path.join(os.environ.get("RISCV_XHEEP", ""), "bin", "riscv32-unknown-elf-gdb")
+        self.gdb_remote = gdb_remote
+        self.gdb = None
+
+    async def setUp(self):
+        self.serial.open()
+
+    async def tearDown(self):
+        self.serial.close()
+        if self.gdb is not None:
+            await self.gdb.close()
+            self.gdb = None
+
+    async def abort(self):
+        # The application might still be running, GDB is started again for the next test
+        if self.gdb is not None:
+            await self.gdb.close()
+            self.gdb = None
+
+    async def runApp(self, test):
+        if self.gdb is None:
+            self.gdb = GdbMi(self.gdb_path, os.path.join(self.build_dir, "main.elf"))
+            await self.gdb.start()
+            await self.gdb.command("-gdb-set remotetimeout 2000")
+            await self.gdb.command(f"-target-select remote {self.gdb_remote}")
+        else:
+            await self.gdb.command(f"-file-exec-and-symbols {os.path.join(self.build_dir, 'main.elf')}")
+
+        self.serial.flush()
+        await self.gdb.command("-target-download")
+        await self.gdb.command("-break-insert -f _exit")
+        await self.gdb.command("-exec-continue")
+
+        # The application output ends before it reaches the exit breakpoint
+        lines = []
+        failed = await self.readResults(self.serial.readLine, lines)
+        stop = await self.gdb.waitStop()
+        if stop.get('reason') not in ('breakpoint-hit', 'exited-normally', 'exited'):
+            raise TargetError(f"Application stopped: {stop.get('reason', 'unknown reason')}")
+        await self.gdb.command("-break-delete")
+        return lines, failed
+
+
+class VerilatorTarget(Target):
+    """
+    Verilator model running the applications from their hex file. Every target runs the model in its own folder
+    and builds the applications in its own folder, so that several targets can share the same model.
+    """
+
+    def __init__(self, name, xheep_dir, model=None, run_dir=None, sim_args=()):
+        xheep_dir = os.path.abspath(xheep_dir)
+        run_dir = os.path.abspath(run_dir) if run_dir else os.path.join(xheep_dir, "build", "verifheep", name)
+        super().__init__(name, xheep_dir, os.path.join(run_dir, "sw"))
+        self.model = model
+        self.run_dir = run_dir
+        self.sim_args = list(sim_args)
+        self.sim = None
+
+    async def setUp(self):
+        if self.model is None:
+            models = sorted(glob.glob(os.path.join(self.xheep_dir, VERILATOR_MODEL)))
+            if not models:
+                raise TargetError("Verilator model not found, run make verilator-build")
+            self.model = models[0]
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    async def abort(self):
+        if self.sim is not None:
+            await self.sim.stop()
+            self.sim = None
+
+    async def runApp(self, test):
+        # The model writes the output of the application in uart0.log
+        uart_log = os.path.join(self.run_dir, "uart0.log")
+        if os.path.exists(uart_log):
+            os.remove(uart_log)
+
+        self.sim = ProcessChannel([self.model, f"+firmware={os.path.join(self.build_dir, 'main.hex')}"] + self.sim_args, cwd=self.run_dir)
+        await self.sim.start()
+        finish = None
+        try:
+            while finish is None:
+                line = await self.sim.readLine()
+                if line is None:
+                    raise TargetError("Simulation exited before the end of the application")
+                self.output.append(line)
+                if re.search(SIM_FAILURE_PATTERN, line):
+                    raise TargetError(f"Simulation failed: {line}")
+                finish = re.search(SIM_FINISH_PATTERN, line)
+        finally:
+            await self.abort()
+
+        with open(uart_log, 'r', errors='replace') as f:
+            log = iter(f.read().splitlines())
+
+        async def read_log():
+            return next(log, None)
+
+        lines = []
+        failed = await self.readResults(read_log, lines)
+        return lines, failed or finish.group(1) != "0"
+
+
+class Engine:
+    """
+    Runs tests on several targets concurrently, and keeps their result records.
+    """
+
+    def __init__(self, targets):
+        self.targets = {target.name: target for target in targets}
+        self.records = []
+
+    async def runTest(self, target, test):
+        """
+        Builds and runs a test on a target, within its deadline.
+
+        Returns the result record of the test, a dictionary with:
+        - "target" and "test": names of the target and of the test,
+        - "status": PASSED, FAILED (reported by the application or the simulator), TIMED_OUT, CANCELLED or ERROR,
+        - "results": the results printed by the application, as the VerifHeep results,
+        - "error": the error message, if any,
+        - "wall_time_s": duration of the test,
+        - "output": the last lines of the compilation, simulator and application output.
+        """
+        record = {
+            "target": target.name,
+            "test": test.get("name", test["app"]),
+            "status": ERROR,
+            "results": [],
+            "error": None,
+            "wall_time_s": None,
+            "output": [],
+        }
+        target.output.clear()
+        deadline = test.get("deadline_s", TEST_DEADLINE_S)
+        start = time.monotonic()
+
+        async def build_and_run():
+            await target.buildApp(test)
+            return await target.runApp(test)
+
+        try:
+            lines, failed = await asyncio.wait_for(build_and_run(), deadline)
+            pattern = re.compile(test.get("pattern", RESULT_PATTERN))
+            for line in lines:
+                match = pattern.search(line)
+                if match:
+                    record["results"].append({"ID": match.group(1), "Cycles": match.group(2), "Outcome": match.group(3), "Input size": test.get("input_size", 0)})
+            record["status"] = FAILED if failed else PASSED
+        except asyncio.TimeoutError:
+            record["status"] = TIMED_OUT
+            record["error"] = f"Deadline of {deadline} s expired"
+            await target.abort()
+        except asyncio.CancelledError:
+            record["status"] = CANCELLED
+            await target.abort()
+            raise
+        except (TargetError, OSError) as e:
+            record["error"] = str(e)
+            await target.abort()
+        finally:
+            record["wall_time_s"] = time.monotonic() - start
+            record["output"] = list(target.output)
+            self.records.append(record)
+        return record
+
+    async def runTarget(self, target, tests):
+        records = []
+        await target.setUp()
+        try:
+            for test in tests:
+                records.append(await self.runTest(target, test))
+        finally:
+            await target.tearDown()
+        return records
+
+    async def run(self, tests):
+        """
+        Runs the tests of every target, the targets running concurrently.
+
+        :param tests: dictionary of the list of tests (see Target) of each target, indexed by target name
+        :return: dictionary of the list of result records of each target, indexed by target name
+        """
+        names = list(tests)
+        results = await asyncio.gather(*(self.runTarget(self.targets[name], tests[name]) for name in names))
+        return dict(zip(names, results))
+
+
+def runTests(targets, tests):
+    # Runs the engine until all the tests are done or it is interrupted, returns the result records so far
+    engine = Engine(targets)
+    try:
+        asyncio.run(engine.run(tests))
+    except KeyboardInterrupt:
+        print("Keyboard interruption, the running tests were cancelled")
+    return engine.records
@@ -0,0 +1,178 @@
+import sys
+import pathlib
+
+# Adds "x-heep/test/verifheep" to the python path (to import target_engine)
+sys.path.append(str(pathlib.Path(__file__).resolve().parent))
+
+import asyncio
+import time
+import target_engine
+
+
+class FakeTarget(target_engine.Target):
+    """
+    Target printing the lines of its tests without building or running anything.
+    A test gives the "lines" printed by its application and how long it takes to print them ("run_s").
+    """
+
+    def __init__(self, name):
+        super().__init__(name, ".")
+        self.running = asyncio.Event()
+        self.aborted = 0
+
+    async def buildApp(self, test):
+        self.output.append(f"Built {test['app']}")
+
+    async def runApp(self, test):
+        self.running.set()
+        await asyncio.sleep(test.get("run_s", 0))
+        lines = iter(test["lines"])
+
+        async def read_line():
+            return next(lines, None)
+
+        printed = []
+        failed = await self.readResults(read_line, printed)
+        return printed, failed
+
+    async def abort(self):
+        self.aborted += 1
+
+
+def check(name, passed):
+    """
+    Print the outcome of a test
+
+    :param name: name of the test
+    :param passed: whether the test passed
+    :return: passed
+    """
+    if passed:
+        print(f'Test "{name}" passed')
+    else:
+        print(f'Test "{name}" failed')
+    return passed
+
+
+def test_abstract_target():
+    try:
+        target_engine.Target("target", ".")
+    except TypeError:
+        return check("Target without runApp cannot be created", True)
+    return check("Target without runApp cannot be created", False)
+
+
+def test_result_records():
+    target = FakeTarget("fake")
+    tests = {
+        "fake": [
+            {"app": "app_ok", "input_size": 16, "lines": ["0:120:1", "1:80:1", "&"]},
+            {"app": "app_ko", "name": "ko", "lines": ["0:10:0", "ERROR", "&"]},
+            {"app": "app_cut", "lines": ["0:10:1"]},
+        ]
+    }
+    engine = target_engine.Engine([target])
+    records = asyncio.run(engine.run(tests))["fake"]
+
+    ok, ko, cut = records
+    return check(
+        "Result records",
+        records == engine.records
+        and ok["status"] == target_engine.PASSED
+        and ok["results"]
+        == [
+            {"ID": "0", "Cycles": "120", "Outcome": "1", "Input size": 16},
+            {"ID": "1", "Cycles": "80", "Outcome": "1", "Input size": 16},
+        ]
+        and ok["output"] == ["Built app_ok", "0:120:1", "1:80:1", "&"]
+        and ko["test"] == "ko"
+        and ko["status"] == target_engine.FAILED
+        and cut["status"] == target_engine.ERROR
+        and cut["error"] is not None
+        and target.aborted == 1,
+    )
+
+
+def test_deadline():
+    target = FakeTarget("fake")
+    tests = {
+        "fake": [
+            {"app": "slow", "deadline_s": 0.1, "run_s": 10, "lines": ["&"]},
+            {"app": "fast", "lines": ["0:1:1", "&"]},
+        ]
+    }
+    start = time.monotonic()
+    slow, fast = asyncio.run(target_engine.Engine([target]).run(tests))["fake"]
+    return check(
+        "Deadline",
+        time.monotonic() - start < 5
+        and slow["status"] == target_engine.TIMED_OUT
+        and slow["wall_time_s"] < 5
+        and target.aborted == 1
+        and fast["status"] == target_engine.PASSED,
+    )
+
+
+def test_cancellation():
+    target = FakeTarget("fake")
+    tests = {"fake": [{"app": "endless", "run_s": 10, "lines": ["&"]}]}
+    engine = target_engine.Engine([target])
+
+    async def cancel_running_test():
+        run = asyncio.ensure_future(engine.run(tests))
+        await target.running.wait()
+        run.cancel()
+        try:
+            await run
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    start = time.monotonic()
+    cancelled = asyncio.run(cancel_running_test())
+    return check(
+        "Cancellation",
+        cancelled
+        and time.monotonic() - start < 5
+        and len(engine.records) == 1
+        and engine.records[0]["status"] == target_engine.CANCELLED
+        and target.aborted == 1,
+    )
+
+
+def test_concurrent_targets():
+    targets = [FakeTarget("fake0"), FakeTarget("fake1"), FakeTarget("fake2")]
+    tests = {
+        target.name: [{"app": "app", "run_s": 0.5, "lines": ["0:1:1", "&"]}]
+        for target in targets
+    }
+    start = time.monotonic()
+    records = asyncio.run(target_engine.Engine(targets).run(tests))
+    return check(
+        "Concurrent targets",
+        time.monotonic() - start < 1.4
+        and all(
+            records[target.name][0]["status"] == target_engine.PASSED
+            for target in targets
+        ),
+    )
+
+
+def main():
+    """
+    Run the engine of target_engine.py with fake targets, which do not need any toolchain, simulator or board
+    """
+
+    test_results = []
+    test_results.append(test_abstract_target())
+    test_results.append(test_result_records())
+    test_results.append(test_deadline())
+    test_results.append(test_cancellation())
+    test_results.append(test_concurrent_targets())
+
+    if not all(test_results):
+        exit(1)  # Exit with error if any test failed
+
+
+if __name__ == "__main__":
+    main()
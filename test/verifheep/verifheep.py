@@ -41,8 +41,9 @@ import serial
 import pexpect
 import threading
 import queue
-import random
 import os
+import hashlib
+import numpy as np
 
 # Set this to True to enable debugging prints
 DEBUG_MODE = False
@@ -51,8 +52,39 @@ def PRINT_DEB(*args, **kwargs):
     if DEBUG_MODE:
         print(*args, **kwargs)
 
+# License written at the top of the generated datasets
+DATASET_LICENSE = "/*\n\tCopyright EPFL contributors.\n\tLicensed under the Apache License, Version 2.0, see LICENSE for details.\n\tSPDX-License-Identifier: Apache-2.0\n*/\n\n"
+
+# Datatypes of the generated datasets, with the matching NumPy types
+DATASET_DTYPES = {
+    "int8_t": np.int8,
+    "uint8_t": np.uint8,
+    "int16_t": np.int16,
+    "uint16_t": np.uint16,
+    "int32_t": np.int32,
+    "uint32_t": np.uint32,
+    "float": np.float32,
+    "double": np.float64,
+}
+
+# Number of values of a dataset formatted and written at once
+DATASET_CHUNK_SIZE = 1 << 16
+
+# Section of the datasets in data reload mode. It is part of the .data output section,
+# which every linker script places in RAM
+DATASET_SECTION = ".data.verifheep"
+
+# Section of the parameters in data reload mode, apart from the datasets since they are not const
+PARAMETER_SECTION = DATASET_SECTION + ".parameters"
+
+# Datatypes of the parameters written as variables in data reload mode
+PARAMETER_DTYPES = {
+    int: "int32_t",
+    float: "float",
+}
+
 class VerifHeep:
-    def __init__(self, target, xheep_dir, opt_en=False):
+    def __init__(self, target, xheep_dir, opt_en=False, seed=None):
         self.target = target
         if target not in ['verilator', 'questasim', 'pynq-z2']:
             raise Exception(f'Target {target} not supported. Choose one among:\n- verilator\n- questasim (with optional optimization)\n- pynq-z2\n')
@@ -63,10 +95,22 @@ class VerifHeep:
         self.xheep_dir = xheep_dir
         self.results = []
         self.it_times = []
+        self.rng = np.random.default_rng(seed)
+        self.data_reload = False
+        self.reload_datasets = {}
+        self.reload_headers = {}
+        self.reload_parameters = {}
+        self.reload_sizes = {}
+        self.loaded_build = None
 
     def resetAll(self):
         self.results = []
         self.it_times = []
+        self.reload_datasets = {}
+        self.reload_headers = {}
+        self.reload_parameters = {}
+        self.reload_sizes = {}
+        self.loaded_build = None
         if self.ser.is_open:
           self.ser.close()
         self.ser = None
@@ -78,6 +122,16 @@ class VerifHeep:
     def clearResults(self):
         self.results = []
 
+    def setDataReload(self, enable=True, max_sizes=None):
+        # With the flash linkers, crt0 copies .data from the flash, over the datasets written in RAM
+        linker = os.environ.get('LINKER', 'on_chip')
+        if enable and linker != 'on_chip':
+            raise Exception(f'Data reload mode not supported with LINKER={linker}, only with LINKER=on_chip\n')
+        self.data_reload = enable
+        # Number of values each dataset is sized to, so that its header does not change with its size
+        self.reload_sizes = dict(max_sizes) if max_sizes else {}
+        self.loaded_build = None
+
     # Synthesis & Simulation methods
     
     def compileModel(self, mem_banks=6, cpu="cv32e40px", bus="1toN"):
@@ -161,29 +215,15 @@ class VerifHeep:
         # Start the serial thread
         self.serial_thread.start()
 
-        # Compile the application
-        if self.target == 'verilator' or self.target == 'questasim':
-          app_compile_run_com = f"cd {self.xheep_dir} ; make app PROJECT={example_name}"
-        else:
-          app_compile_run_com = f"cd {self.xheep_dir} ; make app PROJECT={example_name} TARGET={self.target}"
-
-        result_compilation = subprocess.run(app_compile_run_com, shell=True, capture_output=True, text=True)
-
-        if ("Error" in result_compilation.stderr) or ("error" in result_compilation.stderr):
-            print(result_compilation.stderr)
-            return
+        # In data reload mode, the application is compiled again only if its headers changed,
+        # otherwise the new datasets and parameters are written over the ones of the loaded build
+        build = (example_name, tuple(sorted(self.reload_headers.items())))
+        if self.data_reload and build == self.loaded_build:
+          self.reloadDatasets()
+        elif not self.loadApp(example_name):
+          return
         else:
-            PRINT_DEB("Compilation successful!")
-        
-        # Run the testbench with gdb
-        self.gdb.sendline('load')
-        self.gdb.expect('(gdb)')
-
-        try:
-          output = self.gdb.read_nonblocking(size=100, timeout=1)
-          PRINT_DEB("Current gdb output:", output)
-        except pexpect.TIMEOUT:
-          PRINT_DEB("No new output from GDB.")
+          self.loaded_build = build if self.data_reload else None
 
         # Set a breakpoint at the exit and wait for it
         self.gdb.sendline('b _exit')
@@ -217,6 +257,54 @@ class VerifHeep:
                 outcome = match.group(3)
                 self.results.append({ "ID" : test_id, "Cycles": cycle_count, "Outcome": outcome, "Input size": input_size })
 
+    def loadApp(self, example_name):
+
+        # Compile the application
+        if self.target == 'verilator' or self.target == 'questasim':
+          app_compile_run_com = f"cd {self.xheep_dir} ; make app PROJECT={example_name}"
+        else:
+          app_compile_run_com = f"cd {self.xheep_dir} ; make app PROJECT={example_name} TARGET={self.target}"
+
+        result_compilation = subprocess.run(app_compile_run_com, shell=True, capture_output=True, text=True)
+
+        if ("Error" in result_compilation.stderr) or ("error" in result_compilation.stderr):
+            print(result_compilation.stderr)
+            return False
+        else:
+            PRINT_DEB("Compilation successful!")
+        
+        # Run the testbench with gdb
+        self.gdb.sendline('load')
+        self.gdb.expect('(gdb)')
+
+        try:
+          output = self.gdb.read_nonblocking(size=100, timeout=1)
+          PRINT_DEB("Current gdb output:", output)
+        except pexpect.TIMEOUT:
+          PRINT_DEB("No new output from GDB.")
+
+        return True
+
+    def reloadDatasets(self):
+
+        # Restore the initialized variables (.data and .sdata) from the loaded build, so that every
+        # variable starts from its initial value. The code is not written again and crt0 clears .bss
+        self.gdb.sendline('restore ./sw/build/main.elf 0 &__DATA_BEGIN__ &_edata')
+        self.gdb.expect('(gdb)')
+
+        # Write the datasets and the parameters over the ones of the loaded application
+        for dataset_name, bin_dir in self.reload_datasets.items():
+          self.gdb.sendline(f'restore {bin_dir} binary &{dataset_name}')
+          self.gdb.expect('(gdb)')
+          PRINT_DEB(f"Reloaded {dataset_name} from {bin_dir}")
+        for key, (_, value) in self.reload_parameters.items():
+          self.gdb.sendline(f'set var {key} = {value}')
+          self.gdb.expect('(gdb)')
+
+        # Run the application again from its entry point
+        self.gdb.sendline('set $pc = _start')
+        self.gdb.expect('(gdb)')
+
     def dumpResults(self, filename="results.txt"):
         with open(filename, 'w') as f:
             for result in self.results:
@@ -243,15 +331,49 @@ class VerifHeep:
     
     # Data generation methods
 
-    def genInputDataset(self, dataset_size, parameters="", row_size=0, range_min=0, range_max=1, dataset_dir="input_dataset.h", dataset_dir_c="", dataset_name="input_dataset", datatype="uint32_t"):
+    def genInputDataset(self, dataset_size, parameters="", row_size=0, range_min=0, range_max=1, dataset_dir="input_dataset.h", dataset_dir_c="", dataset_name="input_dataset", datatype="uint32_t", seed=None):
         
+        if datatype not in DATASET_DTYPES:
+            print("Error: invalid datatype. Choose one among:\n- " + "\n- ".join(DATASET_DTYPES) + "\n")
+            exit(1)
+        dtype = np.dtype(DATASET_DTYPES[datatype])
+
+        # The range must fit in the datatype, both bounds being included
+        limits = np.iinfo(dtype) if dtype.kind in "iu" else np.finfo(dtype)
+        if range_min > range_max or range_min < limits.min or range_max > limits.max:
+            print(f"Error: invalid range [{range_min}, {range_max}] for {datatype}, which holds values in [{limits.min}, {limits.max}]\n")
+            exit(1)
+
+        # A seed makes this dataset reproducible, otherwise the generator of the object is used
+        rng = np.random.default_rng(seed) if seed is not None else self.rng
+
+        # Generate the random vector
+        if dtype.kind in "iu":
+            values = rng.integers(range_min, range_max, size=dataset_size, dtype=dtype, endpoint=True)
+        else:
+            values = rng.uniform(range_min, range_max, size=dataset_size).astype(dtype)
+
+        self.writeDataset(values, parameters, row_size, dataset_dir, dataset_dir_c, dataset_name, datatype)
+
+        return values
+
+    def writeDataset(self, values, parameters, row_size, dataset_dir, dataset_dir_c, dataset_name, datatype):
+
+        # In data reload mode, a dataset defined in a .c is sized to its maximum size and its parameters are
+        # variables of the dataset section, so that its header does not change from a test to the next one
+        reload = self.data_reload and dataset_dir_c != ""
+        array_size = self.reload_sizes.get(dataset_name, values.size) if reload else values.size
+        if values.size > array_size:
+            raise Exception(f'Dataset {dataset_name} has {values.size} values, more than its maximum size {array_size}\n')
+        if reload:
+            parameters = self.reloadParameters(dataset_name, parameters)
+
         if dataset_dir_c == "":
           with open(dataset_dir, 'w') as f:
             # Add license
             f.write(f"#ifndef {dataset_name.upper()}_H\n")
             f.write(f"#define {dataset_name.upper()}_H\n\n")
-            license = "/*\n\tCopyright EPFL contributors.\n\tLicensed under the Apache License, Version 2.0, see LICENSE for details.\n\tSPDX-License-Identifier: Apache-2.0\n*/\n\n"
-            f.write(license)
+            f.write(DATASET_LICENSE)
             f.write(f"#include <stdint.h>\n\n")
 
             # Write the parameters, if there are any
@@ -259,36 +381,9 @@ class VerifHeep:
                 for key, value in parameters.items():
                     f.write(f"#define {key} {value}\n")
 
-            # Vector declaration
-            f.write(f"const {datatype} {dataset_name}[{dataset_size}] = " + "{\n")
-            
-            # Generate the random vector
-            for i in range(dataset_size):
-                if 'float' in datatype:
-                    value = random.uniform(range_min, range_max)  # float
-                elif 'uint' in datatype:
-                    if ('8' in datatype or '16' in datatype or '32' in datatype) and range_min >= 0 and range_max > 0:
-                        value = random.randint(range_min, range_max)
-                    else:
-                        print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                        exit(1)
-                elif 'int' in datatype:
-                    if ('8' in datatype or '16' in datatype or '32' in datatype):
-                        value = random.randint(range_min, range_max)
-                    else:
-                        print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                        exit(1)
-                else:
-                  print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                  exit(1)
-
-                if i < dataset_size - 1:
-                    f.write(f" {value},")
-                else:
-                    f.write(f" {value}")
-              
-                if row_size > 0 and (i + 1) % row_size == 0:
-                  f.write("\n")
+            # Vector definition
+            f.write(f"const {datatype} {dataset_name}[{values.size}] = " + "{\n")
+            self.writeArrayValues(f, values, row_size)
             
             # Close the file
             f.write("};\n\n")
@@ -296,40 +391,18 @@ class VerifHeep:
         else:
           with open(dataset_dir_c, 'w') as f:
             # Add license
-            license = "/*\n\tCopyright EPFL contributors.\n\tLicensed under the Apache License, Version 2.0, see LICENSE for details.\n\tSPDX-License-Identifier: Apache-2.0\n*/\n\n"
-            f.write(license)
+            f.write(DATASET_LICENSE)
             f.write(f'#include "{os.path.basename(dataset_dir)}"\n\n')
             
-            # Vector declaration
-            f.write(f"const {datatype} {dataset_name}[{dataset_size}] = " + "{\n")
-            
-            # Generate the random vector
-            for i in range(dataset_size):
-                if 'float' in datatype:
-                    value = random.uniform(range_min, range_max)  # float
-                elif 'uint' in datatype:
-                    if ('8' in datatype or '16' in datatype or '32' in datatype) and range_min >= 0 and range_max > 0:
-                        value = random.randint(range_min, range_max)
-                    else:
-                        print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                        exit(1)
-                elif 'int' in datatype:
-                    if ('8' in datatype or '16' in datatype or '32' in datatype):
-                        value = random.randint(range_min, range_max)
-                    else:
-                        print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                        exit(1)
-                else:
-                  print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                  exit(1)
-
-                if i < dataset_size - 1:
-                    f.write(f" {value},")
-                else:
-                    f.write(f" {value}")
-              
-                if row_size > 0 and (i + 1) % row_size == 0:
-                  f.write("\n")
+            # Vector and parameters definition, in their own section in data reload mode so that they can be overwritten
+            if reload:
+              for key, parameter_type in parameters.items():
+                  f.write(f'{parameter_type} {key} __attribute__((section("{PARAMETER_SECTION}"))) = {self.reload_parameters[key][1]};\n')
+              f.write("\n")
+              f.write(f'const {datatype} {dataset_name}[{array_size}] __attribute__((section("{DATASET_SECTION}"), aligned(4))) = ' + "{\n")
+            else:
+              f.write(f"const {datatype} {dataset_name}[{values.size}] = " + "{\n")
+            self.writeArrayValues(f, values, row_size)
               
             # Close the file
             f.write("};\n\n")
@@ -338,123 +411,116 @@ class VerifHeep:
             # Add license
             f.write(f"#ifndef {dataset_name.upper()}_H\n")
             f.write(f"#define {dataset_name.upper()}_H\n\n")
-            license = "/*\n\tCopyright EPFL contributors.\n\tLicensed under the Apache License, Version 2.0, see LICENSE for details.\n\tSPDX-License-Identifier: Apache-2.0\n*/\n\n"
-            f.write(license)
+            f.write(DATASET_LICENSE)
             f.write(f"#include <stdint.h>\n\n")
 
             # Write the parameters, if there are any
-            if parameters:
+            if parameters and reload:
+                for key, parameter_type in parameters.items():
+                    f.write(f"extern {parameter_type} {key};\n")
+            elif parameters:
                 for key, value in parameters.items():
                     f.write(f"#define {key} {value}\n")
             
             f.write("\n")
 
             # Vector declaration
-            f.write(f"extern const {datatype} {dataset_name}[{dataset_size}];\n\n")
+            f.write(f"extern const {datatype} {dataset_name}[{array_size}];\n\n")
             
             # Close the file
             f.write(f"#endif // {dataset_name.upper()}_H\n")
 
-    def genGoldenResult(self, function, golden_size, parameters, row_size=0, output_datatype="uint32_t",  input_dataset_dir="input_dataset.h", golden_dir_c="", golden_dir="golden_output.h", golden_name = "golden_output"):
-        
-        # Recover the input dataset
-        with open(input_dataset_dir, 'r') as f:
-            content = f.read()
-
-        # Use regular expressions to find the array data
-        pattern = re.compile(r"{(.*?)}", re.DOTALL)
-        match = pattern.search(content)
-
-        if not match:
-            raise ValueError("No array data found in the file.")
+        # Keep the exact values next to the header, so they can be reused without parsing it
+        np.save(os.path.splitext(dataset_dir)[0] + ".npy", values)
 
-        array_data = match.group(1)
-        # Remove extra whitespace and split the string into individual values
-        array_data = array_data.replace('\n', '').replace(' ', '')
-        values = array_data.split(',')
+        # In data reload mode, the values of a dataset defined in a .c are written in memory from a binary file.
+        # Its header is compiled in the application, so the application is built again when it changes
+        if self.data_reload:
+            if reload:
+                bin_dir = os.path.abspath(os.path.splitext(dataset_dir_c)[0] + ".bin")
+                values.astype(values.dtype.newbyteorder("<")).tofile(bin_dir)
+                self.reload_datasets[dataset_name] = bin_dir
+            else:
+                self.reload_datasets.pop(dataset_name, None)
+                self.reloadParameters(dataset_name, None)
+            with open(dataset_dir, 'rb') as f:
+                self.reload_headers[dataset_name] = hashlib.sha256(f.read()).hexdigest()
+
+    def reloadParameters(self, dataset_name, parameters):
+
+        # Record the values written in memory for the parameters of a dataset, replacing its previous ones,
+        # and return the datatype of each of them
+        self.reload_parameters = {key: parameter for key, parameter in self.reload_parameters.items() if parameter[0] != dataset_name}
+        if not parameters:
+            return {}
+
+        parameter_types = {}
+        for key, value in parameters.items():
+            if key in self.reload_parameters:
+                raise Exception(f'Parameter {key} of {dataset_name} is already written with the dataset {self.reload_parameters[key][0]}\n')
+            value = value.item() if isinstance(value, np.generic) else value
+            if type(value) not in PARAMETER_DTYPES:
+                raise Exception(f'Parameter {key} of {dataset_name} is not a number, it cannot be written in data reload mode\n')
+            parameter_types[key] = PARAMETER_DTYPES[type(value)]
+            self.reload_parameters[key] = (dataset_name, value)
+        return parameter_types
+
+    def writeArrayValues(self, f, values, row_size=0):
+        
+        # The values are formatted and written a chunk at a time, as " value," with a new line every row_size values
+        values = values.reshape(-1)
+        for start in range(0, values.size, DATASET_CHUNK_SIZE):
+            chunk = values[start:start + DATASET_CHUNK_SIZE]
+            index = np.arange(start + 1, start + chunk.size + 1)
+            separators = np.where(index < values.size, ",", "")
+            if row_size > 0:
+                separators = np.char.add(separators, np.where(index % row_size == 0, "\n", ""))
+            f.write("".join(np.char.add(np.char.add(" ", chunk.astype(str)), separators).tolist()))
+
+    def genGoldenResult(self, function, golden_size, parameters, row_size=0, output_datatype="uint32_t",  input_dataset_dir="input_dataset.h", golden_dir_c="", golden_dir="golden_output.h", golden_name = "golden_output", input_dataset=None):
+        
+        if output_datatype not in DATASET_DTYPES:
+            print("Error: invalid datatype. Choose one among:\n- " + "\n- ".join(DATASET_DTYPES) + "\n")
+            exit(1)
 
-        # Convert values to the appropriate type
-        if "float" in content:
-            values = [float(value) for value in values]
-        elif "uint8_t" in content or "uint16_t" in content or "uint32_t" in content:
-            values = [int(value) for value in values]
-        elif "int8_t" in content or "int16_t" in content or "int32_t" in content:
-            values = [int(value) for value in values]
+        # Recover the input dataset: the array returned by genInputDataset, its .npy file, or the C file itself
+        if input_dataset is None:
+            npy_dir = os.path.splitext(input_dataset_dir)[0] + ".npy"
+            if os.path.exists(npy_dir) and os.path.getmtime(npy_dir) >= os.path.getmtime(input_dataset_dir):
+                input_dataset = np.load(npy_dir)
+            else:
+                input_dataset = self.readDataset(input_dataset_dir)
 
         # Generate the golden result
-        (golden_values, output_parameters) = function(values, parameters)
-
-        if golden_dir_c == "":
-          with open(golden_dir, 'w') as f:
-            # Write the golden result to a file
-            f.write(f"#ifndef {golden_name.upper()}_H\n")
-            f.write(f"#define {golden_name.upper()}_H\n\n")
-            license = "/*\n\tCopyright EPFL contributors.\n\tLicensed under the Apache License, Version 2.0, see LICENSE for details.\n\tSPDX-License-Identifier: Apache-2.0\n*/\n\n"
-            f.write(license)
-            f.write(f"#include <stdint.h>\n\n")
+        (golden_values, output_parameters) = function(input_dataset, parameters)
 
-            # Write the parameters that could have been returned from the function
-            if output_parameters:
-              for key, value in output_parameters.items():
-                  f.write(f"#define {key} {value}\n")
-            
-            f.write("\n")
-
-            # Vector declaration
-            f.write(f"const {output_datatype} {golden_name}[{golden_size}] = " + "{\n")
+        golden_values = np.asarray(golden_values).reshape(-1)
+        if golden_values.size < golden_size:
+            print(f"Error: the golden result has {golden_values.size} values, {golden_size} expected\n")
+            exit(1)
+        golden_values = golden_values[:golden_size].astype(DATASET_DTYPES[output_datatype])
 
-            for i in range(golden_size):
-              if i < golden_size - 1:
-                f.write(f" {golden_values[i]},")
-              else:
-                f.write(f" {golden_values[i]}")
-              
-              if row_size > 0 and (i + 1) % row_size == 0:
-                f.write("\n")
+        self.writeDataset(golden_values, output_parameters, row_size, golden_dir, golden_dir_c, golden_name, output_datatype)
 
-            # Close the file
-            f.write("};\n\n")
-            f.write(f"#endif // {golden_name.upper()}_H\n")
-        else:
-          with open(golden_dir_c, 'w') as f:
-            # Write the golden result to a file
-            license = "/*\n\tCopyright EPFL contributors.\n\tLicensed under the Apache License, Version 2.0, see LICENSE for details.\n\tSPDX-License-Identifier: Apache-2.0\n*/\n\n"
-            f.write(license)
-            f.write(f'#include "{os.path.basename(golden_dir)}"\n\n')
-            
-            # Vector declaration
-            f.write(f"const {output_datatype} {golden_name}[{golden_size}] = " + "{\n")
+        return golden_values
 
-            for i in range(golden_size):
-              if i < golden_size - 1:
-                f.write(f" {golden_values[i]},")
-              else:
-                f.write(f" {golden_values[i]}")
-                
-              if row_size > 0 and (i + 1) % row_size == 0:
-                f.write("\n")
-
-            # Close the file
-            f.write("};\n\n")
+    def readDataset(self, dataset_dir):
+        
+        # Parse a dataset written in C, e.g. a custom one without .npy file
+        with open(dataset_dir, 'r') as f:
+            content = f.read()
 
-          with open(golden_dir, 'w') as f:
-            # Write the golden result to a file
-            f.write(f"#ifndef {golden_name.upper()}_H\n")
-            f.write(f"#define {golden_name.upper()}_H\n\n")
-            license = "/*\n\tCopyright EPFL contributors.\n\tLicensed under the Apache License, Version 2.0, see LICENSE for details.\n\tSPDX-License-Identifier: Apache-2.0\n*/\n\n"
-            f.write(license)
-            f.write(f"#include <stdint.h>\n\n")
+        # Use regular expressions to find the array datatype and data
+        pattern = re.compile(r"(\w+)\s+\w+\s*\[[^\]]*\]\s*=\s*{(.*?)}", re.DOTALL)
+        match = pattern.search(content)
 
-            # Write the parameters that could have been returned from the function
-            if output_parameters:
-              for key, value in output_parameters.items():
-                  f.write(f"#define {key} {value}\n")
+        if not match:
+            raise ValueError("No array data found in the file.")
 
-            # Vector declaration
-            f.write(f"extern const {output_datatype} {golden_name}[{golden_size}];\n\n")
+        if match.group(1) not in DATASET_DTYPES:
+            raise ValueError(f"Unsupported array datatype {match.group(1)}.")
 
-            # Close the file
-            f.write(f"#endif // {golden_name.upper()}_H\n")
+        return np.array(match.group(2).replace('\n', '').replace(' ', '').rstrip(',').split(','), dtype=DATASET_DTYPES[match.group(1)])
 
     def modifyFile(self, file_dir, pattern, replacement):
         
@@ -467,6 +533,10 @@ class VerifHeep:
         with open(file_dir, 'w') as f:
           f.write(new_content)
 
+        # The loaded application does not match its sources anymore
+        if new_content != content:
+          self.loaded_build = None
+
 # Serial communication thread
 
 def SerialReceiver(ser, serial_queue, endword="&"):
@@ -486,8 +556,9 @@ def SerialReceiver(ser, serial_queue, endword="&"):
                     PRINT_DEB(f"Received {endword}: end of serial transmission thread")
                     return
                 elif "ERROR" in line:
+                    # Ends the thread only, launchTest keeps the lines received so far
                     print("FAILED VERIFICATION!")
-                    exit(1)
+                    return
     except serial.SerialException as e:
         print(f"Serial exception: {e}")
     except Exception as e:
@@ -1,10 +1,68 @@
 # Write a C header file with array definitions for the input matrix, the output
 # matrix, and the instruction stream.
 
+import io
 import os
+import re
 import sys
 import numpy as np
 
+# Number of array elements formatted at once when writing a header. Arrays are formatted
+# and written chunk by chunk, so the memory used does not depend on the size of the data.
+CHUNK_ELEMENTS = 1 << 16
+
+# ASCII codes of the hexadecimal digits
+HEX_DIGITS_LOWER = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+HEX_DIGITS_UPPER = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+
+# Format a chunk of the elements of a C array initializer without looping over the elements:
+# each element is a zero-padded hexadecimal value followed by a comma, and the rows (of cols
+# elements) are indented and end with a newline. first_index is the index of the first element
+# of the chunk in the whole array, digits selects lower or upper case.
+def format_hex_chunk(
+    values: np.ndarray,
+    first_index: int,
+    cols: int,
+    num_digits: int,
+    digits: np.ndarray = HEX_DIGITS_LOWER,
+) -> bytes:
+    n = values.size
+    indent = 4
+    width = indent + 2 + num_digits + 2
+
+    # One fixed-width record per element: indentation, "0x", digits and separator
+    records = np.empty((n, width), dtype=np.uint8)
+    records[:, :indent] = ord(" ")
+    records[:, indent] = ord("0")
+    records[:, indent + 1] = ord("x")
+    shifts = np.arange(num_digits - 1, -1, -1, dtype=values.dtype) * 4
+    records[:, indent + 2 : indent + 2 + num_digits] = digits[
+        (values[:, None] >> shifts) & 0xF
+    ]
+    records[:, -2] = ord(",")
+    col = np.arange(first_index, first_index + n) % cols
+    records[:, -1] = np.where(col == cols - 1, ord("\n"), ord(" "))
+
+    # Only the first element of a row is indented
+    keep = np.ones((n, width), dtype=bool)
+    keep[col != 0, :indent] = False
+    return records[keep].tobytes()
+
+
+# Write the elements of a C array initializer to a text stream, chunk by chunk.
+# The last element is not followed by a comma.
+def write_hex_array(
+    out, values: np.ndarray, cols: int, num_digits: int, digits=HEX_DIGITS_LOWER
+) -> None:
+    for start in range(0, values.size, CHUNK_ELEMENTS):
+        chunk = format_hex_chunk(
+            values[start : start + CHUNK_ELEMENTS], start, cols, num_digits, digits
+        )
+        if start + CHUNK_ELEMENTS >= values.size:
+            chunk = chunk[:-2] + b"\n"
+        out.write(chunk.decode("ascii"))
+
 
 class CFileGen:
     """
@@ -89,25 +147,27 @@ class CFileGen:
 
     # Format binary file content as C array
     def format_binary(self, name: str, file: str) -> str:
-        # Read binary file
+        contents = io.StringIO()
+        self.write_binary(contents, name, file)
+        return contents.getvalue()
+
+    # Write binary file content as C array, reading the file chunk by chunk
+    def write_binary(self, out, name: str, file: str) -> None:
+        # Number of 32-bit words, the data is padded to 4-byte alignment (possibly zero padding)
+        data_len = (os.path.getsize(file) + 3) // 4
+
+        out.write(f"uint32_t {name}[] = {{\n")
         with open(file, "rb") as f:
-            content = f.read()
-
-        # Pad data to 4-byte alignment (possibly zero padding)
-        data_len = len(content) // 4
-        if len(content) % 4 != 0:
-            data_len += 1
-            content += b"\x00" * (4 - (len(content) % 4))
-
-        # Write C data content
-        array_contents = f"uint32_t {name}[] = {{\n"
-        for i in range(data_len):
-            element = int.from_bytes(content[i * 4 : (i + 1) * 4], byteorder="little")
-            array_contents += f"    0x{element:08X}"
-            if i != data_len - 1:
-                array_contents += ",\n"
-        array_contents += "\n};\n"
-        return array_contents
+            for start in range(0, data_len, CHUNK_ELEMENTS):
+                content = f.read(CHUNK_ELEMENTS * 4)
+                if len(content) % 4 != 0:
+                    content += b"\x00" * (4 - (len(content) % 4))
+                words = np.frombuffer(content, dtype="<u4")
+                chunk = format_hex_chunk(words, start, 1, 8, HEX_DIGITS_UPPER)
+                if start + CHUNK_ELEMENTS >= data_len:
+                    chunk = chunk[:-2] + b"\n"
+                out.write(chunk.decode("ascii"))
+        out.write("};\n")
 
     # Format matrix size macros
     def format_matrix_size(self, matrix: np.ndarray, name: str) -> str:
@@ -121,176 +181,285 @@ class CFileGen:
         size_contents = f"#define {name.upper()}_SIZE {len(code)*4}\n"
         return size_contents
 
+    # Format the attributes of the C arrays
+    def format_attributes(self) -> str:
+        if len(self.attributes) > 0:
+            return f"__attribute__(({','.join(self.attributes)})) "
+        return ""
+
     # Format matrix for C
     def format_matrix(self, matrix: np.ndarray, name: str) -> str:
+        contents = io.StringIO()
+        self.write_matrix(contents, matrix, name)
+        return contents.getvalue()
+
+    # Write matrix for C, formatting the elements in vectorized chunks
+    def write_matrix(self, out, matrix: np.ndarray, name: str) -> None:
         # Determine the number of bits based on the dtype
         dtype: np.dtype = matrix.dtype
         num_bits = dtype.itemsize * 8
-
         array_ctype = self.dtype_to_ctype(dtype)
-        utype = self.signed2unsigned(dtype)
-        matrix = matrix.astype(utype)
 
-        # Convert the signed array to 2's complement hexadecimal values
-        rows = []
-        for row in matrix:
-            hex_values = [f"{element:#0{2+num_bits//4}x}" for element in row]
-            rows.append(hex_values)
-
-        # Format the matrix
-        matrix_contents = f"{array_ctype} {name} [] "
-        if len(self.attributes) > 0:
-            matrix_contents += f"__attribute__(({','.join(self.attributes)})) "
-        matrix_contents += "= {\n"
-        if len(rows) > 1:
-            matrix_contents += ",\n".join([f"    {', '.join(row)}" for row in rows])
-        else:
-            matrix_contents += f"    {', '.join(rows[0])}"
-        matrix_contents += "\n};\n\n"
+        # The 2's complement hexadecimal values are the ones of the unsigned type of the same size
+        values = np.ascontiguousarray(matrix).reshape(-1).view(f"uint{num_bits}")
+        cols = values.size // matrix.shape[0] if matrix.shape[0] else 1
 
-        return matrix_contents
+        # Write the matrix, one line per row
+        out.write(f"{array_ctype} {name} [] {self.format_attributes()}= {{\n")
+        write_hex_array(out, values, cols, num_bits // 4)
+        out.write("};\n\n")
 
     def format_code(self, code: str, name: str) -> str:
+        contents = io.StringIO()
+        self.write_code(contents, code, name)
+        return contents.getvalue()
+
+    def write_code(self, out, code: str, name: str) -> None:
         # Format the array
-        code_contents = f"uint32_t {name}[] "
-        if len(self.attributes) > 0:
-            code_contents += f"__attribute__(({','.join(self.attributes)})) "
-        code_contents += "= {"
+        out.write(f"uint32_t {name}[] {self.format_attributes()}= {{")
         for i, insn in enumerate(code):
+            code_contents = ""
             if i % 8 == 0:
                 code_contents += "\n    "
             code_contents += f"{insn:>10}"
             if i < len(code) - 1:
                 code_contents += ", "
-        code_contents += "\n};\n"
-        return code_contents
-
-    # Write the header file
+            out.write(code_contents)
+        out.write("\n};\n")
+
+    # Write the raw bytes of a binary file to a blob, padded to 4-byte alignment
+    def write_binary_blob(self, blob_path: str, file: str) -> None:
+        with open(file, "rb") as f, open(blob_path, "wb") as blob:
+            size = 0
+            for content in iter(lambda: f.read(CHUNK_ELEMENTS * 4), b""):
+                blob.write(content)
+                size += len(content)
+            if size % 4 != 0:
+                blob.write(b"\x00" * (4 - (size % 4)))
+
+    # Write the raw bytes of a matrix to a blob, in little-endian order
+    def write_matrix_blob(self, blob_path: str, matrix: np.ndarray) -> None:
+        values = np.ascontiguousarray(matrix).reshape(-1)
+        values.astype(values.dtype.newbyteorder("<"), copy=False).tofile(blob_path)
+
+    # Format the declaration of an array whose data is in a blob
+    def format_extern(self, ctype: str, name: str, attributes: bool = True) -> str:
+        attrs = f" {self.format_attributes().strip()}" if attributes else ""
+        return f"extern {ctype} {name}[]{attrs};\n"
+
+    # Format the assembler stub defining the arrays stored in blobs with .incbin.
+    # The section, alignment and weak C attributes are translated to the matching directives.
+    def format_incbin_stub(self, blobs, header_base: str) -> str:
+        stub = f"/* Data of the arrays declared in {header_base}, generated by c_gen.py */\n\n"
+        for name, blob_path, attributes, align in blobs:
+            section = f'.data.{name}, "aw", @progbits'
+            binding = ".global"
+            if attributes:
+                for attr in self.attributes:
+                    mat = re.fullmatch(r'\s*section\s*\(\s*"([^"]+)"\s*\)\s*', attr)
+                    if mat:
+                        section = f'{mat.group(1)}, "aw", @progbits'
+                    mat = re.fullmatch(r"\s*aligned\s*\(\s*(\d+)\s*\)\s*", attr)
+                    if mat:
+                        align = max(align, int(mat.group(1)))
+                    if attr.strip() == "weak":
+                        binding = ".weak"
+            stub += f"    .section {section}\n"
+            stub += f"    .balign {align}\n"
+            stub += f"    {binding} {name}\n"
+            stub += f"    .type {name}, @object\n"
+            stub += f"{name}:\n"
+            stub += f'    .incbin "{blob_path}"\n'
+            stub += f"    .size {name}, . - {name}\n\n"
+        return stub
+
+    # Generate the header file content
     def gen_header(self, header_macro: str = None) -> str:
+        header_contents = io.StringIO()
+        self.write_header_contents(header_contents, header_macro)
+        return header_contents.getvalue()
+
+    # Write the header file content to a text stream. The arrays are written as they are formatted,
+    # the whole header is never held in memory.
+    # If blob_dir is set, the data of the binaries and matrices is written to <blob_dir>/<name>.bin
+    # and the header only declares them. The list of the blobs, as (name, path, with attributes,
+    # alignment) tuples, is returned to define them (see format_incbin_stub).
+    def write_header_contents(
+        self, out, header_macro: str = None, blob_dir: str = None
+    ) -> list:
+        blobs = []
         if header_macro is not None:
             # Header guard
-            header_contents = f"#ifndef {header_macro}\n#define {header_macro}\n\n"
+            out.write(f"#ifndef {header_macro}\n#define {header_macro}\n\n")
             # Include stdint.h
-            header_contents += "#include <stdint.h>\n\n"
+            out.write("#include <stdint.h>\n\n")
 
         # Macros
         if len(self.macros) > 0 or len(self.macros_hex) > 0 or len(self.macros_raw) > 0:
-            header_contents += "// Macros\n"
-            header_contents += "// ------\n"
+            out.write("// Macros\n")
+            out.write("// ------\n")
         for name, value, comment in self.macros:
-            header_contents += f"#define {name.upper()} {value}"
+            out.write(f"#define {name.upper()} {value}")
             if comment is not None:
-                header_contents += f" // {comment}\n"
+                out.write(f" // {comment}\n")
             else:
-                header_contents += "\n"
+                out.write("\n")
         for name, value, comment in self.macros_hex:
-            header_contents += f"#define {name.upper()} 0x{value:08X}"
+            out.write(f"#define {name.upper()} 0x{value:08X}")
             if comment is not None:
-                header_contents += f" // {comment}\n"
+                out.write(f" // {comment}\n")
             else:
-                header_contents += "\n"
+                out.write("\n")
         for name in self.macros_raw:
-            header_contents += name
+            out.write(name)
         if len(self.macros) > 0 or len(self.macros_hex) > 0 or len(self.macros_raw) > 0:
-            header_contents += "\n"
+            out.write("\n")
 
         # Macros with array sizes
         if len(self.binaries) > 0:
-            header_contents += "// Binary size\n"
-            header_contents += "// -----------\n"
+            out.write("// Binary size\n")
+            out.write("// -----------\n")
             for name, file in self.binaries:
                 file_size = os.path.getsize(file)
                 if file_size % 4 != 0:
                     file_size += 4 - (file_size % 4)
-                header_contents += f"#define {name.upper()}_SIZE {file_size}\n"
-            header_contents += "\n"
+                out.write(f"#define {name.upper()}_SIZE {file_size}\n")
+            out.write("\n")
 
         if len(self.input_matrices) > 0:
-            header_contents += "// Input matrix size\n"
+            out.write("// Input matrix size\n")
             for name, matrix in self.input_matrices:
-                header_contents += self.format_matrix_size(matrix, name)
-            header_contents += "\n"
+                out.write(self.format_matrix_size(matrix, name))
+            out.write("\n")
 
         if len(self.output_matrices) > 0:
-            header_contents += "// Output matrix size\n"
+            out.write("// Output matrix size\n")
             for name, matrix in self.output_matrices:
-                header_contents += self.format_matrix_size(matrix, name)
-            header_contents += "\n"
+                out.write(self.format_matrix_size(matrix, name))
+            out.write("\n")
 
         if len(self.codes) > 0:
-            header_contents += "// Code size\n"
+            out.write("// Code size\n")
             for name, code in self.codes:
-                header_contents += self.format_code_size(code, name)
-            header_contents += "\n"
+                out.write(self.format_code_size(code, name))
+            out.write("\n")
 
         # Write binary files
         if len(self.binaries) > 0:
-            header_contents += "// Binary files\n"
-            header_contents += "// ------------\n"
+            out.write("// Binary files\n")
+            out.write("// ------------\n")
             for name, file in self.binaries:
-                header_contents += self.format_binary(name, file)
-            header_contents += "\n"
+                if blob_dir is None:
+                    self.write_binary(out, name, file)
+                else:
+                    blob_path = os.path.join(blob_dir, f"{name}.bin")
+                    self.write_binary_blob(blob_path, file)
+                    blobs.append((name, blob_path, False, 4))
+                    out.write(self.format_extern("uint32_t", name, attributes=False))
+            out.write("\n")
 
         # Write code arrays
         if len(self.codes) > 0:
-            header_contents += "// Code\n"
-            header_contents += "// ----\n"
+            out.write("// Code\n")
+            out.write("// ----\n")
             for name, code in self.codes:
-                header_contents += self.format_code(code, name)
-            header_contents += "\n"
+                self.write_code(out, code, name)
+            out.write("\n")
 
         # Write input matrices
         if len(self.input_matrices) > 0:
-            header_contents += "// Input matrices\n"
-            header_contents += "// --------------\n"
+            out.write("// Input matrices\n")
+            out.write("// --------------\n")
             for name, matrix in self.input_matrices:
-                header_contents += self.format_matrix(matrix, name)
+                self.write_matrix_or_blob(out, matrix, name, blob_dir, blobs)
 
         # Write output matrices
         if len(self.output_matrices) > 0:
-            header_contents += "// Output matrices\n"
-            header_contents += "// ---------------\n"
+            out.write("// Output matrices\n")
+            out.write("// ---------------\n")
             for name, matrix in self.output_matrices:
-                header_contents += self.format_matrix(matrix, name)
+                self.write_matrix_or_blob(out, matrix, name, blob_dir, blobs)
 
         if header_macro is not None:
-            header_contents += f"#endif // {header_macro}\n"
-
-        # Return the header contents
-        return header_contents
-
-    def write_header(self, directory: str, file_name: str) -> None:
+            out.write(f"#endif // {header_macro}\n")
+
+        return blobs
+
+    def write_matrix_or_blob(self, out, matrix, name, blob_dir, blobs) -> None:
+        if blob_dir is None:
+            self.write_matrix(out, matrix, name)
+            return
+        blob_path = os.path.join(blob_dir, f"{name}.bin")
+        self.write_matrix_blob(blob_path, matrix)
+        blobs.append((name, blob_path, True, max(matrix.itemsize, 4)))
+        out.write(self.format_extern(self.dtype_to_ctype(matrix.dtype), name))
+        out.write("\n")
+
+    # Write the header file. In blob mode, the binaries and matrices are written to .bin files
+    # next to the header, which only declares them, and an assembler stub with the same name as the
+    # header (.S) defines them with .incbin, so the compiler never parses the data. The stub refers
+    # to the blobs by absolute path, or relative to incbin_dir if set (which must then be in the
+    # assembler include path).
+    def write_header(
+        self,
+        directory: str,
+        file_name: str,
+        blob: bool = False,
+        incbin_dir: str = None,
+    ) -> None:
         # Header file path
         header_path = os.path.join(directory, file_name)
         header_base = os.path.basename(header_path)
         header_macro = header_base.upper().replace(".", "_") + "_"
 
-        # Generate header
-        header_contents = self.gen_header(header_macro)
-
-        # Write header file
+        # Generate the header directly into the file
         with open(header_path, "w") as header_file:
-            header_file.write(header_contents)
+            blobs = self.write_header_contents(
+                header_file, header_macro, directory if blob else None
+            )
+
+        if blob:
+            blobs = [
+                (
+                    name,
+                    (
+                        os.path.relpath(path, incbin_dir)
+                        if incbin_dir is not None
+                        else os.path.abspath(path)
+                    ),
+                    attributes,
+                    align,
+                )
+                for name, path, attributes, align in blobs
+            ]
+            stub_path = os.path.splitext(header_path)[0] + ".S"
+            with open(stub_path, "w") as stub_file:
+                stub_file.write(self.format_incbin_stub(blobs, header_base))
 
     def append_header(self, file, header_macro: str = None):
-        # Generate header
-        header_contents = self.gen_header(header_macro)
-
-        # Write header file
-        file.write(header_contents)
+        # Generate the header directly into the file
+        self.write_header_contents(file, header_macro)
 
 
 # When launched as a standalone script, convert a binary file (e.g., compiled firmware) into a C header
 if __name__ == "__main__":
+    # Embed the binary with .incbin instead of a C array
+    args = sys.argv[1:]
+    blob = "--blob" in args
+    if blob:
+        args.remove("--blob")
+
     # Check the number of arguments
-    if len(sys.argv) < 3:
-        print("Usage: python c_gen.py <header_file> <bin_file> [<src_file> ...]")
+    if len(args) < 2:
+        print(
+            "Usage: python c_gen.py [--blob] <header_file> <bin_file> [<src_file> ...]"
+        )
         sys.exit(1)
 
     # Parse arguments
-    header_file = sys.argv[1]
-    bin_file = sys.argv[2]
-    src_files = sys.argv[3:] if len(sys.argv) > 3 else []
+    header_file = args[0]
+    bin_file = args[1]
+    src_files = args[2:]
 
     # Determine kernel name
     header_name = os.path.splitext(os.path.basename(header_file))[0]
@@ -308,4 +477,4 @@ if __name__ == "__main__":
 
     # Write header file
     print(f"Writing header file '{os.path.join(out_dir, header_file)}'...")
-    header_gen.write_header(out_dir, header_file)
+    header_gen.write_header(out_dir, header_file, blob=blob)
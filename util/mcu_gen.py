@@ -12,383 +12,399 @@ import pathlib
 import sys
 import re
 import logging
-import pickle
+import hashlib
+import json
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from jsonref import JsonRef
 from mako.template import Template
+from mako.lookup import TemplateLookup
 import x_heep_gen.load_config
 from x_heep_gen.load_config import load_peripherals_config
 from x_heep_gen.xheep import BusType
 from x_heep_gen.cpu.cpu import CPU
+from x_heep_gen.snapshot import load_snapshot, save_snapshot, StaleSnapshotError
 import os
 
 
 class Pad:
+    """
+    Compact description of a pad, from which the SystemVerilog fragments used by the templates are generated when they are rendered.
+    Only the pad parameters and its drive tables (one entry per muxed signal) are stored, so that the cached configuration grows with the number of pads and not with the generated text.
+    """
 
-    def remove_comma_io_interface(self):
-        try:
-            self.x_heep_system_interface = self.x_heep_system_interface.rstrip(
-                self.x_heep_system_interface[-1]
-            )
-        except IndexError:
-            pass
-            ### bypass kind of PADs do not have any comma to be removed as they do not define an interface
-
-    def create_pad_ring(self):
-
-        # Mapping dictionary from string to integer
-        mapping_dict = {
-            "top": "core_v_mini_mcu_pkg::TOP",
-            "right": "core_v_mini_mcu_pkg::RIGHT",
-            "bottom": "core_v_mini_mcu_pkg::BOTTOM",
-            "left": "core_v_mini_mcu_pkg::LEFT",
-        }
-
-        mapping = ""
-        if self.pad_mapping is not None:
-            mapping = ", .SIDE(" + mapping_dict[self.pad_mapping] + ")"
+    __slots__ = (
+        "name",
+        "cell_name",
+        "index",
+        "pad_type",
+        "pad_mapping",
+        "pad_mux_list",
+        "signal_name",
+        "has_attribute",
+        "attribute_bits",
+        "constant_attribute",
+        "is_muxed",
+        "is_driven_manually",
+        "do_skip_declaration",
+        "keep_internal",
+        "signal_name_drive",
+        "pad_type_drive",
+        "driven_manually",
+        "skip_declaration",
+        "layout_index",
+        "layout_orient",
+        "layout_cell",
+        "layout_bondpad",
+        "layout_offset",
+        "layout_skip",
+        "comma_removed",
+    )
 
-        self.interface = "    inout wire " + self.name + "_io,\n"
+    # Mapping dictionary from string to integer
+    SIDE_MAPPING = {
+        "top": "core_v_mini_mcu_pkg::TOP",
+        "right": "core_v_mini_mcu_pkg::RIGHT",
+        "bottom": "core_v_mini_mcu_pkg::BOTTOM",
+        "left": "core_v_mini_mcu_pkg::LEFT",
+    }
 
+    def remove_comma_io_interface(self):
+        # bypass kind of PADs do not have any comma to be removed as they do not define an interface
+        self.comma_removed = True
+
+    @property
+    def localparam(self):
+        return "PAD_" + self.name.upper()
+
+    @property
+    def io_interface(self):
+        return self.signal_name + "io"
+
+    @property
+    def in_internal_signals(self):
+        return tuple(signal + "in_x" for signal in self.signal_name_drive)
+
+    @property
+    def out_internal_signals(self):
+        return tuple(signal + "out_x" for signal in self.signal_name_drive)
+
+    @property
+    def oe_internal_signals(self):
+        return tuple(signal + "oe_x" for signal in self.signal_name_drive)
+
+    def has_pad_cell(self):
+        return not self.keep_internal and self.pad_type in ("input", "output", "inout")
+
+    ### Pad Ring ###
+
+    @property
+    def interface(self):
+        if self.keep_internal:
+            return ""
+        return "    inout wire " + self.name + "_io,\n"
+
+    @property
+    def pad_ring_io_interface(self):
+        if not self.has_pad_cell():
+            return ""
+        return "    inout wire " + self.io_interface + ","
+
+    @property
+    def pad_ring_ctrl_interface(self):
+        if not self.has_pad_cell():
+            return ""
         if self.pad_type == "input":
-            self.pad_ring_io_interface = "    inout wire " + self.io_interface + ","
-            self.pad_ring_ctrl_interface += (
-                "    output logic " + self.signal_name + "o,"
-            )
-            self.pad_ring_instance = (
-                "pad_cell_input #(.PADATTR("
-                + str(self.attribute_bits)
-                + ")"
-                + mapping
-                + ") "
-                + self.cell_name
-                + " ( \n"
-                + "   .pad_in_i(1'b0),\n"
-                + "   .pad_oe_i(1'b0),\n"
-                + "   .pad_out_o("
-                + self.signal_name
-                + "o),\n"
-                + "   .pad_io("
-                + self.signal_name
-                + "io),\n"
-            )
+            return "    output logic " + self.signal_name + "o,"
         if self.pad_type == "output":
-            self.pad_ring_io_interface = "    inout wire " + self.io_interface + ","
-            self.pad_ring_ctrl_interface += "    input logic " + self.signal_name + "i,"
-            self.pad_ring_instance = (
-                "pad_cell_output #(.PADATTR("
-                + str(self.attribute_bits)
-                + ")"
-                + mapping
-                + ") "
-                + self.cell_name
-                + " ( \n"
-                + "   .pad_in_i("
-                + self.signal_name
-                + "i),\n"
-                + "   .pad_oe_i(1'b1),\n"
-                + "   .pad_out_o(),\n"
-                + "   .pad_io("
-                + self.signal_name
-                + "io),\n"
-            )
-        if self.pad_type == "inout":
-            self.pad_ring_io_interface = "    inout wire " + self.io_interface + ","
-            self.pad_ring_ctrl_interface += (
-                "    input logic " + self.signal_name + "i,\n"
-            )
-            self.pad_ring_ctrl_interface += (
-                "    output logic " + self.signal_name + "o,\n"
-            )
-            self.pad_ring_ctrl_interface += (
-                "    input logic " + self.signal_name + "oe_i,"
-            )
-            self.pad_ring_instance = (
-                "pad_cell_inout #(.PADATTR("
-                + str(self.attribute_bits)
-                + ")"
-                + mapping
-                + ") "
-                + self.cell_name
-                + " ( \n"
-                + "   .pad_in_i("
-                + self.signal_name
-                + "i),\n"
-                + "   .pad_oe_i("
-                + self.signal_name
-                + "oe_i),\n"
-                + "   .pad_out_o("
-                + self.signal_name
-                + "o),\n"
-                + "   .pad_io("
-                + self.signal_name
-                + "io),\n"
-            )
-
-        if (
-            self.pad_type == "input"
-            or self.pad_type == "output"
-            or self.pad_type == "inout"
-        ):
-            if self.has_attribute:
-                self.pad_ring_instance += (
-                    "   .pad_attributes_i(pad_attributes_i[core_v_mini_mcu_pkg::"
-                    + self.localparam
-                    + "])\n"
-                    + ");\n\n"
-                )
-            else:
-                self.pad_ring_instance += "   .pad_attributes_i('0)" + ");\n\n"
-
-    def create_core_v_mini_mcu_ctrl(self):
-
-        cnt = len(self.pad_type_drive)
-
-        for i in range(cnt):
-            if self.driven_manually[i] == False:
-                if (
-                    self.pad_type_drive[i] == "input"
-                    or self.pad_type_drive[i] == "bypass_input"
-                ):
-                    self.core_v_mini_mcu_interface += (
-                        "    input logic " + self.signal_name_drive[i] + "i,\n"
-                    )
-                if (
-                    self.pad_type_drive[i] == "output"
-                    or self.pad_type_drive[i] == "bypass_output"
-                ):
-                    self.core_v_mini_mcu_interface += (
-                        "    output logic " + self.signal_name_drive[i] + "o,\n"
-                    )
-                if (
-                    self.pad_type_drive[i] == "inout"
-                    or self.pad_type_drive[i] == "bypass_inout"
-                ):
-                    self.core_v_mini_mcu_interface += (
-                        "    output logic " + self.signal_name_drive[i] + "o,\n"
-                    )
-                    self.core_v_mini_mcu_interface += (
-                        "    input logic " + self.signal_name_drive[i] + "i,\n"
-                    )
-                    self.core_v_mini_mcu_interface += (
-                        "    output logic " + self.signal_name_drive[i] + "oe_o,\n"
-                    )
-
-    def create_internal_signals(self):
-        cnt = len(self.pad_type_drive)
-
-        for i in range(cnt):
-
-            self.in_internal_signals.append(self.signal_name_drive[i] + "in_x")
-            self.out_internal_signals.append(self.signal_name_drive[i] + "out_x")
-            self.oe_internal_signals.append(self.signal_name_drive[i] + "oe_x")
-
-            if self.skip_declaration[i] == False:
-                self.internal_signals += (
-                    "  logic "
-                    + self.in_internal_signals[i]
-                    + ","
-                    + self.out_internal_signals[i]
-                    + ","
-                    + self.oe_internal_signals[i]
-                    + ";\n"
-                )
-
-    def create_multiplexers(self):
-        cnt = len(self.pad_type_drive)
-
-        if cnt > 1:
-            ###muxing
-            pad_in_internal_signals = self.signal_name + "in_x_muxed"
-            pad_out_internal_signals = self.signal_name + "out_x_muxed"
-            pad_oe_internal_signals = self.signal_name + "oe_x_muxed"
+            return "    input logic " + self.signal_name + "i,"
+        return (
+            "    input logic "
+            + self.signal_name
+            + "i,\n"
+            + "    output logic "
+            + self.signal_name
+            + "o,\n"
+            + "    input logic "
+            + self.signal_name
+            + "oe_i,"
+        )
 
-            self.internal_signals += (
-                "  logic "
-                + pad_in_internal_signals
-                + ","
-                + pad_out_internal_signals
-                + ","
-                + pad_oe_internal_signals
-                + ";\n"
-            )
+    @property
+    def pad_ring_instance(self):
+        if not self.has_pad_cell():
+            return ""
 
-            self.mux_process += "  always_comb\n" + "  begin\n"
+        mapping = ""
+        if self.pad_mapping is not None:
+            mapping = ", .SIDE(" + self.SIDE_MAPPING[self.pad_mapping] + ")"
 
-            for i in range(cnt):
-                self.mux_process += "   " + self.in_internal_signals[i] + "=1'b0;\n"
+        if self.pad_type == "input":
+            pad_in = "1'b0"
+            pad_oe = "1'b0"
+            pad_out = self.signal_name + "o"
+        elif self.pad_type == "output":
+            pad_in = self.signal_name + "i"
+            pad_oe = "1'b1"
+            pad_out = ""
+        else:
+            pad_in = self.signal_name + "i"
+            pad_oe = self.signal_name + "oe_i"
+            pad_out = self.signal_name + "o"
+
+        instance = (
+            "pad_cell_"
+            + self.pad_type
+            + " #(.PADATTR("
+            + str(self.attribute_bits)
+            + ")"
+            + mapping
+            + ") "
+            + self.cell_name
+            + " ( \n"
+            + "   .pad_in_i("
+            + pad_in
+            + "),\n"
+            + "   .pad_oe_i("
+            + pad_oe
+            + "),\n"
+            + "   .pad_out_o("
+            + pad_out
+            + "),\n"
+            + "   .pad_io("
+            + self.signal_name
+            + "io),\n"
+        )
 
-            self.mux_process += (
-                "   unique case(pad_muxes[core_v_mini_mcu_pkg::"
+        if self.has_attribute:
+            instance += (
+                "   .pad_attributes_i(pad_attributes_i[core_v_mini_mcu_pkg::"
                 + self.localparam
                 + "])\n"
+                + ");\n\n"
             )
+        else:
+            instance += "   .pad_attributes_i('0)" + ");\n\n"
+        return instance
 
-            for i in range(cnt):
-                self.mux_process += (
-                    "    "
-                    + str(i)
-                    + ": begin\n"
-                    + "      "
-                    + pad_out_internal_signals
-                    + " = "
-                    + self.out_internal_signals[i]
-                    + ";\n"
-                    + "      "
-                    + pad_oe_internal_signals
-                    + " = "
-                    + self.oe_internal_signals[i]
-                    + ";\n"
-                    + "      "
-                    + self.in_internal_signals[i]
-                    + " = "
-                    + pad_in_internal_signals
-                    + ";\n"
-                    + "    end\n"
-                )
+    ### core v mini mcu ###
 
-            self.mux_process += (
-                "    default: begin\n"
+    @property
+    def core_v_mini_mcu_interface(self):
+        interface = ""
+        for signal, pad_type, driven_manually in zip(
+            self.signal_name_drive, self.pad_type_drive, self.driven_manually
+        ):
+            if driven_manually:
+                continue
+            if pad_type == "input" or pad_type == "bypass_input":
+                interface += "    input logic " + signal + "i,\n"
+            if pad_type == "output" or pad_type == "bypass_output":
+                interface += "    output logic " + signal + "o,\n"
+            if pad_type == "inout" or pad_type == "bypass_inout":
+                interface += "    output logic " + signal + "o,\n"
+                interface += "    input logic " + signal + "i,\n"
+                interface += "    output logic " + signal + "oe_o,\n"
+        return interface
+
+    @property
+    def constant_driver_assign(self):
+        assign = ""
+        for signal, pad_type, skip_declaration in zip(
+            self.signal_name_drive, self.pad_type_drive, self.skip_declaration
+        ):
+            if skip_declaration:
+                continue
+            if pad_type == "input" or pad_type == "bypass_input":
+                assign += "  assign " + signal + "out_x = 1'b0;\n"
+                assign += "  assign " + signal + "oe_x = 1'b0;\n"
+            if pad_type == "output" or pad_type == "bypass_output":
+                assign += "  assign " + signal + "oe_x = 1'b1;\n"
+        return assign
+
+    @property
+    def mux_process(self):
+        if not len(self.signal_name_drive) > 1:
+            return ""
+
+        pad_in_internal_signals = self.signal_name + "in_x_muxed"
+        pad_out_internal_signals = self.signal_name + "out_x_muxed"
+        pad_oe_internal_signals = self.signal_name + "oe_x_muxed"
+
+        process = "  always_comb\n" + "  begin\n"
+
+        for signal in self.signal_name_drive:
+            process += "   " + signal + "in_x=1'b0;\n"
+
+        process += (
+            "   unique case(pad_muxes[core_v_mini_mcu_pkg::" + self.localparam + "])\n"
+        )
+
+        for i, signal in enumerate(self.signal_name_drive):
+            process += (
+                "    "
+                + str(i)
+                + ": begin\n"
                 + "      "
                 + pad_out_internal_signals
                 + " = "
-                + self.out_internal_signals[0]
-                + ";\n"
+                + signal
+                + "out_x;\n"
                 + "      "
                 + pad_oe_internal_signals
                 + " = "
-                + self.oe_internal_signals[0]
-                + ";\n"
+                + signal
+                + "oe_x;\n"
                 + "      "
-                + self.in_internal_signals[0]
-                + " = "
+                + signal
+                + "in_x = "
                 + pad_in_internal_signals
                 + ";\n"
                 + "    end\n"
             )
 
-            self.mux_process += "   endcase\n" + "  end\n"
-
-    def create_constant_driver_assign(self):
-        cnt = len(self.pad_type_drive)
-
-        for i in range(cnt):
-
-            if self.skip_declaration[i] == False:
-                if (
-                    self.pad_type_drive[i] == "input"
-                    or self.pad_type_drive[i] == "bypass_input"
-                ):
-                    self.constant_driver_assign += (
-                        "  assign " + self.out_internal_signals[i] + " = 1'b0;\n"
-                    )
-                    self.constant_driver_assign += (
-                        "  assign " + self.oe_internal_signals[i] + " = 1'b0;\n"
-                    )
-                if (
-                    self.pad_type_drive[i] == "output"
-                    or self.pad_type_drive[i] == "bypass_output"
-                ):
-                    self.constant_driver_assign += (
-                        "  assign " + self.oe_internal_signals[i] + " = 1'b1;\n"
-                    )
-
-    def create_core_v_mini_mcu_bonding(self):
+        default = self.signal_name_drive[0]
+        process += (
+            "    default: begin\n"
+            + "      "
+            + pad_out_internal_signals
+            + " = "
+            + default
+            + "out_x;\n"
+            + "      "
+            + pad_oe_internal_signals
+            + " = "
+            + default
+            + "oe_x;\n"
+            + "      "
+            + default
+            + "in_x = "
+            + pad_in_internal_signals
+            + ";\n"
+            + "    end\n"
+        )
 
-        cnt = len(self.pad_type_drive)
+        process += "   endcase\n" + "  end\n"
+        return process
 
-        for i in range(cnt):
+    ### heep systems ###
 
-            if self.driven_manually[i] == False:
-                if (
-                    self.pad_type_drive[i] == "input"
-                    or self.pad_type_drive[i] == "bypass_input"
-                ):
-                    self.core_v_mini_mcu_bonding += (
-                        "    ."
-                        + self.signal_name_drive[i]
-                        + "i("
-                        + self.in_internal_signals[i]
-                        + "),\n"
-                    )
-                if (
-                    self.pad_type_drive[i] == "output"
-                    or self.pad_type_drive[i] == "bypass_output"
-                ):
-                    self.core_v_mini_mcu_bonding += (
-                        "    ."
-                        + self.signal_name_drive[i]
-                        + "o("
-                        + self.out_internal_signals[i]
-                        + "),\n"
-                    )
-                if (
-                    self.pad_type_drive[i] == "inout"
-                    or self.pad_type_drive[i] == "bypass_inout"
-                ):
-                    self.core_v_mini_mcu_bonding += (
-                        "    ."
-                        + self.signal_name_drive[i]
-                        + "i("
-                        + self.in_internal_signals[i]
-                        + "),\n"
-                    )
-                    self.core_v_mini_mcu_bonding += (
-                        "    ."
-                        + self.signal_name_drive[i]
-                        + "o("
-                        + self.out_internal_signals[i]
-                        + "),\n"
-                    )
-                    self.core_v_mini_mcu_bonding += (
-                        "    ."
-                        + self.signal_name_drive[i]
-                        + "oe_o("
-                        + self.oe_internal_signals[i]
-                        + "),\n"
-                    )
+    @property
+    def internal_signals(self):
+        signals = ""
+        for signal, skip_declaration in zip(
+            self.signal_name_drive, self.skip_declaration
+        ):
+            if not skip_declaration:
+                signals += (
+                    "  logic "
+                    + signal
+                    + "in_x,"
+                    + signal
+                    + "out_x,"
+                    + signal
+                    + "oe_x;\n"
+                )
 
-    def create_pad_ring_bonding(self):
+        if len(self.signal_name_drive) > 1:
+            ###muxing
+            signals += (
+                "  logic "
+                + self.signal_name
+                + "in_x_muxed,"
+                + self.signal_name
+                + "out_x_muxed,"
+                + self.signal_name
+                + "oe_x_muxed;\n"
+            )
+        return signals
 
-        if self.is_muxed:
-            append_name = "_muxed"
-        else:
-            append_name = ""
+    @property
+    def core_v_mini_mcu_bonding(self):
+        bonding = ""
+        for signal, pad_type, driven_manually in zip(
+            self.signal_name_drive, self.pad_type_drive, self.driven_manually
+        ):
+            if driven_manually:
+                continue
+            if pad_type == "input" or pad_type == "bypass_input":
+                bonding += "    ." + signal + "i(" + signal + "in_x),\n"
+            if pad_type == "output" or pad_type == "bypass_output":
+                bonding += "    ." + signal + "o(" + signal + "out_x),\n"
+            if pad_type == "inout" or pad_type == "bypass_inout":
+                bonding += "    ." + signal + "i(" + signal + "in_x),\n"
+                bonding += "    ." + signal + "o(" + signal + "out_x),\n"
+                bonding += "    ." + signal + "oe_o(" + signal + "oe_x),\n"
+        return bonding
+
+    @property
+    def pad_ring_bonding_bonding(self):
+        if not self.has_pad_cell():
+            return ""
+
+        append_name = "_muxed" if self.is_muxed else ""
+        in_internal_signals = self.signal_name + "in_x" + append_name
+        out_internal_signals = self.signal_name + "out_x" + append_name
+        oe_internal_signals = self.signal_name + "oe_x" + append_name
 
         if self.pad_type == "input":
-            in_internal_signals = self.signal_name + "in_x" + append_name
-            self.pad_ring_bonding_bonding = (
-                "    ." + self.io_interface + "(" + self.signal_name + "i),\n"
-            )
-            self.pad_ring_bonding_bonding += (
-                "    ." + self.signal_name + "o(" + in_internal_signals + "),"
+            return (
+                "    ."
+                + self.io_interface
+                + "("
+                + self.signal_name
+                + "i),\n"
+                + "    ."
+                + self.signal_name
+                + "o("
+                + in_internal_signals
+                + "),"
             )
-            self.x_heep_system_interface += "    inout wire " + self.signal_name + "i,"
         if self.pad_type == "output":
-            out_internal_signals = self.signal_name + "out_x" + append_name
-            self.pad_ring_bonding_bonding = (
-                "    ." + self.io_interface + "(" + self.signal_name + "o),\n"
-            )
-            self.pad_ring_bonding_bonding += (
-                "    ." + self.signal_name + "i(" + out_internal_signals + "),"
-            )
-            self.x_heep_system_interface += "    inout wire " + self.signal_name + "o,"
-        if self.pad_type == "inout":
-            in_internal_signals = self.signal_name + "in_x" + append_name
-            out_internal_signals = self.signal_name + "out_x" + append_name
-            oe_internal_signals = self.signal_name + "oe_x" + append_name
-            self.pad_ring_bonding_bonding = (
-                "    ." + self.io_interface + "(" + self.signal_name + "io),\n"
-            )
-            self.pad_ring_bonding_bonding += (
-                "    ." + self.signal_name + "o(" + in_internal_signals + "),\n"
-            )
-            self.pad_ring_bonding_bonding += (
-                "    ." + self.signal_name + "i(" + out_internal_signals + "),\n"
-            )
-            self.pad_ring_bonding_bonding += (
-                "    ." + self.signal_name + "oe_i(" + oe_internal_signals + "),"
+            return (
+                "    ."
+                + self.io_interface
+                + "("
+                + self.signal_name
+                + "o),\n"
+                + "    ."
+                + self.signal_name
+                + "i("
+                + out_internal_signals
+                + "),"
             )
-            self.x_heep_system_interface += "    inout wire " + self.signal_name + "io,"
+        return (
+            "    ."
+            + self.io_interface
+            + "("
+            + self.signal_name
+            + "io),\n"
+            + "    ."
+            + self.signal_name
+            + "o("
+            + in_internal_signals
+            + "),\n"
+            + "    ."
+            + self.signal_name
+            + "i("
+            + out_internal_signals
+            + "),\n"
+            + "    ."
+            + self.signal_name
+            + "oe_i("
+            + oe_internal_signals
+            + "),"
+        )
+
+    @property
+    def x_heep_system_interface(self):
+        if not self.has_pad_cell():
+            return ""
+        suffix = {"input": "i,", "output": "o,", "inout": "io,"}[self.pad_type]
+        interface = "    inout wire " + self.signal_name + suffix
+        if self.comma_removed:
+            interface = interface.rstrip(interface[-1])
+        return interface
 
     def __init__(
         self,
@@ -410,15 +426,16 @@ class Pad:
         pad_layout_bondpad,
         pad_layout_offset,
         pad_layout_skip,
+        pad_keep_internal=False,
     ):
 
         self.name = name
         self.cell_name = cell_name
         self.index = index
-        self.localparam = "PAD_" + name.upper()
         self.pad_type = pad_type
         self.pad_mapping = pad_mapping
-        self.pad_mux_list = pad_mux_list
+        # Shared by all the pads of a group
+        self.pad_mux_list = tuple(pad_mux_list)
 
         if pad_active == "low":
             name_active = "n"
@@ -433,16 +450,10 @@ class Pad:
         )
         self.constant_attribute = constant_attribute
 
-        self.signal_name_drive = []
-        self.pad_type_drive = []
-        self.driven_manually = []
-        self.skip_declaration = []
-        self.keep_internal = []
-
-        self.is_muxed = False
-
         self.is_driven_manually = pad_driven_manually
         self.do_skip_declaration = pad_skip_declaration
+        self.keep_internal = pad_keep_internal
+        self.comma_removed = False
 
         self.layout_index = pad_layout_index
         self.layout_orient = pad_layout_orient
@@ -451,41 +462,34 @@ class Pad:
         self.layout_offset = pad_layout_offset
         self.layout_skip = pad_layout_skip
 
+        # Drive tables, one entry per signal driving the pad
         if len(pad_mux_list) == 0:
-            self.signal_name_drive.append(self.signal_name)
-            self.pad_type_drive.append(pad_type)
-            self.driven_manually.append(pad_driven_manually)
-            self.skip_declaration.append(pad_skip_declaration)
+            self.signal_name_drive = (self.signal_name,)
+            self.pad_type_drive = (pad_type,)
+            self.driven_manually = (pad_driven_manually,)
+            self.skip_declaration = (pad_skip_declaration,)
+            self.is_muxed = False
         else:
-            for pad_mux in pad_mux_list:
-                self.signal_name_drive.append(pad_mux.signal_name)
-                self.pad_type_drive.append(pad_mux.pad_type)
-                self.driven_manually.append(pad_mux.is_driven_manually)
-                self.skip_declaration.append(pad_mux.do_skip_declaration)
-
+            self.signal_name_drive = tuple(m.signal_name for m in pad_mux_list)
+            self.pad_type_drive = tuple(m.pad_type for m in pad_mux_list)
+            self.driven_manually = tuple(m.is_driven_manually for m in pad_mux_list)
+            self.skip_declaration = tuple(m.do_skip_declaration for m in pad_mux_list)
             self.is_muxed = True
 
-        self.in_internal_signals = []
-        self.out_internal_signals = []
-        self.oe_internal_signals = []
 
-        self.io_interface = self.signal_name + "io"
+class PadFragments:
+    """
+    SystemVerilog fragment of a list of pads (e.g. all their multiplexers), generated when a template renders it.
+    """
 
-        ### Pad Ring ###
-        self.pad_ring_io_interface = ""
-        self.pad_ring_ctrl_interface = ""
-        self.pad_ring_instance = ""
+    __slots__ = ("pads", "fragment")
 
-        ### core v mini mcu ###
-        self.core_v_mini_mcu_interface = ""
-        self.constant_driver_assign = ""
-        self.mux_process = ""
+    def __init__(self, pads, fragment):
+        self.pads = tuple(pads)
+        self.fragment = fragment
 
-        ### heep systems ###
-        self.internal_signals = ""
-        self.core_v_mini_mcu_bonding = ""
-        self.pad_ring_bonding_bonding = ""
-        self.x_heep_system_interface = ""
+    def __str__(self):
+        return "".join(getattr(pad, self.fragment) for pad in self.pads)
 
 
 # Compile a regex to trim trailing whitespaces on lines.
@@ -496,26 +500,392 @@ def string2int(hex_json_string):
     return (hex_json_string.split("x")[1]).split(",")[0]
 
 
-def write_template(tpl_path, outfile, **kwargs):
+# Compile a regex to find the files a mako template depends on (<%include>, <%inherit> and <%namespace> tags).
+re_mako_deps = re.compile(
+    r"<%(?:include|inherit|namespace)\b[^>]*?\bfile\s*=\s*[\"']([^\"'$]+)[\"']"
+)
+# Compile a regex to find the mako tags whose file is only known when rendering (e.g. file="${path}").
+re_mako_dynamic_deps = re.compile(
+    r"<%(?:include|inherit|namespace)\b[^>]*?\bfile\s*=\s*[\"'][^\"']*\$"
+)
+
+
+def template_output(tpl_path, outfile):
+    """
+    :return: the file generated from tpl_path, i.e. outfile or the template path without its `.tpl` suffix.
+    """
+    if outfile:
+        return pathlib.Path(outfile).absolute()
+    return pathlib.Path(tpl_path).absolute().with_suffix("")
+
+
+def write_if_changed(filename, content):
+    """
+    Writes content to filename, unless the file already holds exactly this content.
+    Leaving unchanged files untouched keeps their modification time, so that the tools
+    using them (FuseSoC, Verilator, ...) do not rebuild anything.
+
+    :return: `True` if the file was written, `False` otherwise.
+    """
+    try:
+        with open(filename, "r", newline="") as file:
+            if file.read() == content:
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+
+    with open(filename, "w", newline="") as file:
+        file.write(content)
+    return True
+
+
+# Shared lookup used to load the templates, set by configure_template_cache.
+# When None, each template is compiled from scratch.
+template_lookup = None
+
+
+def compiled_template_module(module_directory):
+    """
+    Returns a mako `modulename_callable` naming each compiled template module after the digest of
+    its template content, so that a compiled template is reused as long as the template does not change,
+    whatever its path or the configuration it is rendered with.
+    """
+
+    def modulename(filename, uri):
+        with open(filename, "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        return os.path.join(
+            module_directory, f"{pathlib.Path(filename).name}.{digest[:32]}.py"
+        )
+
+    return modulename
+
+
+def configure_template_cache(module_directory, clear=False):
+    """
+    Makes write_template load templates through a shared TemplateLookup that stores the compiled
+    templates in module_directory. The next runs import the compiled modules instead of lexing and
+    compiling the templates again.
+
+    :param module_directory: directory of the compiled templates, None to disable the cache
+    :param clear: if set, remove all the compiled templates before using the cache
+    """
+    global template_lookup
+    if module_directory is None:
+        template_lookup = None
+        return
+
+    module_directory = str(pathlib.Path(module_directory).absolute())
+    if clear and os.path.isdir(module_directory):
+        shutil.rmtree(module_directory)
+
+    # Templates are looked up by their absolute path, which also lets <%include> and
+    # friends resolve relative paths from the directory of the including template.
+    template_lookup = TemplateLookup(
+        directories=["/"],
+        module_directory=module_directory,
+        modulename_callable=compiled_template_module(module_directory),
+    )
+
+
+def load_template(tpl_path):
+    """
+    Loads a template, through the shared lookup if the compiled template cache is configured.
+
+    :raise FileNotFoundError: when the template does not exist.
+    """
     if tpl_path:
         tpl_path = pathlib.Path(tpl_path).absolute()
         if tpl_path.exists():
-            tpl = Template(filename=str(tpl_path))
-            if outfile:
-                filename = outfile
+            if template_lookup is not None:
+                return template_lookup.get_template(tpl_path.as_posix())
             else:
-                filename = tpl_path.with_suffix("")
-
-            with open(filename, "w") as file:
-                code = tpl.render_unicode(**kwargs)
-                code = re_trailws.sub("", code)
-                file.write(code)
+                return Template(filename=str(tpl_path))
         else:
             raise FileNotFoundError("Template file not found: {0}".format(tpl_path))
     else:
         raise FileNotFoundError("Template file not provided")
 
 
+# Compile a regex to find the arguments a compiled mako template reads from its context.
+re_context_get = re.compile(r"context\.get\(\s*[\"'](\w+)[\"']")
+# Compile a regex to find compiled templates that access their context as a whole.
+re_context_whole = re.compile(r"context\s*\[|context\.(?:keys|kwargs|_data)\b")
+
+
+def template_arguments(tpl):
+    """
+    :return: the names of the arguments read by a template, None if it may read any argument.
+    """
+    code = tpl.code
+    if re_context_whole.search(code):
+        return None
+    return set(re_context_get.findall(code))
+
+
+def write_template(tpl_path, outfile, **kwargs):
+    tpl = load_template(tpl_path)
+    filename = template_output(tpl_path, outfile)
+
+    code = tpl.render_unicode(**kwargs)
+    code = re_trailws.sub("", code)
+    write_if_changed(filename, code)
+
+
+def template_closure_arguments(tpl_path):
+    """
+    Included, inherited and imported templates read their arguments from the context of the
+    template using them, so the arguments of all of them are needed to render it.
+
+    :return: the names of the arguments read by a template and its dependencies (see template_dependencies),
+        None if one of them may read any argument or uses a file only known when rendering.
+    """
+    names = set()
+    for dep in template_dependencies(tpl_path):
+        with open(dep, "r") as file:
+            if re_mako_dynamic_deps.search(file.read()):
+                return None
+        dep_names = template_arguments(load_template(dep))
+        if dep_names is None:
+            return None
+        names |= dep_names
+    return names
+
+
+def write_template_from_snapshot(tpl_path, outfile, snapshot):
+    """
+    Renders a template with the arguments of a configuration snapshot.
+    Only the arguments read by the template and its dependencies are rebuilt from the snapshot.
+    """
+    kwargs = snapshot.materialize(template_closure_arguments(tpl_path))
+    write_template(tpl_path, outfile, **kwargs)
+
+
+def file_digest(path):
+    """
+    :return: the SHA-256 hex digest of the content of the file at path
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def template_dependencies(tpl_path):
+    """
+    Lists a template and all the templates it includes, inherits or imports as namespace, recursively.
+    Relative paths are resolved from the directory of the template using them.
+
+    :return: sorted list of absolute paths
+    :raise FileNotFoundError: when the template or one of its dependencies does not exist
+    """
+    tpl_path = pathlib.Path(tpl_path).absolute()
+    if not tpl_path.exists():
+        raise FileNotFoundError("Template file not found: {0}".format(tpl_path))
+
+    dependencies = set()
+    to_visit = [tpl_path]
+    while to_visit:
+        path = to_visit.pop()
+        if path in dependencies:
+            continue
+        if not path.exists():
+            raise FileNotFoundError(
+                "Template dependency not found: {0} (needed by {1})".format(
+                    path, tpl_path
+                )
+            )
+        dependencies.add(path)
+        with open(path, "r") as file:
+            for dep in re_mako_deps.findall(file.read()):
+                to_visit.append((path.parent / dep).resolve())
+    return sorted(dependencies)
+
+
+def generation_manifest_path(cached_path):
+    """
+    :return: path of the manifest recording which outputs were generated from which inputs, stored next to the cache
+    """
+    return pathlib.Path(cached_path).with_suffix(".deps.json")
+
+
+def load_generation_manifest(path):
+    try:
+        with open(path, "r") as file:
+            return json.load(file)["outputs"]
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def is_output_up_to_date(output, record, previous):
+    """
+    Checks whether an output was generated from the same inputs (configuration, template and its
+    dependencies) and was not changed since. The outputs are formatted afterwards (make verible),
+    so their recorded digest is the one stored by refresh_generation_manifest after formatting.
+    """
+    return (
+        previous is not None
+        and previous.get("config") == record["config"]
+        and previous.get("inputs") == record["inputs"]
+        and output.exists()
+        and previous.get("output") == file_digest(output)
+    )
+
+
+def refresh_generation_manifest(cached_path):
+    """
+    Records the current digest of every generated output, once they are formatted (make verible),
+    so that the next run only skips the outputs that were not changed since.
+    The outputs that do not exist anymore are removed from the manifest.
+
+    :param cached_path: path to the cached xheep file, next to which the manifest is stored
+    """
+    manifest_path = generation_manifest_path(cached_path)
+    outputs = load_generation_manifest(manifest_path)
+    if not outputs:
+        return
+
+    for output in list(outputs):
+        if pathlib.Path(output).exists():
+            outputs[output]["output"] = file_digest(output)
+        else:
+            del outputs[output]
+
+    with open(manifest_path, "w") as file:
+        json.dump({"outputs": outputs}, file, indent=2, sort_keys=True)
+
+
+def load_cached_config(cached_path):
+    """
+    Opens the configuration snapshot stored by a previous (non cached) mcu_gen run.
+    Its template arguments are only rebuilt when a template reads them.
+
+    :raise StaleSnapshotError: when the snapshot was written by another version of the generator.
+    """
+    return load_snapshot(cached_path)
+
+
+def read_template_manifest(manifest_path):
+    """
+    Reads a manifest of templates to render in a single mcu_gen run.
+
+    Each non empty line holds a template path, optionally followed by the output path.
+    When the output path is omitted, the template path without its `.tpl` suffix is used.
+    Lines starting with `#` are comments. Environment variables (e.g. `${LINK_FOLDER}`)
+    are expanded, so that the variables exported by the Makefile can be used.
+
+    :param manifest_path: path to the manifest file
+    :return: list of (template, outfile) tuples, outfile being None when not provided
+    :raise RuntimeError: when a line has more than two fields
+    """
+    jobs = []
+    with open(manifest_path, "r") as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            fields = os.path.expandvars(line).split()
+            if len(fields) > 2:
+                raise RuntimeError(
+                    f"{manifest_path}:{line_number}: expected '<template> [<outfile>]', got '{line}'"
+                )
+            jobs.append((fields[0], fields[1] if len(fields) == 2 else None))
+    return jobs
+
+
+# Configuration snapshot of a render worker, loaded once per process by init_render_worker
+_worker_snapshot = None
+
+
+def init_render_worker(cached_path, template_cache):
+    global _worker_snapshot
+    _worker_snapshot = load_cached_config(cached_path)
+    configure_template_cache(template_cache)
+
+
+def render_worker_job(job):
+    tpl_path, outfile = job
+    write_template_from_snapshot(tpl_path, outfile, _worker_snapshot)
+    return tpl_path
+
+
+def render_templates(
+    jobs,
+    cached_path,
+    snapshot=None,
+    num_workers=1,
+    force=False,
+    template_cache=None,
+    clear_template_cache=False,
+):
+    """
+    Renders a list of templates with the cached X-HEEP configuration.
+
+    Templates whose inputs (cached configuration, template and included templates) did not change
+    since the previous run, and whose output was not changed since it was generated, are skipped. Outputs are only written
+    when their content changes. What was generated from which inputs is recorded in a manifest
+    stored next to the cache (see generation_manifest_path).
+
+    The cache is loaded only once (once per worker when rendering in parallel), and only if there
+    is at least one template to render.
+
+    :param jobs: list of (template, outfile) tuples
+    :param cached_path: path to the cached xheep file
+    :param snapshot: already opened configuration snapshot, opened from cached_path if None
+    :param num_workers: number of processes used to render the templates
+    :param force: if set, render all the templates even if their inputs did not change
+    :param template_cache: directory where the compiled templates are kept across runs, None to disable it
+    :param clear_template_cache: if set, remove the compiled templates before rendering
+    """
+    configure_template_cache(template_cache, clear=clear_template_cache)
+
+    manifest_path = generation_manifest_path(cached_path)
+    outputs = load_generation_manifest(manifest_path)
+    config_digest = file_digest(cached_path)
+
+    pending = []
+    records = []
+    for tpl_path, outfile in jobs:
+        output = template_output(tpl_path, outfile)
+        record = {
+            "template": str(pathlib.Path(tpl_path).absolute()),
+            "config": config_digest,
+            "inputs": {
+                str(dep): file_digest(dep) for dep in template_dependencies(tpl_path)
+            },
+        }
+        if not force and is_output_up_to_date(output, record, outputs.get(str(output))):
+            logging.debug(f"Skipped {tpl_path}, output is up to date")
+            continue
+        pending.append((tpl_path, outfile))
+        records.append((output, record))
+
+    if num_workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=init_render_worker,
+            initargs=(cached_path, template_cache),
+        ) as executor:
+            for tpl_path in executor.map(render_worker_job, pending):
+                logging.debug(f"Rendered {tpl_path}")
+    elif pending:
+        if snapshot is None:
+            snapshot = load_cached_config(cached_path)
+        for tpl_path, outfile in pending:
+            write_template_from_snapshot(tpl_path, outfile, snapshot)
+            logging.debug(f"Rendered {tpl_path}")
+
+    # Until the outputs are formatted and refresh_generation_manifest is run, they are recorded as rendered
+    for output, record in records:
+        record["output"] = file_digest(output)
+        outputs[str(output)] = record
+
+    if records:
+        with open(manifest_path, "w") as file:
+            json.dump({"outputs": outputs}, file, indent=2, sort_keys=True)
+
+
 def prepare_pads_for_layout(total_pad_list, physical_attributes):
     """
     Separate pads into pad lists for the top, bottom, left, and right pads and order them according to their layout_index attribute, and set their positions on the floorplan.
@@ -775,17 +1145,20 @@ def generate_xheep(args):
     flash_mem_start_address = string2int(config["flash_mem"]["address"])
     flash_mem_size_address = string2int(config["flash_mem"]["length"])
 
+    # Bus windows not modelled by XHeep, checked against the rest of the address map by validate()
+    xheep.add_address_window(
+        "debug", int(debug_start_address, 16), int(debug_size_address, 16)
+    )
+    xheep.add_address_window(
+        "ext_slave", int(ext_slave_start_address, 16), int(ext_slave_size_address, 16)
+    )
+    xheep.add_address_window(
+        "flash_mem", int(flash_mem_start_address, 16), int(flash_mem_size_address, 16)
+    )
+
     stack_size = string2int(config["linker_script"]["stack_size"])
     heap_size = string2int(config["linker_script"]["heap_size"])
 
-    if (
-        int(stack_size, 16) + int(heap_size, 16)
-    ) > xheep.memory_ss().ram_size_address():
-        exit(
-            "The stack and heap section must fit in the RAM size, instead they takes "
-            + str(stack_size + heap_size)
-        )
-
     plic_used_n_interrupts = len(config["interrupts"]["list"])
     plit_n_interrupts = config["interrupts"]["number"]
     ext_int_list = {
@@ -815,9 +1188,6 @@ def generate_xheep(args):
     external_pad_list = []
     external_pad_index_counter = 0
 
-    pad_constant_driver_assign = ""
-    pad_mux_process = ""
-
     pad_muxed_list = []
 
     for key in pads:
@@ -977,20 +1347,10 @@ def generate_xheep(args):
                     pad_layout_bondpad,
                     pad_layout_offset,
                     pad_layout_skip,
+                    pad_keep_internal,
                 )
-                if not pad_keep_internal:
-                    pad_obj.create_pad_ring()
-                pad_obj.create_core_v_mini_mcu_ctrl()
-                if not pad_keep_internal:
-                    pad_obj.create_pad_ring_bonding()
-                pad_obj.create_internal_signals()
-                pad_obj.create_constant_driver_assign()
-                pad_obj.create_multiplexers()
-                pad_obj.create_core_v_mini_mcu_bonding()
                 pad_index_counter = pad_index_counter + 1
                 pad_list.append(pad_obj)
-                pad_constant_driver_assign += pad_obj.constant_driver_assign
-                pad_mux_process += pad_obj.mux_process
                 if pad_obj.is_muxed:
                     pad_muxed_list.append(pad_obj)
 
@@ -1015,20 +1375,10 @@ def generate_xheep(args):
                 pad_layout_bondpad,
                 pad_layout_offset,
                 pad_layout_skip,
+                pad_keep_internal,
             )
-            if not pad_keep_internal:
-                pad_obj.create_pad_ring()
-            pad_obj.create_core_v_mini_mcu_ctrl()
-            if not pad_keep_internal:
-                pad_obj.create_pad_ring_bonding()
-            pad_obj.create_internal_signals()
-            pad_obj.create_constant_driver_assign()
-            pad_obj.create_multiplexers()
-            pad_obj.create_core_v_mini_mcu_bonding()
             pad_index_counter = pad_index_counter + 1
             pad_list.append(pad_obj)
-            pad_constant_driver_assign += pad_obj.constant_driver_assign
-            pad_mux_process += pad_obj.mux_process
             if pad_obj.is_muxed:
                 pad_muxed_list.append(pad_obj)
 
@@ -1176,16 +1526,9 @@ def generate_xheep(args):
                         pad_layout_offset,
                         pad_layout_skip,
                     )
-                    pad_obj.create_pad_ring()
-                    pad_obj.create_pad_ring_bonding()
-                    pad_obj.create_internal_signals()
-                    pad_obj.create_constant_driver_assign()
-                    pad_obj.create_multiplexers()
                     external_pad_index_counter = external_pad_index_counter + 1
                     external_pad_index = external_pad_index + 1
                     external_pad_list.append(pad_obj)
-                    pad_constant_driver_assign += pad_obj.constant_driver_assign
-                    pad_mux_process += pad_obj.mux_process
                     if pad_obj.is_muxed:
                         pad_muxed_list.append(pad_obj)
 
@@ -1211,16 +1554,9 @@ def generate_xheep(args):
                     pad_layout_offset,
                     pad_layout_skip,
                 )
-                pad_obj.create_pad_ring()
-                pad_obj.create_pad_ring_bonding()
-                pad_obj.create_internal_signals()
-                pad_obj.create_constant_driver_assign()
-                pad_obj.create_multiplexers()
                 external_pad_index_counter = external_pad_index_counter + 1
                 external_pad_index = external_pad_index + 1
                 external_pad_list.append(pad_obj)
-                pad_constant_driver_assign += pad_obj.constant_driver_assign
-                pad_mux_process += pad_obj.mux_process
                 if pad_obj.is_muxed:
                     pad_muxed_list.append(pad_obj)
 
@@ -1228,6 +1564,10 @@ def generate_xheep(args):
 
     total_pad_list = pad_list + external_pad_list
 
+    # Generated when the templates render them
+    pad_constant_driver_assign = PadFragments(total_pad_list, "constant_driver_assign")
+    pad_mux_process = PadFragments(total_pad_list, "mux_process")
+
     max_total_pad_mux_bitlengh = -1
     for pad in pad_muxed_list:
         if (len(pad.pad_mux_list) - 1).bit_length() > max_total_pad_mux_bitlengh:
@@ -1266,6 +1606,15 @@ def generate_xheep(args):
     if not xheep.validate():
         raise RuntimeError("There are errors when configuring X-HEEP")
 
+    # Checked once the system is built, as the RAM bank overrides are only applied by build()
+    if (
+        int(stack_size, 16) + int(heap_size, 16)
+    ) > xheep.memory_ss().ram_size_address():
+        exit(
+            "The stack and heap section must fit in the RAM size, instead they takes "
+            + str(int(stack_size, 16) + int(heap_size, 16))
+        )
+
     kwargs = {
         "xheep": xheep,
         "external_domains": external_domains,
@@ -1326,10 +1675,6 @@ def main():
                 f"Cached file {args.cached_path} does not exist. Cannot use --cached flag."
             )
 
-        # X-Heep object has been generated
-        with open(args.cached_path, "rb") as f:
-            kwargs = pickle.load(f)
-
         parser.add_argument(
             "--outfile",
             "-o",
@@ -1338,19 +1683,97 @@ def main():
             help="Target filename. If not provided, the template filename will be used as the output filename.",
         )
 
-        parser.add_argument(
+        targets = parser.add_mutually_exclusive_group(required=True)
+
+        targets.add_argument(
             "--outtpl",
             "-ot",
             type=pathlib.Path,
-            required=True,
             help="Target template filename",
         )
 
+        targets.add_argument(
+            "--manifest",
+            "-m",
+            type=pathlib.Path,
+            help="File listing the templates to render in a single run, one '<template> [<outfile>]' per line",
+        )
+
+        targets.add_argument(
+            "--refresh_manifest",
+            help="Record the digest of the generated outputs after they were formatted, without rendering anything",
+            action="store_true",
+        )
+
+        parser.add_argument(
+            "--jobs",
+            "-j",
+            type=int,
+            default=1,
+            help="Number of processes used to render the templates of the manifest (default: 1)",
+        )
+
+        parser.add_argument(
+            "--template_cache",
+            "-tc",
+            type=pathlib.Path,
+            required=False,
+            help="Directory of the compiled templates kept across runs (default: mako_modules next to the cached xheep file)",
+        )
+
+        parser.add_argument(
+            "--clear_template_cache",
+            help="Remove the compiled templates before rendering",
+            action="store_true",
+        )
+
+        parser.add_argument(
+            "--force",
+            "-f",
+            help="Render all the templates, even those whose inputs did not change since the previous run",
+            action="store_true",
+        )
+
+        parser.add_argument(
+            "-v", "--verbose", help="increase output verbosity", action="store_true"
+        )
+
         args = parser.parse_args()
-        outtpl = args.outtpl
-        outfile = args.outfile
 
-        write_template(outtpl, outfile, **kwargs)
+        if args.verbose:
+            logging.basicConfig(level=logging.DEBUG)
+
+        if args.refresh_manifest:
+            refresh_generation_manifest(args.cached_path)
+            return
+
+        if args.manifest is not None:
+            if args.outfile is not None:
+                parser.error("--outfile cannot be used with --manifest")
+            jobs = read_template_manifest(args.manifest)
+        else:
+            jobs = [(args.outtpl, args.outfile)]
+
+        if args.template_cache is not None:
+            template_cache = args.template_cache
+        else:
+            template_cache = pathlib.Path(args.cached_path).parent / "mako_modules"
+
+        # Reject stale caches before rendering anything
+        try:
+            snapshot = load_cached_config(args.cached_path)
+        except StaleSnapshotError as e:
+            parser.error(str(e))
+
+        render_templates(
+            jobs,
+            args.cached_path,
+            snapshot=snapshot,
+            num_workers=args.jobs,
+            force=args.force,
+            template_cache=template_cache,
+            clear_template_cache=args.clear_template_cache,
+        )
 
     else:
         # X-Heep object must be generated
@@ -1423,6 +1846,20 @@ def main():
             help="Number of external domains",
         )
 
+        parser.add_argument(
+            "--address_map_json",
+            type=pathlib.Path,
+            required=False,
+            help="Writes the address map of the system to this JSON file",
+        )
+
+        parser.add_argument(
+            "--address_map_svd",
+            type=pathlib.Path,
+            required=False,
+            help="Writes the address map of the system to this CMSIS-SVD file, for debuggers",
+        )
+
         parser.add_argument(
             "-v", "--verbose", help="increase output verbosity", action="store_true"
         )
@@ -1432,8 +1869,15 @@ def main():
 
         # Create directory structure if it doesn't exist
         os.makedirs(os.path.dirname(cached_path), exist_ok=True)
-        with open(cached_path, "wb") as f:
-            pickle.dump(kwargs, f)
+        save_snapshot(kwargs, cached_path)
+
+        address_map = kwargs["xheep"].address_map()
+        if args.address_map_json is not None:
+            args.address_map_json.parent.mkdir(parents=True, exist_ok=True)
+            address_map.write_json(args.address_map_json)
+        if args.address_map_svd is not None:
+            args.address_map_svd.parent.mkdir(parents=True, exist_ok=True)
+            address_map.write_svd(args.address_map_svd)
 
 
 if __name__ == "__main__":
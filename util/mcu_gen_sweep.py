@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+# Copyright EPFL contributors.
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+# Generates many X-HEEP configurations in parallel, e.g. for design-space exploration.
+# Each point of the parameter grid is built and validated with mcu_gen.generate_xheep,
+# then the mcu_gen templates are rendered into its own output tree.
+
+import argparse
+import collections
+import contextlib
+import io
+import itertools
+import json
+import os
+import pathlib
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import hjson
+import mcu_gen
+from x_heep_gen.snapshot import save_snapshot
+
+
+# Parameters that can be swept, in the order used to name the variants.
+# They are the mcu_gen arguments of the same name.
+SWEEP_PARAMETERS = [
+    "config",
+    "python_config",
+    "pads_cfg",
+    "cpu",
+    "bus",
+    "memorybanks",
+    "memorybanks_il",
+    "external_domains",
+]
+
+# Values used for the parameters that are not swept, same defaults as the Makefile
+DEFAULT_PARAMETERS = {
+    "config": "configs/general.hjson",
+    "python_config": "",
+    "pads_cfg": "configs/pad_cfg.hjson",
+    "cpu": "",
+    "bus": "",
+    "memorybanks": "",
+    "memorybanks_il": "",
+    "external_domains": "",
+}
+
+
+def expand_grid(grid):
+    """
+    Expands a parameter grid into the list of its points.
+
+    :param dict grid: values of each swept parameter, indexed by parameter name. A single value is a one value list.
+    :return: list of dictionaries holding a value for every parameter in SWEEP_PARAMETERS
+    :raise ValueError: when a parameter cannot be swept.
+    """
+    for name in grid:
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(
+                f"{name} cannot be swept, the parameters are {', '.join(SWEEP_PARAMETERS)}"
+            )
+
+    names = [name for name in SWEEP_PARAMETERS if name in grid]
+    values = [
+        grid[name] if isinstance(grid[name], list) else [grid[name]] for name in names
+    ]
+
+    points = []
+    for combination in itertools.product(*values):
+        point = dict(DEFAULT_PARAMETERS)
+        point.update(zip(names, (str(v) for v in combination)))
+        points.append(point)
+    return points
+
+
+def variant_name(point, grid):
+    """
+    :return: a name identifying a grid point by the values of the parameters that have several values.
+    """
+    fields = []
+    for name in SWEEP_PARAMETERS:
+        if isinstance(grid.get(name), list) and len(grid[name]) > 1:
+            value = point[name]
+            if name in ("config", "python_config", "pads_cfg"):
+                value = pathlib.Path(value).name.split(".")[0] if value else "none"
+            fields.append(f"{name}-{value}")
+    return "_".join(fields) if fields else "default"
+
+
+def unique_variant_names(names):
+    """
+    Makes the names of the variants unique, as variants with the same name would be generated in the
+    same output tree (e.g. a/general.hjson and b/general.hjson both give config-general).
+    Every variant sharing its name with another one gets its index in the grid as suffix.
+
+    :return: list of unique names, in the same order
+    """
+    counts = collections.Counter(names)
+    unique = [
+        f"{name}-{idx}" if counts[name] > 1 else name for idx, name in enumerate(names)
+    ]
+    if len(set(unique)) != len(unique):
+        raise ValueError(f"Cannot give a unique name to the variants: {unique}")
+    return unique
+
+
+def variant_output(tpl_path, outfile, variant_dir):
+    """
+    :return: path of a template output in the output tree of a variant, keeping its path relative to the repository.
+    """
+    output = mcu_gen.template_output(tpl_path, outfile)
+    try:
+        relative = output.relative_to(pathlib.Path.cwd())
+    except ValueError:
+        relative = output.relative_to(output.anchor)
+    return pathlib.Path(variant_dir) / relative
+
+
+def generate_variant(name, point, templates, outdir, template_cache):
+    """
+    Builds, validates and renders one variant. Never raises, failures are reported in the result.
+
+    :return: result record with the variant name, its parameters, its status, the failing stage,
+        the error message, the build and render times in seconds, and the generator output.
+    """
+    result = {
+        "name": name,
+        "parameters": point,
+        "success": False,
+        "stage": "build",
+        "error": None,
+        "build_time_s": None,
+        "render_time_s": None,
+        "log": "",
+    }
+    variant_dir = pathlib.Path(outdir) / name
+    log = io.StringIO()
+
+    try:
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            start = time.perf_counter()
+            args = argparse.Namespace(verbose=False, **point)
+            kwargs = mcu_gen.generate_xheep(args)
+            result["build_time_s"] = time.perf_counter() - start
+
+            result["stage"] = "render"
+            start = time.perf_counter()
+            variant_dir.mkdir(parents=True, exist_ok=True)
+            cached_path = variant_dir / "xheep_config_cache.json"
+            save_snapshot(kwargs, cached_path)
+            jobs = []
+            for tpl_path, outfile in templates:
+                output = variant_output(tpl_path, outfile, variant_dir)
+                output.parent.mkdir(parents=True, exist_ok=True)
+                jobs.append((tpl_path, output))
+            mcu_gen.render_templates(jobs, cached_path, template_cache=template_cache)
+            result["render_time_s"] = time.perf_counter() - start
+
+        result["success"] = True
+        result["stage"] = None
+    except SystemExit as e:
+        # generate_xheep exits on some invalid configurations
+        result["error"] = str(e.code)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        log.write(traceback.format_exc())
+
+    result["log"] = log.getvalue()
+    return result
+
+
+def sweep(grid, outdir, templates, num_workers=1, template_cache=None):
+    """
+    Generates every point of a parameter grid, each in its own output tree `outdir/<variant name>`.
+    A failing variant does not stop the sweep.
+
+    :param dict grid: values of each swept parameter (see expand_grid)
+    :param outdir: directory holding the output trees of the variants
+    :param templates: list of (template, outfile) tuples to render for each variant (see mcu_gen.read_template_manifest)
+    :param num_workers: number of processes generating variants in parallel
+    :param template_cache: directory where the compiled templates are kept, shared by all the variants
+    :return: list of result records (see generate_variant), in grid order
+    """
+    points = expand_grid(grid)
+    names = unique_variant_names([variant_name(point, grid) for point in points])
+    tasks = list(zip(names, points))
+
+    results = {}
+    if num_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                executor.submit(
+                    generate_variant, name, point, templates, outdir, template_cache
+                ): idx
+                for idx, (name, point) in enumerate(tasks)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                print_progress(results[futures[future]], len(results), len(tasks))
+    else:
+        for idx, (name, point) in enumerate(tasks):
+            results[idx] = generate_variant(
+                name, point, templates, outdir, template_cache
+            )
+            print_progress(results[idx], len(results), len(tasks))
+
+    return [results[idx] for idx in range(len(tasks))]
+
+
+def print_progress(result, done, total):
+    if result["success"]:
+        print(
+            f"[{done}/{total}] {result['name']}: OK (build {result['build_time_s']:.2f} s, render {result['render_time_s']:.2f} s)"
+        )
+    else:
+        print(
+            f"[{done}/{total}] {result['name']}: FAILED during {result['stage']}: {result['error']}"
+        )
+
+
+def print_report(results):
+    failed = [r for r in results if not r["success"]]
+    print(f"\n{len(results) - len(failed)} of {len(results)} variants generated")
+    for result in failed:
+        print(f"\n{result['name']} failed during {result['stage']}: {result['error']}")
+        if result["log"]:
+            print(result["log"].rstrip())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="mcugen-sweep",
+        description="Generates all the combinations of the given X-HEEP parameters. "
+        "Several values of a parameter are separated by commas.",
+    )
+
+    parser.add_argument(
+        "--grid",
+        metavar="file",
+        type=str,
+        required=False,
+        help="HJSON file with the values of each parameter, e.g. { cpu: ['cv32e20', 'cv32e40p'], memorybanks: [2, 4] }. Command line parameters override it.",
+    )
+
+    for name in SWEEP_PARAMETERS:
+        parser.add_argument(
+            f"--{name}",
+            type=str,
+            required=False,
+            help=f"Values of the mcu_gen --{name} argument",
+        )
+
+    parser.add_argument(
+        "--outdir",
+        "-o",
+        type=pathlib.Path,
+        default=pathlib.Path("build/sweep"),
+        help="Directory of the output trees, one per variant (default: build/sweep)",
+    )
+
+    parser.add_argument(
+        "--manifest",
+        "-m",
+        type=pathlib.Path,
+        default=pathlib.Path("util/mcu_gen_templates.txt"),
+        help="Templates rendered for each variant (default: util/mcu_gen_templates.txt)",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of variants generated in parallel (default: number of CPUs)",
+    )
+
+    args = parser.parse_args()
+
+    grid = {}
+    if args.grid:
+        with open(args.grid, "r") as file:
+            grid = dict(hjson.load(file))
+    for name in SWEEP_PARAMETERS:
+        value = getattr(args, name)
+        if value is not None:
+            grid[name] = value.split(",")
+
+    # Same default as the Makefile, used by the linker script templates of the manifest
+    os.environ.setdefault("LINK_FOLDER", str(pathlib.Path("sw/linker").absolute()))
+    templates = mcu_gen.read_template_manifest(args.manifest)
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    results = sweep(
+        grid,
+        args.outdir,
+        templates,
+        num_workers=args.jobs,
+        template_cache=args.outdir / "mako_modules",
+    )
+
+    with open(args.outdir / "sweep_report.json", "w") as file:
+        json.dump(results, file, indent=2)
+
+    print_report(results)
+    print(f"Report written to {args.outdir / 'sweep_report.json'}")
+
+    if not all(r["success"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,7 @@
 /****************************************************************************/
 
 #include <inttypes.h>
+#include <stddef.h>
 #include "core_v_mini_mcu.h"
 
 /****************************************************************************/
@@ -55,6 +56,10 @@ ${enums_definitions}
 
 ${structures_definitions}
 
+/* Offset of every register in the struct, checked against the register map */
+#ifndef __cplusplus
+${static_asserts}#endif  /* __cplusplus */
+
 /****************************************************************************/
 /**                                                                        **/
 /**                          EXPORTED VARIABLES                            **/
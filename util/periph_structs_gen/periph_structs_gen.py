@@ -1,73 +1,75 @@
-import hjson
-from math import ceil
-import string
 import argparse
+import os
+import string
 import sys
 from datetime import date
 
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "../../hw/vendor/pulp_platform_register_interface/vendor/lowrisc_opentitan/util",
+    ),
+)
+
+from reggen.ip_block import IpBlock
+from reggen.multi_register import MultiRegister
+from reggen.window import Window
+
 ############################################################
 #  This module generates the structures for the registers  #
 #  of a peripheral and writes them into a file formatted   #
 #  using a template.                                       #
 ############################################################
 
-# Bit length of each register
-reg_length = 32
-
-# Entry name for the reserved bits
+# Entry name for the reserved addresses
 reserved_name = "_reserved"
 
 # Tab definition as 4 blank spaces #
 tab_spaces = "  "
 
-# ENUM definitions #
-enum_start = "typedef enum {}_enum {{\n"
-enum_end = "}} {}_t;\n\n"
-
-# UNION definitions #
-union_start = tab_spaces + "union\n" + tab_spaces + "{\n"
-union_end = tab_spaces + "}} {};\n\n"
-
-# STRUCT definitions #
-struct_typedef_start = (
-    (2 * tab_spaces) + "struct \n" + (2 * tab_spaces) + "{{\n"
-)  # used to define a new struct and format the name
-struct_entry = (3 * tab_spaces) + "{}" + "{}" + ":{}"  # type, name and amount of bits
-struct_typedef_end = (
-    2 * tab_spaces
-) + "} b ;"  # define the end of the new struct definition and the format for the new type-name
-
 # Documentation comments definitions #
 comment_align_space = 50
 line_comment_start = "/*!< "
 line_comment_end = "*/"
-struct_comment = "Structure used for bit access"
-word_comment = "Type used for word access"
-
 
-def read_hjson(hjson_file):
-    """
-    Opens the hjson file taken as input and returns its content
-    """
-    # Open the hjson file #
-    f = open(hjson_file)
-    j_data = hjson.load(f)
-    f.close()
-    return j_data
+# Peripherals made of several channels with the same registers, and the define
+# giving the size in Bytes of a channel
+multichannel_peripherals = {
+    "dma": "DMA_CH_SIZE",
+}
 
 
-def write_template(tpl, structs, enums, struct_name):
-    """
-    Opens a given template and substitutes the structs and enums fields.
-    Returns a string with the content of the updated template
+def start_address_define(struct_name):
     """
+    Returns the define giving access to the registers of a peripheral through its struct.
+    The define of a multi-channel peripheral takes the channel as argument.
 
+    :param struct_name: name of the peripheral
+    :return: the string of the define, without the #define keyword
+    """
     lower_case_name = struct_name.lower()
     upper_case_name = struct_name.upper()
-    start_addr_def = "{}_peri ((volatile {} *) {}_START_ADDRESS)".format(
+
+    if lower_case_name in multichannel_peripherals:
+        return "{}_peri(channel) ((volatile {} *) ({}_START_ADDRESS + {} * channel))".format(
+            lower_case_name,
+            struct_name,
+            upper_case_name,
+            multichannel_peripherals[lower_case_name],
+        )
+
+    return "{}_peri ((volatile {} *) {}_START_ADDRESS)".format(
         lower_case_name, struct_name, upper_case_name
     )
 
+
+def write_template(tpl, structs, enums, static_asserts, struct_name):
+    """
+    Opens a given template and substitutes the structs, enums and static asserts fields.
+    Returns a string with the content of the updated template
+    """
+
     today = date.today()
     today = today.strftime("%d/%m/%Y")
 
@@ -78,10 +80,11 @@ def write_template(tpl, structs, enums, struct_name):
     return template.substitute(
         structures_definitions=structs,
         enums_definitions=enums,
+        static_asserts=static_asserts,
         peripheral_name=struct_name,
-        peripheral_name_upper=upper_case_name,
+        peripheral_name_upper=struct_name.upper(),
         date=today,
-        start_address_define=start_addr_def,
+        start_address_define=start_address_define(struct_name),
     )
 
 
@@ -94,327 +97,126 @@ def write_output(out_file, out_string):
         f.write(out_string)
 
 
-def generate_enum(enum_field, name):
-    """
-    Generates an enum with the values specified.
-    The enum is generated basing on the 'enum_field' parameter that contains all the values and names
-    :param enum_field: list containing, for each entry, the value, the name and the description for each enum field
-    :param name: name of the register field associated to the enum
-    :return: the string containing the formatted enum
-    """
-    enum = enum_start.format(name)
-
-    for key in enum_field:
-        enum += (
-            tab_spaces
-            + format(key["name"], "<15")
-            + "="
-            + tab_spaces
-            + str(key["value"])
-        )
-        enum += ","
-        if "desc" in key:
-            enum += (
-                format("", "<25")
-                + line_comment_start
-                + format(key["desc"].replace("\n", " "), "<100")
-                + line_comment_end
-            )
-
-        enum += "\n"
-
-    enum += enum_end.format(name)
-
-    return enum
-
-
-def count_bits(bits_range):
+def struct_member(declaration, desc):
     """
-    Used to determine if the "bits_range" input string contains only a single bit index or a range of bits.
-    In the latter case the range is supposed to be identified with the following format "end_bit:start_bit".
-    Ex: "7:0" will correspond to 8 bits from 0 to 7.
-    It returns the amount of bits specified in the range
+    Formats a member of the registers struct with its description as comment.
 
-    :param bits_range: string containing the nuber of bit (or range or bits) of a specific field
-    :return: the amount of bits
+    :param declaration: the C declaration of the member, without the semicolon
+    :param desc: the description of the member
+    :return: the indented member
     """
-    if bits_range.find(":") != -1:
-        start_bit = bits_range.split(":")[1]
-        end_bit = bits_range.split(":")[0]
-        return int(end_bit) - int(start_bit) + 1
-    else:
-        return 1
-
-
-def select_type(amount_of_bits):
-    """
-    Used to select the C type to give to a specific bit field. The type depends on the amount of bits
-    that the filed has.
-
-    :param amount_of_bits: amount of bits of the field to which to assign a type
-    :return: the string containing the type selected
-    """
-    if 1 <= amount_of_bits < 9:
-        return "uint8_t"
-    elif 9 <= amount_of_bits < 17:
-        return "uint16_t"
-    elif 17 <= amount_of_bits < 33:
-        return "uint32_t"
-    elif 33 <= amount_of_bits < 65:
-        return "uint64_t"
-
-
-def intr_regs_auto_gen():
-    """
-    Generate hardcoded registers for interrupts
-
-    :return: string with the register varibles to be added to the struct
-    """
-    res = ""
-    line = tab_spaces + "uint32_t {};".format("INTR_STATE")
-    reg_comment = (
-        line_comment_start + "Interrupt State Register" + line_comment_end + "\n\n"
-    )
-    res += line.ljust(comment_align_space) + reg_comment
-
-    line = tab_spaces + "uint32_t {};".format("INTR_ENABLE")
+    line = tab_spaces + declaration + ";"
     reg_comment = (
-        line_comment_start + "Interrupt Enable Register" + line_comment_end + "\n\n"
+        line_comment_start + desc.replace("\n", " ") + line_comment_end + "\n\n"
     )
-    res += line.ljust(comment_align_space) + reg_comment
-
-    line = tab_spaces + "uint32_t {};".format("INTR_TEST")
-    reg_comment = (
-        line_comment_start + "Interrupt Test Register" + line_comment_end + "\n\n"
-    )
-    res += line.ljust(comment_align_space) + reg_comment
-
-    return res
-
-
-def alert_regs_auto_gen():
-    """
-    Generate hardcoded registers for alerts
-
-    :return: string with the register varibles to be added to the struct
-    """
-    res = ""
-
-    line = tab_spaces + "uint32_t {};".format("ALERT_TEST")
-    reg_comment = line_comment_start + "Alert Test Register" + line_comment_end + "\n\n"
-    res += line.ljust(comment_align_space) + reg_comment
+    return line.ljust(comment_align_space) + reg_comment
 
-    return res
 
-
-def add_fields(register_hjson):
+def register_members(block):
     """
-    Loops through the fields of the hjson of a register, passed as parameter.
-    Returns the structs and enums entries relative to the register, already
-    indented.
+    Lists the members of the registers struct of a peripheral, following the
+    address map of its register block. The interrupt and alert registers
+    automatically added by reggen are included, and the gaps between the
+    registers (e.g. left by a "skipto") are filled with reserved words.
 
-    :param register_hjson: the hjson-like description of a register
-    :return: the strings of the the struct fields, the enum (if present)
+    :param block: the reggen IpBlock of the peripheral
+    :return: list of (declaration, name, offset, description) tuples, name being
+        None for the reserved words
     """
-
-    struct_fields = ""
-    enum = ""
-    bits_counter = 0  # to count the bits used for all the fields of the register
-
-    # loops through the fields of the register
-    for field in register_hjson["fields"]:
-        field_bits = count_bits(field["bits"])
-        field_type = select_type(field_bits)
-
-        # Check if there is an ENUM, if yes it generates it and set the type of the associated field
-        if "enum" in field:
-            field_type = "{}_t".format(field["name"])
-            enum += generate_enum(field["enum"], field["name"])
-
-        bits_counter += int(field_bits)
-
-        # Handles the case in which the field has no name (it's given the same name as the register)
-        if "name" in field:
-            field_name = field["name"]
-        else:
-            field_name = register_hjson["name"]
-
-        # insert a new struct in the structs string
-        struct_fields += struct_entry.format(
-            format(field_type, "<15"),
-            format(field_name, "<20"),
-            format(str(field_bits) + ";", "<5"),
-        )
-
-        # if there is a description, it adds a comment
-        if "desc" in field:
-            struct_fields += (
-                line_comment_start
-                + format("bit: {}".format(field["bits"]), "<10")
-                + format(field["desc"].replace("\n", " "), "<100")
-                + line_comment_end
-            )
-        struct_fields += "\n"
-
-    # add an entry for the reserved bits (if present)
-    if bits_counter < reg_length:
-        reserved_bits = reg_length - bits_counter
-        reserved_type = select_type(reserved_bits)
-        struct_fields += struct_entry.format(
-            format(reserved_type, "<15"),
-            format(reserved_name, "<20"),
-            format(str(reserved_bits) + ";", "<5"),
-        )
-        struct_fields += "\n"
-
-    return struct_fields, enum
-
-
-def add_registers(peripheral_hjson):
-    """
-    Reads the hjson description of a peripheral and generates structures for every
-    register.
-
-    :param peripheral_hjson: the hjson-like description of the registers of a peripheral
-    :return: the strings containing the indented structs and enums relative to the registers
-    """
-
-    reg_struct = "\n"
-    reg_enum = ""
+    reg_bytes = block.regwidth // 8
+    members = []
 
     # number of "reserved" fields. Used to name them with a progressive ID
     num_of_reserved = 0
 
-    # Keeps track of the offset in Bytes from the base address of the peripheral.
-    # It is usefult to compute how many Bytes to reserve in case a "skipto"
-    # keywork is encountered
+    # Keeps track of the offset in Bytes from the base address of the peripheral
     bytes_offset = 0
 
-    # To handle INTR specific registers #
-    if "interrupt_list" in peripheral_hjson:
-        if "no_auto_intr_regs" not in peripheral_hjson:
-            reg_struct += intr_regs_auto_gen()
-
-    # To handle the ALERT registers #
-    if "alert_list" in peripheral_hjson:
-        if "no_auto_alert_regs" not in peripheral_hjson:
-            reg_struct += alert_regs_auto_gen()
-
-    # loops through the registers of the hjson
-    for elem in peripheral_hjson["registers"]:
-
-        # check and handle the multireg case
-        if "multireg" in elem:
-            multireg = elem["multireg"]
-            count_var = multireg["count"]
-
-            # search the multireg count default value
-            # This is the number of bitfields needed
-            for p in peripheral_hjson["param_list"]:
-                if count_var == p["name"]:
-                    count = int(p["default"])
-
-            # counts the bits needed by the multireg register
-            n_bits = 0
-            for f in multireg["fields"]:
-                n_bits += count_bits(f["bits"])
-
-            # computes the number of registers needed to pack all the bit fields needed
-            n_multireg = ceil((count * n_bits) / int(peripheral_hjson["regwidth"]))
-
-            # generate the multiregisters
-            for r in range(n_multireg):
-                reg_name = multireg["name"] + str(r)
-                line = tab_spaces + "uint32_t {};".format(reg_name)
-                reg_comment = (
-                    line_comment_start
-                    + multireg["desc"].replace("\n", " ")
-                    + line_comment_end
-                    + "\n\n"
+    for entry in block.reg_blocks[None].entries:
+        if entry.offset > bytes_offset:
+            words = (entry.offset - bytes_offset) // reg_bytes
+            members.append(
+                (
+                    "uint32_t {}_{}[{}]".format(reserved_name, num_of_reserved, words),
+                    None,
+                    bytes_offset,
+                    "reserved addresses",
                 )
-                reg_struct += line.ljust(comment_align_space) + reg_comment
-                bytes_offset += 4  # one register is 4 bytes
-
-        # check and handle the "window" case
-        elif "window" in elem:
-
-            window = elem["window"]
-
-            validbits = int(window["validbits"])
-
-            line = tab_spaces + "{} {};".format(select_type(validbits), window["name"])
-            reg_comment = (
-                line_comment_start
-                + window["desc"].replace("\n", " ")
-                + line_comment_end
-                + "\n\n"
             )
-            reg_struct += line.ljust(comment_align_space) + reg_comment
+            bytes_offset += words * reg_bytes
+            num_of_reserved += 1
 
-        # if no multireg or window, just generate the reg
-        elif "name" in elem:
+        # A window is an array of registers, a plain register if it has a single item
+        if isinstance(entry, Window):
+            if entry.items == 1:
+                declaration = "uint32_t {}".format(entry.name)
+            else:
+                declaration = "uint32_t {}[{}]".format(entry.name, entry.items)
+            members.append((declaration, entry.name, entry.offset, entry.desc))
+            bytes_offset = entry.offset + entry.items * reg_bytes
+
+        # A multireg is expanded by reggen into the registers it needs. They keep
+        # the legacy NAME<i> naming used by the drivers (not reggen's NAME_<i>),
+        # even when there is a single one
+        elif isinstance(entry, MultiRegister):
+            for idx, reg in enumerate(entry.regs):
+                name = "{}{}".format(entry.reg.name, idx)
+                members.append(("uint32_t {}".format(name), name, reg.offset, reg.desc))
+                bytes_offset = reg.offset + reg_bytes
 
-            line = tab_spaces + "uint32_t {};".format(elem["name"])
-            reg_comment = (
-                line_comment_start
-                + elem["desc"].replace("\n", " ")
-                + line_comment_end
-                + "\n\n"
-            )
-            reg_struct += line.ljust(comment_align_space) + reg_comment
-            bytes_offset += (
-                4  # in order to properly generate subsequent "multireg cases"
+        else:
+            members.append(
+                ("uint32_t {}".format(entry.name), entry.name, entry.offset, entry.desc)
             )
+            bytes_offset = entry.offset + reg_bytes
 
-        if "skipto" in elem:
-            new_address = elem["skipto"]
+    return members
 
-            # check if the new address is in hexadecimal or decimal
-            # and convert it to decimal
-            if new_address[:2] == "0x":
-                new_address = int(new_address, base=16)
-            else:
-                new_address = int(new_address)
 
-            offset_value = int((new_address - bytes_offset) / 4)
-
-            line = tab_spaces + "uint32_t _reserved_{}[{}];".format(
-                num_of_reserved, int(offset_value)
-            )
-            reg_comment = (
-                line_comment_start + "reserved addresses" + line_comment_end + "\n\n"
-            )
-            reg_struct += line.ljust(comment_align_space) + reg_comment
-            bytes_offset += offset_value * 4
-            num_of_reserved += 1
+def static_assert_offsets(struct_name, members):
+    """
+    Generates a compile-time check of the offset of every register in the struct,
+    so that the struct can never silently drift from the hardware address map.
 
-    return reg_struct, reg_enum
+    :param struct_name: name of the struct
+    :param members: the members of the struct (see register_members)
+    :return: the string containing the static asserts
+    """
+    asserts = ""
+    for _, name, offset, _ in members:
+        if name is None:
+            continue
+        asserts += (
+            '_Static_assert(offsetof({0}, {1}) == 0x{2:x}, "{0}.{1} is not at '
+            'offset 0x{2:x}");\n'.format(struct_name, name, offset)
+        )
+    return asserts
 
 
-def format_dma_channels(file_path):
+def generate_structs(template, block):
     """
-    Formats the DMA peripheral file to support multiple channels.
-    :param file_path: The path to the DMA peripheral file.
+    Generates the structs of the registers of a peripheral and formats them
+    with the template.
+
+    :param template: filename of the template for the final file generation
+    :param block: the reggen IpBlock of the peripheral, parsed from its hjson description
+    :return: the content of the structs header
     """
-    try:
-        # Read the contents of the file
-        with open(file_path, "r") as file:
-            content = file.read()
-
-        # Replace 'DMA_START_ADDRESS' with 'new_address'
-        updated_content = content.replace(
-            "#define dma_peri ((volatile dma *) DMA_START_ADDRESS)",
-            "#define dma_peri(channel) ((volatile dma *) (DMA_START_ADDRESS + DMA_CH_SIZE * channel))",
-        )
 
-        # Write the updated content back to the file
-        with open(file_path, "w") as file:
-            file.write(updated_content)
+    members = register_members(block)
 
-    except FileNotFoundError:
-        print(f"The file {file_path} does not exist.")
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
+    structs_definitions = "typedef struct {\n\n"
+    for declaration, _, _, desc in members:
+        structs_definitions += struct_member(declaration, desc)
+    structs_definitions += "}} {};".format(block.name)
+
+    return write_template(
+        template,
+        structs_definitions,
+        "",
+        static_assert_offsets(block.name, members),
+        block.name,
+    )
 
 
 def main(arg_vect):
@@ -422,7 +224,7 @@ def main(arg_vect):
     parser = argparse.ArgumentParser(
         prog="Structure generator",
         description="Given a template and a hjson file as input, it generates "
-        "suitable structs and enums and prints them into a file, following the "
+        "suitable structs and prints them into a file, following the "
         "structure provided by the template.",
     )
     parser.add_argument(
@@ -431,41 +233,19 @@ def main(arg_vect):
     )
     parser.add_argument(
         "--hjson_filename",
-        help="filename of the input hjson basing on which the structs and enums will be generated",
+        help="filename of the input hjson basing on which the structs will be generated",
     )
     parser.add_argument(
         "--output_filename",
         help="name of the file in which to write the final formatted template with the structs "
-        "and enums generated",
+        "generated",
     )
 
     args = parser.parse_args(arg_vect)
 
-    input_template = args.template_filename
-    input_hjson_file = args.hjson_filename
-    output_filename = args.output_filename
-
-    data = read_hjson(input_hjson_file)
-
-    # Two strings used to store all the structs and enums #
-    structs_definitions = "typedef struct {\n"  # used to store all the struct definitions to write in the template in the end
-    enums_definitions = ""  # used to store all the enums definitions, if present
-
-    # START OF THE GENERATION #
-
-    reg_structs, reg_enums = add_registers(data)
-    structs_definitions += reg_structs
-    enums_definitions += reg_enums
-
-    structs_definitions += "}} {};".format(data["name"])
-
-    final_output = write_template(
-        input_template, structs_definitions, enums_definitions, data["name"]
-    )
-    write_output(output_filename, final_output)
+    block = IpBlock.from_path(args.hjson_filename, [])
 
-    if data["name"].lower() == "dma":
-        format_dma_channels(output_filename)
+    write_output(args.output_filename, generate_structs(args.template_filename, block))
 
 
 if __name__ == "__main__":
@@ -3,17 +3,23 @@
 # simulation.
 # Args:
 #  <rv_profile> : Path to the rv_profile tool
+#  [elf]        : ELF file of the simulated application, sw/build/main.elf by default
 RV_PROFILE=$1
+ELF_FILE=$2
 
 # Check if the rv_profile tool is provided
 if [ -z "$RV_PROFILE" ]; then
-    echo "Usage: $0 <rv_profile>"
+    echo "Usage: $0 <rv_profile> [elf]"
     exit 1
 fi
 
 # Get the upper root directory
 ROOT_DIR=$(git rev-parse --show-toplevel)
 
+if [ -z "$ELF_FILE" ]; then
+    ELF_FILE=$ROOT_DIR/sw/build/main.elf
+fi
+
 # Get the waveform file
 WAVE_FILE=$(find $ROOT_DIR/build -name "*.vcd")
 
@@ -29,7 +35,7 @@ PROFILE_REPORT_DIR=$ROOT_DIR/util/profile
 PROFILE_CONFIG_FILE=$PROFILE_REPORT_DIR/configs/${xheep.cpu().get_name()}.wal
 
 # Run the profiler
-$RV_PROFILE --elf $ROOT_DIR/sw/build/main.elf \
+$RV_PROFILE --elf $ELF_FILE \
             --fst $WAVE_FILE \
             --cfg $PROFILE_CONFIG_FILE \
             --out $PROFILE_REPORT_DIR/flamegraph.svg
\ No newline at end of file
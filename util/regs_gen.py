@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+# Copyright EPFL contributors.
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+# Generates the registers of the X-HEEP IPs (RTL, C defines, structs and documentation).
+# Each register description is parsed once into a reggen IpBlock, from which every output
+# is generated, and the IPs are processed in parallel. IPs whose description and
+# generators did not change since the last run are skipped.
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import hjson
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+REGTOOL_DIR = (
+    ROOT / "hw/vendor/pulp_platform_register_interface/vendor/lowrisc_opentitan/util"
+)
+PERIPH_STRUCTS_GEN_DIR = ROOT / "util/periph_structs_gen"
+STRUCTS_TEMPLATE = PERIPH_STRUCTS_GEN_DIR / "periph_structs.tpl"
+DRIVERS_DIR = ROOT / "sw/device/lib/drivers"
+
+sys.path.insert(0, str(REGTOOL_DIR))
+sys.path.insert(0, str(PERIPH_STRUCTS_GEN_DIR))
+
+from reggen import gen_cheader, gen_html, gen_rtl
+from reggen.ip_block import IpBlock
+import periph_structs_gen
+
+
+# IPs whose registers are generated: name, directory (holding data/<name>.hjson and rtl/),
+# and whether the structs header is generated
+REGISTER_IPS = [
+    ("soc_ctrl", "hw/ip/soc_ctrl", True),
+    ("power_manager", "hw/ip/power_manager", True),
+    ("pdm2pcm", "hw/ip/pdm2pcm", True),
+    ("pad_control", "hw/system/pad_control", False),
+    ("dma", "hw/ip/dma", True),
+]
+
+re_copyright = re.compile(r".*(copyright.*)|(.*\(c\).*)", re.IGNORECASE)
+re_spdx = re.compile(r".*(SPDX-License-Identifier:.+)")
+re_licensed_under = re.compile(r".*(Licensed under.+)", re.IGNORECASE)
+
+
+def ip_outputs(name, ip_dir, structs):
+    """
+    :return: dictionary of the outputs of an IP: the hjson input, the RTL directory, and the
+        C defines, structs (None when not generated) and documentation files.
+    """
+    ip_dir = ROOT / ip_dir
+    sw_dir = DRIVERS_DIR / name
+    return {
+        "hjson": ip_dir / "data" / f"{name}.hjson",
+        "rtl_dir": ip_dir / "rtl",
+        "cdefines": sw_dir / f"{name}_regs.h",
+        "structs": sw_dir / f"{name}_structs.h" if structs else None,
+        "doc": sw_dir / f"{name}_regs.md",
+    }
+
+
+def source_license(text):
+    """
+    Extracts the license and copyright lines of a register description, as regtool does
+    for the C defines header.
+
+    :return: (license, copyright) tuple, license being None when not found
+    """
+    src_lic = None
+    src_copy = ""
+    found_spdx = None
+    found_lunder = None
+    for line in text.splitlines():
+        mat = re_copyright.match(line)
+        if mat is not None:
+            src_copy += mat.group(1)
+        mat = re_spdx.match(line)
+        if mat is not None:
+            found_spdx = mat.group(1)
+        mat = re_licensed_under.match(line)
+        if mat is not None:
+            found_lunder = mat.group(1)
+    if found_lunder:
+        src_lic = found_lunder
+    if found_spdx:
+        if src_lic is None:
+            src_lic = "\n" + found_spdx
+        else:
+            src_lic += "\n" + found_spdx
+    return src_lic, src_copy
+
+
+def generator_digest():
+    """
+    :return: SHA-256 digest of the generators (reggen, periph_structs_gen and this script),
+        so that the IPs are generated again when one of them changes.
+    """
+    digest = hashlib.sha256()
+    sources = sorted((REGTOOL_DIR / "reggen").glob("*.py"))
+    sources += sorted((REGTOOL_DIR / "reggen").glob("*.tpl"))
+    sources += [
+        PERIPH_STRUCTS_GEN_DIR / "periph_structs_gen.py",
+        STRUCTS_TEMPLATE,
+        pathlib.Path(__file__).resolve(),
+    ]
+    for source in sources:
+        digest.update(source.name.encode("utf-8") + b"\0")
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def input_digest(hjson_path, generators):
+    """
+    :return: SHA-256 digest of a register description and of the generators digest
+    """
+    digest = hashlib.sha256(generators.encode("utf-8"))
+    digest.update(pathlib.Path(hjson_path).read_bytes())
+    return digest.hexdigest()
+
+
+def generate_ip(name, ip_dir, structs):
+    """
+    Parses the register description of an IP once and generates all its outputs from it.
+
+    :return: list of the generated files
+    :raise ValueError: when the register description is not valid
+    :raise RuntimeError: when an output cannot be generated
+    """
+    outputs = ip_outputs(name, ip_dir, structs)
+    text = outputs["hjson"].read_text(encoding="utf-8")
+    raw = hjson.loads(text, use_decimal=True)
+    block = IpBlock.from_raw([], raw, str(outputs["hjson"]))
+
+    outputs["rtl_dir"].mkdir(parents=True, exist_ok=True)
+    outputs["cdefines"].parent.mkdir(parents=True, exist_ok=True)
+    generated = []
+
+    if gen_rtl.gen_rtl(block, str(outputs["rtl_dir"])) != 0:
+        raise RuntimeError(f"Cannot generate the {name} registers RTL")
+    generated.append(outputs["rtl_dir"] / f"{block.name.lower()}_reg_pkg.sv")
+    generated.append(outputs["rtl_dir"] / f"{block.name.lower()}_reg_top.sv")
+
+    src_lic, src_copy = source_license(text)
+    with open(outputs["cdefines"], "w") as file:
+        if gen_cheader.gen_cdefines(block, file, src_lic, src_copy) != 0:
+            raise RuntimeError(f"Cannot generate the {name} software header")
+    generated.append(outputs["cdefines"])
+
+    if structs:
+        periph_structs_gen.write_output(
+            outputs["structs"],
+            periph_structs_gen.generate_structs(STRUCTS_TEMPLATE, block),
+        )
+        generated.append(outputs["structs"])
+
+    with open(outputs["doc"], "w") as file:
+        if gen_html.gen_html(block, file) != 0:
+            raise RuntimeError(f"Cannot generate the {name} documentation")
+    generated.append(outputs["doc"])
+
+    return [str(path.relative_to(ROOT)) for path in generated]
+
+
+def _generate_ip_job(job):
+    name, ip_dir, structs = job
+    try:
+        return name, generate_ip(name, ip_dir, structs), None
+    except (ValueError, RuntimeError, OSError) as e:
+        return name, None, str(e)
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r") as file:
+            manifest = json.load(file)
+        return dict(manifest["ips"])
+    except (FileNotFoundError, ValueError, KeyError, TypeError, AttributeError):
+        return {}
+
+
+def is_ip_up_to_date(record, digest):
+    """
+    Checks whether an IP was generated from the same description and generators.
+    The outputs are formatted afterwards (make verible), so only their presence is checked.
+    """
+    return (
+        record is not None
+        and record.get("input") == digest
+        and all((ROOT / output).exists() for output in record.get("outputs", []))
+    )
+
+
+def generate_registers(ips, manifest_path=None, num_workers=1, force=False):
+    """
+    Generates the registers of several IPs.
+
+    :param ips: list of (name, directory, structs) tuples (see REGISTER_IPS)
+    :param manifest_path: file recording the inputs of the generated IPs, used to skip the
+        unchanged ones. Nothing is skipped without it.
+    :param num_workers: number of IPs generated in parallel
+    :param force: generate every IP, even the unchanged ones
+    :return: True if every IP was generated or up to date
+    """
+    generators = generator_digest()
+    manifest = load_manifest(manifest_path) if manifest_path and not force else {}
+
+    digests = {}
+    jobs = []
+    for name, ip_dir, structs in ips:
+        hjson_path = ip_outputs(name, ip_dir, structs)["hjson"]
+        if not hjson_path.exists():
+            print(f"Generating {name} registers... FAILED: {hjson_path} not found")
+            return False
+        digests[name] = input_digest(hjson_path, generators)
+        if is_ip_up_to_date(manifest.get(name), digests[name]):
+            print(f"{name} registers are up to date")
+        else:
+            jobs.append((name, ip_dir, structs))
+
+    if num_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            results = list(executor.map(_generate_ip_job, jobs))
+    else:
+        results = [_generate_ip_job(job) for job in jobs]
+
+    success = True
+    for name, outputs, error in results:
+        if error is None:
+            print(f"Generating {name} registers... OK")
+            manifest[name] = {"input": digests[name], "outputs": outputs}
+        else:
+            print(f"Generating {name} registers... FAILED: {error}")
+            manifest.pop(name, None)
+            success = False
+
+    if manifest_path:
+        pathlib.Path(manifest_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest_path, "w") as file:
+            json.dump({"ips": manifest}, file, indent=2)
+
+    return success
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="regs_gen",
+        description="Generates the registers RTL, C defines, structs and documentation of the X-HEEP IPs.",
+    )
+
+    parser.add_argument(
+        "--ips",
+        type=str,
+        default=None,
+        help=f"Comma separated IPs to generate (default: {','.join(ip[0] for ip in REGISTER_IPS)})",
+    )
+
+    parser.add_argument(
+        "--manifest",
+        "-m",
+        type=pathlib.Path,
+        default=pathlib.Path("build/regs_gen.deps.json"),
+        help="File recording the inputs of the generated IPs, used to skip the unchanged ones (default: build/regs_gen.deps.json)",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of IPs generated in parallel (default: number of CPUs)",
+    )
+
+    parser.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Generate every IP, even the unchanged ones",
+    )
+
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Print the reggen debug messages"
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(levelname)s: %(message)s",
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+    )
+
+    ips = REGISTER_IPS
+    if args.ips:
+        names = args.ips.split(",")
+        known = [ip[0] for ip in REGISTER_IPS]
+        for name in names:
+            if name not in known:
+                parser.error(f"Unknown IP {name}, the IPs are {', '.join(known)}")
+        ips = [ip for ip in REGISTER_IPS if ip[0] in names]
+
+    if not generate_registers(ips, args.manifest, args.jobs, args.force):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
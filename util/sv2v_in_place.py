@@ -6,6 +6,7 @@
 # pylint: disable=raise-missing-from, unused-argument, consider-merging-isinstance
 # pylint: disable=redefined-builtin, global-statement, subprocess-run-check, consider-using-sys-exit
 import argparse
+import hashlib
 import logging
 import os
 import re
@@ -13,7 +14,20 @@ import shlex
 import shutil
 import subprocess
 import tempfile
-from typing import List, Pattern, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Pattern, Tuple
+
+# Version of the cache entries, to change when the conversion command changes
+CACHE_VERSION = "2"
+
+# `include directives, with a file name or a macro giving it
+INCLUDE_RE = re.compile(r'^\s*`include\s+(?:"([^"]+)"|<([^>]+)>|(`\w+))', re.MULTILINE)
+
+
+def default_cache_dir() -> str:
+    """Return the default folder of the conversion cache, shared by all the builds"""
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(cache_home, "x-heep", "sv2v")
 
 
 def read_file_list(path: str) -> List[str]:
@@ -65,6 +79,134 @@ def transform_one(
             )
 
 
+class ConversionCache:
+    """Persistent cache of the sv2v outputs, keyed on everything a conversion depends on"""
+
+    def __init__(
+        self, cache_dir: str, sv2v: str, incdirs: List[str], pkg_paths: List[str]
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.incdirs = incdirs
+        # The parts of the key shared by all the files: the sv2v binary, the
+        # files of the include dirs and the packages with the files they
+        # include, by content so that the cache is shared by builds in
+        # different folders
+        digest = hashlib.sha256(CACHE_VERSION.encode())
+        digest.update(file_digest(shutil.which(sv2v) or sv2v).encode())
+        for incdir in incdirs:
+            digest.update(b"incdir\0" + incdir_digest(incdir).encode())
+        for pkg_path in pkg_paths:
+            digest.update(b"pkg\0" + file_digest(pkg_path).encode())
+            digest.update(b"includes\0" + include_digest(pkg_path, incdirs).encode())
+        self.common_digest = digest.hexdigest()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, defines: List[str], pkg_paths: List[str], sv_path: str) -> str:
+        """Return the key of the conversion of a file with the given defines"""
+        digest = hashlib.sha256(self.common_digest.encode())
+        for define in defines:
+            digest.update(b"define\0" + define.encode() + b"\0")
+        # The file is passed once, after the packages, even if it is a package
+        digest.update(
+            b"index\0"
+            + str(pkg_paths.index(sv_path) if sv_path in pkg_paths else -1).encode()
+        )
+        digest.update(b"file\0" + file_digest(sv_path).encode())
+        # The headers can also be found next to the file, outside the include dirs
+        digest.update(b"includes\0" + include_digest(sv_path, self.incdirs).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".v")
+
+    def restore(self, key: str, dst_path: str) -> bool:
+        """Copy the cached output to dst_path, return False if it is not cached"""
+        try:
+            shutil.copyfile(self.path(key), dst_path)
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key: str, dst_path: str) -> None:
+        """Store a conversion output. A failure only means the next run converts the file again"""
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            shutil.copyfile(dst_path, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            logging.warning("Cannot store the sv2v output in the cache: {}".format(err))
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 digest of the content of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def incdir_digest(incdir: str) -> str:
+    """Return the SHA-256 digest of the files of an include dir, by relative path.
+    Any file can be included, e.g. `include "prim_assert.sv"."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(incdir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, incdir).encode() + b"\0")
+            digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def find_include(name: str, src_dir: str, incdirs: List[str]) -> Optional[str]:
+    """Return the path of an included file, looked up next to the including file
+    and then in the include dirs, or None if it is not found"""
+    for folder in [src_dir] + incdirs:
+        path = os.path.join(folder, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def include_digest(path: str, incdirs: List[str]) -> str:
+    """Return the SHA-256 digest of the files included by a file, recursively.
+    Every `include is hashed, even in a disabled `ifdef branch. The name of an
+    include given by a macro is not known, so the whole folder of the file
+    including it is hashed instead."""
+    digest = hashlib.sha256()
+    seen = set()
+    pending = [path]
+    while pending:
+        src_path = pending.pop(0)
+        src_dir = os.path.dirname(src_path)
+        with open(src_path, errors="replace") as handle:
+            text = handle.read()
+        for match in INCLUDE_RE.finditer(text):
+            name = match.group(1) or match.group(2)
+            if name is None:
+                if src_dir not in seen:
+                    seen.add(src_dir)
+                    digest.update(b"dir\0" + incdir_digest(src_dir or ".").encode())
+                continue
+            inc_path = find_include(name, src_dir, incdirs)
+            digest.update(b"include\0" + name.encode() + b"\0")
+            if inc_path is None:
+                digest.update(b"missing\0")
+                continue
+            digest.update(file_digest(inc_path).encode())
+            inc_path = os.path.realpath(inc_path)
+            if inc_path not in seen:
+                seen.add(inc_path)
+                pending.append(inc_path)
+    return digest.hexdigest()
+
+
 def parse_define_if(arg: str) -> Tuple[Pattern[str], str]:
     """Handle a --define-if argument"""
     parts = arg.rsplit(":", 1)
@@ -105,14 +247,18 @@ def transform(
     incdirs: List[str],
     pkg_paths: List[str],
     sv_paths: List[str],
+    jobs: int = 1,
+    cache_dir: Optional[str] = None,
 ) -> None:
-    """Run sv2v to transform a list of files in-place"""
+    """Run sv2v to transform a list of files in-place, jobs files at a time"""
+    cache = ConversionCache(cache_dir, sv2v, incdirs, pkg_paths) if cache_dir else None
+
     with tempfile.TemporaryDirectory() as tmpdir:
         # First write each file to a file in a temporary directory, then copy
         # everything back. We have to do it like this because otherwise we
-        # might trash a file that needs to be included by a later one.
-        dst_paths = []
-        for idx, src_path in enumerate(sv_paths):
+        # might trash a file that needs to be included by a later one. The
+        # conversions do not depend on each other, so they run concurrently.
+        def convert(idx: int, src_path: str) -> str:
             dst_path = os.path.join(tmpdir, str(idx))
 
             extra_file_defines = []
@@ -120,6 +266,13 @@ def transform(
                 if regex.search(src_path):
                     extra_file_defines.append(define)
 
+            key = None
+            if cache is not None:
+                key = cache.key(defines + extra_file_defines, pkg_paths, src_path)
+                if cache.restore(key, dst_path):
+                    logging.info("Using the cached sv2v output of {}".format(src_path))
+                    return dst_path
+
             transform_one(
                 sv2v,
                 defines + extra_file_defines,
@@ -128,7 +281,19 @@ def transform(
                 src_path,
                 dst_path,
             )
-            dst_paths.append(dst_path)
+            if cache is not None:
+                cache.store(key, dst_path)
+            return dst_path
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            dst_paths = list(executor.map(convert, range(len(sv_paths)), sv_paths))
+
+        if cache is not None:
+            logging.info(
+                "sv2v cache: {} files reused, {} converted".format(
+                    cache.hits, cache.misses
+                )
+            )
 
         # Now copy everything back, overwriting the original code
         for dst_path, src_path in zip(dst_paths, sv_paths):
@@ -191,6 +356,27 @@ def main() -> int:
         help=("Specify the name or path of the sv2v binary. " "Defaults to 'sv2v'."),
     )
 
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of files converted in parallel. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("SV2V_CACHE_DIR", default_cache_dir()),
+        help=(
+            "Folder of the cache of the sv2v outputs, kept between runs. "
+            "Defaults to $SV2V_CACHE_DIR, or x-heep/sv2v in the user cache folder."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Convert every file, without reading or writing the cache.",
+    )
+
     parser.add_argument(
         "--merge",
         "-m",
@@ -255,7 +441,14 @@ def main() -> int:
 
     try:
         transform(
-            args.sv2v, args.defines, args.defines_if, args.incdirs, pkg_paths, sv_paths
+            args.sv2v,
+            args.defines,
+            args.defines_if,
+            args.incdirs,
+            pkg_paths,
+            sv_paths,
+            jobs=args.jobs,
+            cache_dir=None if args.no_cache else args.cache_dir,
         )
     except RuntimeError as err:
         logging.error(err)
@@ -272,4 +465,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    exit(main())
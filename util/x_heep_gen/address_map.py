@@ -0,0 +1,559 @@
+import json
+import xml.etree.ElementTree as ET
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+
+class AddressRegion:
+    """
+    Represents a range of addresses of the X-HEEP address map, owned by a bus slave (RAM bank, peripheral domain, debug module, flash...) or by one of its peripherals.
+
+    :param str name: the name of the region, unique in the address map.
+    :param str kind: the kind of the region, one of the `AddressMap` kinds.
+    :param int start: the start address.
+    :param int end: the end address, excluded.
+    :param int il_level: number of bits used for interleaving if the region is an interleaved RAM bank, else 0.
+    :param int il_offset: position of the bank in its interleaved group, else 0.
+    :raise ValueError: when the end address is not bigger than the start address.
+    """
+
+    name: str
+    """The name of the region"""
+
+    kind: str
+    """The kind of the region"""
+
+    start: int
+    """The start address"""
+
+    end: int
+    """The end address, excluded"""
+
+    il_level: int
+    """Number of bits used for interleaving, 0 if the region is not interleaved"""
+
+    il_offset: int
+    """Position of the bank in its interleaved group"""
+
+    children: "List[AddressRegion]"
+    """The regions inside this one (peripherals of a domain, banks of an interleaved group), sorted by start address once the map is built"""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        start: int,
+        end: int,
+        il_level: int = 0,
+        il_offset: int = 0,
+    ):
+        if end <= start:
+            raise ValueError(
+                f"The end address of {name} (0x{end:08X}) should be bigger than its start address (0x{start:08X})"
+            )
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.il_level = il_level
+        self.il_offset = il_offset
+        self.children = []
+        self._child_starts: List[int] = []
+
+    def __str__(self) -> str:
+        return f"{self.name} (0x{self.start:08X} - 0x{self.end:08X})"
+
+    @property
+    def size(self) -> int:
+        """The size in Bytes"""
+        return self.end - self.start
+
+    def contains(self, address: int) -> bool:
+        """
+        :param int address: the address to check.
+        :return: `True` if the address belongs to the region. An address of an interleaved bank also has to select this bank.
+        :rtype: bool
+        """
+        if not self.start <= address < self.end:
+            return False
+        return (
+            self.il_level == 0
+            or ((address >> 2) & ((1 << self.il_level) - 1)) == self.il_offset
+        )
+
+    def add_child(self, region: "AddressRegion"):
+        """
+        Adds a region inside this one.
+
+        :param AddressRegion region: the region to add.
+        """
+        self.children.append(region)
+
+    def build(self):
+        """
+        Sorts the children by start address, recursively.
+        """
+        self.children.sort(key=lambda r: (r.start, r.end, r.il_offset))
+        self._child_starts = [r.start for r in self.children]
+        for child in self.children:
+            child.build()
+
+    def child_at(self, address: int) -> "Optional[AddressRegion]":
+        """
+        :param int address: the address to look up, assumed to be in this region.
+        :return: the child region owning the address, None if there is none.
+        :rtype: AddressRegion or None
+        """
+        if self.kind == AddressMap.RAM_IL_GROUP:
+            # All the banks of the group span the whole group, the word address selects the bank
+            for child in self.children:
+                if child.contains(address):
+                    return child
+            return None
+        i = bisect_right(self._child_starts, address) - 1
+        if i >= 0 and self.children[i].contains(address):
+            return self.children[i]
+        return None
+
+    def to_dict(self) -> dict:
+        """
+        :return: the region as a dictionary that can be stored as JSON.
+        :rtype: dict
+        """
+        region = {
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "size": self.size,
+        }
+        if self.il_level > 0:
+            region["il_level"] = self.il_level
+            region["il_offset"] = self.il_offset
+        if self.children:
+            region["children"] = [child.to_dict() for child in self.children]
+        return region
+
+
+class AddressMap:
+    """
+    Sorted index of the X-HEEP address map: the bus slaves (RAM banks, interleaved RAM groups, peripheral domains and bus windows such as debug, external slaves and flash), the peripherals inside the domains, and the linker sections placed in the RAM.
+
+    Regions are added, then `build()` sorts them so that an address can be looked up by bisection and overlaps found with a single sweep.
+    """
+
+    RAM_BANK = "ram_bank"
+    """Kind of a continuous RAM bank"""
+
+    RAM_IL_GROUP = "ram_il_group"
+    """Kind of a group of interleaved RAM banks"""
+
+    RAM_IL_BANK = "ram_il_bank"
+    """Kind of a RAM bank of an interleaved group"""
+
+    PERIPHERAL_DOMAIN = "peripheral_domain"
+    """Kind of a peripheral domain"""
+
+    PERIPHERAL = "peripheral"
+    """Kind of a peripheral of a peripheral domain"""
+
+    WINDOW = "window"
+    """Kind of a bus window that is not modelled by XHeep (debug, external slaves, flash...)"""
+
+    LINKER_SECTION = "linker_section"
+    """Kind of a linker section"""
+
+    def __init__(self):
+        self._regions: List[AddressRegion] = []
+        self._starts: List[int] = []
+        self._linker_sections: List[AddressRegion] = []
+        self._section_starts: List[int] = []
+
+    # ------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------
+
+    def add_region(self, region: AddressRegion):
+        """
+        Adds a bus slave region, with its children.
+
+        :param AddressRegion region: the region to add.
+        """
+        self._regions.append(region)
+
+    def add_window(self, name: str, start: int, length: int):
+        """
+        Adds a bus window that is not modelled by XHeep.
+
+        :param str name: the name of the window.
+        :param int start: the start address.
+        :param int length: the size in Bytes.
+        """
+        self.add_region(AddressRegion(name, self.WINDOW, start, start + length))
+
+    def add_memory_ss(self, memory_ss):
+        """
+        Adds the RAM banks, interleaved groups and linker sections of a memory subsystem.
+
+        :param MemorySS memory_ss: the memory subsystem, already built.
+        """
+        for bank in memory_ss.iter_ram_banks():
+            if bank.il_level() == 0:
+                self.add_region(
+                    AddressRegion(
+                        f"ram{bank.name()}",
+                        self.RAM_BANK,
+                        bank.start_address(),
+                        bank.end_address(),
+                    )
+                )
+
+        for i, group in enumerate(memory_ss.iter_il_groups()):
+            region = AddressRegion(
+                f"ram_il{i}", self.RAM_IL_GROUP, group.start, group.start + group.size
+            )
+            for bank in memory_ss.iter_ram_banks():
+                if bank.il_level() > 0 and bank.start_address() == group.start:
+                    region.add_child(
+                        AddressRegion(
+                            f"ram{bank.name()}",
+                            self.RAM_IL_BANK,
+                            bank.start_address(),
+                            bank.end_address(),
+                            bank.il_level(),
+                            bank.il_offset(),
+                        )
+                    )
+            self.add_region(region)
+
+        for section in memory_ss.iter_linker_sections():
+            self._linker_sections.append(
+                AddressRegion(
+                    section.name, self.LINKER_SECTION, section.start, section.end
+                )
+            )
+
+    def add_peripheral_domain(self, name: str, domain):
+        """
+        Adds a peripheral domain and its peripherals. Peripherals without address yet are skipped.
+
+        :param str name: the name of the domain in the address map.
+        :param PeripheralDomain domain: the peripheral domain.
+        """
+        start = domain.get_start_address()
+        region = AddressRegion(
+            name, self.PERIPHERAL_DOMAIN, start, start + domain.get_length()
+        )
+        for peripheral in domain.get_peripherals():
+            if peripheral.get_address() is None:
+                continue
+            region.add_child(
+                AddressRegion(
+                    peripheral.get_name(),
+                    self.PERIPHERAL,
+                    start + peripheral.get_address(),
+                    start + peripheral.get_address() + peripheral.get_length(),
+                )
+            )
+        self.add_region(region)
+
+    def build(self):
+        """
+        Sorts the regions and linker sections by start address. Has to be called after adding regions and before using the map.
+        """
+        self._regions.sort(key=lambda r: (r.start, r.end))
+        self._starts = [r.start for r in self._regions]
+        for region in self._regions:
+            region.build()
+        self._linker_sections.sort(key=lambda r: (r.start, r.end))
+        self._section_starts = [r.start for r in self._linker_sections]
+
+    @staticmethod
+    def from_xheep(xheep) -> "AddressMap":
+        """
+        Creates the address map of a whole system.
+
+        :param XHeep xheep: the system, already built.
+        :return: the built address map
+        :rtype: AddressMap
+        """
+        address_map = AddressMap()
+        if xheep.memory_ss():
+            address_map.add_memory_ss(xheep.memory_ss())
+        if xheep.are_base_peripherals_configured():
+            address_map.add_peripheral_domain(
+                "ao_peripheral", xheep.get_base_peripheral_domain()
+            )
+        if xheep.are_user_peripherals_configured():
+            address_map.add_peripheral_domain(
+                "peripheral", xheep.get_user_peripheral_domain()
+            )
+        for name, (start, length) in xheep.iter_address_windows():
+            address_map.add_window(name, start, length)
+        address_map.build()
+        return address_map
+
+    # ------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------
+
+    def iter_regions(self) -> Iterable[AddressRegion]:
+        """
+        :return: an iterator over the bus slave regions, sorted by start address.
+        :rtype: Iterable[AddressRegion]
+        """
+        return iter(self._regions)
+
+    def iter_all_regions(self) -> Iterable[AddressRegion]:
+        """
+        :return: an iterator over all the regions, each one followed by its children.
+        :rtype: Iterable[AddressRegion]
+        """
+        stack = list(reversed(self._regions))
+        while stack:
+            region = stack.pop()
+            yield region
+            stack.extend(reversed(region.children))
+
+    def iter_linker_sections(self) -> Iterable[AddressRegion]:
+        """
+        :return: an iterator over the linker sections, sorted by start address.
+        :rtype: Iterable[AddressRegion]
+        """
+        return iter(self._linker_sections)
+
+    def lookup(self, address: int) -> List[AddressRegion]:
+        """
+        Finds the owners of an address, assuming the bus slave regions do not overlap.
+
+        :param int address: the address to look up.
+        :return: the regions containing the address, from the bus slave to the most specific one. Empty if the address is not mapped.
+        :rtype: list[AddressRegion]
+        """
+        i = bisect_right(self._starts, address) - 1
+        if i < 0 or not self._regions[i].contains(address):
+            return []
+        path = [self._regions[i]]
+        child = path[-1].child_at(address)
+        while child is not None:
+            path.append(child)
+            child = child.child_at(address)
+        return path
+
+    def owner(self, address: int) -> Optional[AddressRegion]:
+        """
+        :param int address: the address to look up.
+        :return: the most specific region containing the address, None if the address is not mapped.
+        :rtype: AddressRegion or None
+        """
+        path = self.lookup(address)
+        return path[-1] if path else None
+
+    def find_linker_section(self, address: int) -> Optional[AddressRegion]:
+        """
+        :param int address: the address to look up.
+        :return: the linker section containing the address, None if there is none.
+        :rtype: AddressRegion or None
+        """
+        i = bisect_right(self._section_starts, address) - 1
+        if i >= 0 and self._linker_sections[i].contains(address):
+            return self._linker_sections[i]
+        return None
+
+    # ------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _find_overlaps(
+        regions: List[AddressRegion],
+    ) -> List[Tuple[AddressRegion, AddressRegion]]:
+        """
+        Sweeps regions sorted by start address, comparing each one with the region reaching the furthest before it.
+
+        :return: the pairs of overlapping regions found.
+        :rtype: list[tuple[AddressRegion, AddressRegion]]
+        """
+        overlaps = []
+        furthest = None
+        for region in regions:
+            if furthest is not None and region.start < furthest.end:
+                overlaps.append((furthest, region))
+            if furthest is None or region.end > furthest.end:
+                furthest = region
+        return overlaps
+
+    def overlaps(
+        self, nested: bool = True
+    ) -> List[Tuple[AddressRegion, AddressRegion]]:
+        """
+        Finds the overlapping regions in O(n log n).
+
+        :param bool nested: also look for overlaps between the children of each region and between the linker sections.
+        :return: the pairs of overlapping regions.
+        :rtype: list[tuple[AddressRegion, AddressRegion]]
+        """
+        overlaps = self._find_overlaps(self._regions)
+        if nested:
+            for region in self.iter_all_regions():
+                if region.kind != self.RAM_IL_GROUP:
+                    overlaps += self._find_overlaps(region.children)
+            overlaps += self._find_overlaps(self._linker_sections)
+        return overlaps
+
+    def check_overlaps(self, nested: bool = True) -> bool:
+        """
+        Checks that the regions do not overlap and that the children of a region are inside it.
+
+        :param bool nested: also check the children of each region and the linker sections.
+        :return: `True` if the regions are valid.
+        :rtype: bool
+        """
+        ret = True
+        for first, second in self.overlaps(nested):
+            print(f"{first} and {second} overlap.")
+            ret = False
+
+        if not nested:
+            return ret
+
+        for region in self.iter_all_regions():
+            for child in region.children:
+                if child.start < region.start or child.end > region.end:
+                    print(f"{child} is out of {region}.")
+                    ret = False
+            if region.kind == self.RAM_IL_GROUP:
+                offsets = sorted(child.il_offset for child in region.children)
+                if len(offsets) == 0 or offsets != list(
+                    range(1 << region.children[0].il_level)
+                ):
+                    print(
+                        f"The banks of {region} do not cover every interleaving offset."
+                    )
+                    ret = False
+        return ret
+
+    def check_linker_sections(self) -> bool:
+        """
+        Checks that every linker section starts, ends and has no hole in the RAM.
+
+        :return: `True` if the linker sections are valid.
+        :rtype: bool
+        """
+        ret = True
+        for section in self._linker_sections:
+            address = section.start
+            while address < section.end:
+                path = self.lookup(address)
+                if not path or path[0].kind not in (self.RAM_BANK, self.RAM_IL_GROUP):
+                    if address == section.start:
+                        print(f"Section {section.name} does not start in any ram bank.")
+                    elif not any(
+                        r.start >= address
+                        for r in self._regions
+                        if r.kind in (self.RAM_BANK, self.RAM_IL_GROUP)
+                    ):
+                        print(f"Section {section.name} does not end in any ram bank.")
+                    else:
+                        print(
+                            f"Section {section.name} has a memory hole starting at {address:#08X}"
+                        )
+                    ret = False
+                    break
+                address = path[0].end
+        return ret
+
+    def validate(self) -> bool:
+        """
+        Checks the regions and the linker sections.
+
+        :return: `True` if the address map is valid.
+        :rtype: bool
+        """
+        overlaps_ok = self.check_overlaps()
+        return self.check_linker_sections() and overlaps_ok
+
+    # ------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        """
+        :return: the address map as a dictionary that can be stored as JSON.
+        :rtype: dict
+        """
+        return {
+            "regions": [region.to_dict() for region in self._regions],
+            "linker_sections": [section.to_dict() for section in self._linker_sections],
+        }
+
+    def write_json(self, path):
+        """
+        Writes the address map as JSON.
+
+        :param path: path of the JSON file.
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def to_svd(self, device_name: str = "x_heep") -> str:
+        """
+        Describes the address map as a CMSIS-SVD device, for debuggers and trace decoders. Each peripheral, memory and bus window is an SVD peripheral with a single address block, peripherals are grouped by domain.
+
+        :param str device_name: the name of the device.
+        :return: the SVD file content.
+        :rtype: str
+        """
+        device = ET.Element(
+            "device",
+            {
+                "schemaVersion": "1.3",
+                "xmlns:xs": "http://www.w3.org/2001/XMLSchema-instance",
+                "xs:noNamespaceSchemaLocation": "CMSIS-SVD.xsd",
+            },
+        )
+        for tag, text in (
+            ("name", device_name),
+            ("version", "1.0"),
+            ("description", "X-HEEP address map"),
+            ("addressUnitBits", "8"),
+            ("width", "32"),
+            ("size", "32"),
+            ("access", "read-write"),
+        ):
+            ET.SubElement(device, tag).text = text
+
+        peripherals = ET.SubElement(device, "peripherals")
+        for region in self._regions:
+            if region.kind == self.PERIPHERAL_DOMAIN:
+                for child in region.children:
+                    self._svd_peripheral(peripherals, child, region.name, "registers")
+            else:
+                self._svd_peripheral(peripherals, region, region.kind, "buffer")
+
+        if hasattr(ET, "indent"):  # Python 3.9+
+            ET.indent(device)
+        return '<?xml version="1.0" encoding="utf-8"?>\n' + ET.tostring(
+            device, encoding="unicode"
+        )
+
+    @staticmethod
+    def _svd_peripheral(peripherals, region: AddressRegion, group: str, usage: str):
+        peripheral = ET.SubElement(peripherals, "peripheral")
+        ET.SubElement(peripheral, "name").text = region.name.upper()
+        ET.SubElement(peripheral, "groupName").text = group.upper()
+        ET.SubElement(peripheral, "baseAddress").text = f"{region.start:#010x}"
+        block = ET.SubElement(peripheral, "addressBlock")
+        ET.SubElement(block, "offset").text = "0"
+        ET.SubElement(block, "size").text = f"{region.size:#x}"
+        ET.SubElement(block, "usage").text = usage
+
+    def write_svd(self, path, device_name: str = "x_heep"):
+        """
+        Writes the address map as a CMSIS-SVD file.
+
+        :param path: path of the SVD file.
+        :param str device_name: the name of the device.
+        """
+        with open(path, "w") as file:
+            file.write(self.to_svd(device_name))
@@ -1,8 +1,10 @@
 from copy import deepcopy
-from typing import List, Set, Iterable, Generator, Optional, Union
+from itertools import takewhile
+from typing import List, Set, Iterable, Generator, Optional
 from .ram_bank import Bank, is_pow2
 from .il_ram_group import ILRamGroup
 from .linker_section import LinkerSection
+from ..address_map import AddressMap
 
 
 class MemorySS:
@@ -151,12 +153,43 @@ class MemorySS:
     def override_ram_banks_il(self, numbanks_il: int):
         """
         Overrides the interleaved ram banks configuration.
-        Removes all previously added RAM banks and linker sections and adds 32kB numbanks_il interleaved RAM banks.
+        Removes the previously added RAM banks and adds 32kB numbanks_il interleaved RAM banks.
+        The continuous RAM banks set by override_ram_banks are kept, the interleaved banks are added after them.
+        Without interleaved banks (numbanks_il is 0), the continuous RAM banks placed before the first interleaved
+        bank of the configuration are kept instead.
+        The linker sections starting after the kept banks, or in the removed interleaved banks, are removed.
         :param int numbanks_il: number of 32kB interleaved banks to add.
         """
-        self._ram_next_addr = self._ram_start_address
-        self._ram_next_idx = 1
-        self._ram_banks = []
+        first_il = next((b for b in self._ram_banks if b.il_level() != 0), None)
+        if self._ignore_ram_continous or numbanks_il == 0:
+            self._ram_banks = list(
+                takewhile(lambda b: b.il_level() == 0, self._ram_banks)
+            )
+        else:
+            self._ram_banks = []
+
+        if len(self._ram_banks) > 0:
+            sections_end = self._ram_banks[-1].end_address()
+        elif first_il is not None:
+            sections_end = first_il.start_address()
+        else:
+            sections_end = None
+        if sections_end is not None:
+            removed = {s.name for s in self._linker_sections if s.start >= sections_end}
+            self._linker_sections = [
+                s for s in self._linker_sections if s.name not in removed
+            ]
+            self._used_section_names -= removed
+
+        self._ram_banks_il_idx = []
+        self._ram_banks_il_groups = []
+        self._il_banks_present = False
+        if len(self._ram_banks) > 0:
+            self._ram_next_addr = self._ram_banks[-1].end_address()
+            self._ram_next_idx = self._ram_banks[-1].map_idx() + 1
+        else:
+            self._ram_next_addr = self._ram_start_address
+            self._ram_next_idx = 1
 
         self._ignore_ram_interleaved = True
         self._override_numbanks_il = numbanks_il
@@ -276,7 +309,7 @@ class MemorySS:
         - Inferes the missing linker section ends with the start of the next section if present. If not it uses the end of the last memory bank.
         """
 
-        if self._ignore_ram_interleaved:
+        if self._ignore_ram_interleaved and self._override_numbanks_il > 0:
             sec_name = ""
             if self.ram_numbanks() > 1:
                 sec_name = "data_interleaved"
@@ -325,8 +358,6 @@ class MemorySS:
             l.check()
 
         ret = True
-        old_sec: Union[LinkerSection, None] = None
-
         for i, sec in enumerate(self._linker_sections):
             if i == 0 and sec.name != "code":
                 print("The first linker section should be called code.")
@@ -335,40 +366,10 @@ class MemorySS:
                 print("The second linker section should be called data.")
                 ret = False
 
-            if old_sec is not None:
-                if sec.start < old_sec.end:
-                    print(f"Section {sec.name} and {old_sec.name} overlap.")
-
-            start = sec.start
-            found_start = False
-            found_end = False
-            for b in self._ram_banks:
-                if found_start:
-                    if b.start_address() > start:
-                        print(
-                            f"Section {sec.name} has a memory hole starting at {start:#08X}"
-                        )
-                        ret = False
-                        found_end = True
-                        break
-                    else:
-                        start = b.end_address()
-
-                if sec.start >= b.start_address() and sec.start < b.end_address():
-                    found_start = True
-                    start = b.end_address()
-
-                if sec.end <= b.end_address() and sec.end > b.start_address():
-                    found_end = True
-                    break
-
-            if not found_start:
-                print(f"Section {sec.name} does not start in any ram bank.")
-                ret = False
-
-            if not found_end:
-                ret = False
-                print(f"Section {sec.name} does not end in any ram bank.")
-
-            old_sec = sec
+        # Checks that the sections do not overlap and lie in the ram banks without hole
+        address_map = AddressMap()
+        address_map.add_memory_ss(self)
+        address_map.build()
+        if not address_map.validate():
+            ret = False
         return ret
@@ -8,6 +8,7 @@ from abc import (
 from enum import Enum
 from copy import deepcopy
 from typing import List
+from ..address_map import AddressMap
 
 
 class Peripheral(ABC):
@@ -21,6 +22,7 @@ class Peripheral(ABC):
     _length: int = int("0x00010000", 16)  # default length of 64KB
     _name: str
     _address: int = None
+    _frozen: bool = False
 
     def __init__(self, offset=None, length=None):
         """
@@ -37,6 +39,26 @@ class Peripheral(ABC):
         if length is not None:
             self._length = length
 
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise AttributeError(
+                f"Peripheral {self.get_name()} is frozen since XHeep.build(), modify a copy of its domain instead (see PeripheralDomain.copy)"
+            )
+        super().__setattr__(name, value)
+
+    def freeze(self):
+        """
+        Makes the peripheral read-only, any later modification raises an AttributeError.
+        """
+        object.__setattr__(self, "_frozen", True)
+
+    def is_frozen(self):
+        """
+        :return: True if the peripheral is read-only.
+        :rtype: bool
+        """
+        return self._frozen
+
     def get_address(self):
         """
         :return: The virtual (in peripheral domain) memory address of the peripheral. If not set, return None.
@@ -93,6 +115,7 @@ class PeripheralDomain(ABC):
     _peripherals: List[
         Peripheral
     ]  # type has to be precised for filtering in validation
+    _frozen: bool = False
 
     @abstractmethod
     def __init__(self, name: str, start_address: int, length: int):
@@ -108,6 +131,47 @@ class PeripheralDomain(ABC):
         self._length = length
         self._peripherals = []
 
+    def __setattr__(self, name, value):
+        self._check_not_frozen()
+        super().__setattr__(name, value)
+
+    def _check_not_frozen(self):
+        """
+        :raise AttributeError: when the domain is frozen.
+        """
+        if self._frozen:
+            raise AttributeError(
+                f"{self._name} is frozen since XHeep.build(), modify a copy of it instead (see copy)"
+            )
+
+    def freeze(self):
+        """
+        Makes the domain and its peripherals read-only, so that they can be shared instead of copied. Any later modification raises an AttributeError.
+        """
+        for peripheral in self._peripherals:
+            peripheral.freeze()
+        object.__setattr__(self, "_peripherals", tuple(self._peripherals))
+        object.__setattr__(self, "_frozen", True)
+
+    def is_frozen(self):
+        """
+        :return: True if the domain is read-only.
+        :rtype: bool
+        """
+        return self._frozen
+
+    def copy(self):
+        """
+        :return: A modifiable deep copy of the domain, even if the domain is frozen.
+        :rtype: PeripheralDomain
+        """
+        domain = deepcopy(self)
+        object.__setattr__(domain, "_frozen", False)
+        domain._peripherals = list(domain._peripherals)
+        for peripheral in domain._peripherals:
+            object.__setattr__(peripheral, "_frozen", False)
+        return domain
+
     @abstractmethod
     def add_peripheral(self, peripheral: Peripheral):
         """
@@ -142,9 +206,11 @@ class PeripheralDomain(ABC):
 
     def get_peripherals(self):
         """
-        :return: A copy of the list of peripherals in the domain.
-        :rtype: list[Peripheral]
+        :return: The peripherals in the domain, read-only if the domain is frozen, a copy otherwise.
+        :rtype: tuple[Peripheral] or list[Peripheral]
         """
+        if self._frozen:
+            return self._peripherals
         return (
             []
             if self._peripherals is None or len(self._peripherals) == 0
@@ -166,7 +232,10 @@ class PeripheralDomain(ABC):
     def build(self):
         """
         Build the peripheral domain. This function will compute the offset of the peripherals that have no offset.
+
+        :raise AttributeError: when the domain is frozen.
         """
+        self._check_not_frozen()
 
         if self._peripherals is None or len(self._peripherals) == 0:
             print(f"Warning : No peripherals in {self._name}")
@@ -294,7 +363,7 @@ class PeripheralDomain(ABC):
     # Validate functions
     def __check_peripheral_non_overlap(self):
         """
-        Check if the peripherals do not overlap.
+        Check if the peripherals do not overlap and are inside the domain.
 
         :return: True if the peripherals do not overlap, False otherwise.
         :rtype: bool
@@ -304,48 +373,10 @@ class PeripheralDomain(ABC):
             print(f"Warning : No peripherals in {self._name}")
             return True
 
-        peripherals_sorted = sorted(
-            filter(lambda x: x != None, self._peripherals),
-            key=lambda x: x.get_address(),
-        )  # Filter out None values and sort by offset in growing order
-        return_bool = True
-
-        if len(peripherals_sorted) == 0:
-            print(f"Warning : No peripherals in {self._name}")
-            return return_bool
-
-        # Check if every peripheral does not overlap with the next one (works because peripherals_sorted is sorted by address)
-        for i in range(len(peripherals_sorted) - 1):
-            if (
-                peripherals_sorted[i].get_address() + peripherals_sorted[i].get_length()
-                > peripherals_sorted[i + 1].get_address()
-            ):
-                print(
-                    f"The peripheral {peripherals_sorted[i].get_name()} overflows over the domain (starts at {peripherals_sorted[i].get_address():#08X} and ends at {peripherals_sorted[i].get_address() + peripherals_sorted[i].get_length():#08X}, peripheral {peripherals_sorted[i+1].get_name()} starts at {peripherals_sorted[i+1].get_address():#08X})."
-                )
-                return_bool = False
-            if peripherals_sorted[i].get_address() >= self._length:
-                print(
-                    f"The peripheral {peripherals_sorted[i].get_name()} is out of the domain (starts at {peripherals_sorted[i].get_address():#08X}, domain ends at {self._length:#08X})."
-                )
-                return_bool = False
-
-        # Check if the last peripheral is out of the domain
-        if (
-            peripherals_sorted[-1].get_address() + peripherals_sorted[-1].get_length()
-            > self._length
-        ):
-            print(
-                f"The peripheral {peripherals_sorted[-1].get_name()} is out of the domain (starts at {peripherals_sorted[-1].get_address():#08X}, domain ends at {self._length:#08X})."
-            )
-            return_bool = False
-        if peripherals_sorted[-1].get_address() >= self._length:
-            print(
-                f"The peripheral {peripherals_sorted[-1].get_name()} is out of the domain (starts at {peripherals_sorted[-1].get_address():#08X}, domain ends at {self._length:#08X})."
-            )
-            return_bool = False
-
-        return return_bool
+        address_map = AddressMap()
+        address_map.add_peripheral_domain(self._name, self)
+        address_map.build()
+        return address_map.check_overlaps()
 
     def __check_peripheral_domain_bounds(self):
         """
@@ -414,6 +414,7 @@ class BasePeripheralDomain(PeripheralDomain):
 
         :param BasePeripheral peripheral: The peripheral to add.
         """
+        self._check_not_frozen()
         if not isinstance(peripheral, BasePeripheral):
             raise ValueError("Peripheral is not a BasePeripheral")
         self._peripherals.append(peripheral)
@@ -424,6 +425,7 @@ class BasePeripheralDomain(PeripheralDomain):
 
         :param BasePeripheral peripheral: The peripheral to remove.
         """
+        self._check_not_frozen()
         if peripheral not in self._peripherals:
             print(
                 f"Warning : Peripheral {peripheral.get_name()} is not in the domain {self._name}"
@@ -434,6 +436,7 @@ class BasePeripheralDomain(PeripheralDomain):
         """
         Add missing peripherals to the domain.
         """
+        self._check_not_frozen()
         # Add all default peripherals
         peripherals_to_add = [deepcopy(p) for p in self._default_base_peripherals]
 
@@ -452,13 +455,13 @@ class BasePeripheralDomain(PeripheralDomain):
         """
         Get the DMA peripherals.
 
-        :return: The DMA peripherals.
+        :return: The DMA peripherals, read-only if the domain is frozen, copies otherwise.
         :rtype: list[DMA]
         """
         dmas = []
         for p in self._peripherals:
             if isinstance(p, DMA):
-                dmas.append(deepcopy(p))
+                dmas.append(p if self._frozen else deepcopy(p))
         if len(dmas) == 0:
             raise ValueError("No DMA peripheral found")
         return dmas
@@ -153,6 +153,7 @@ class UserPeripheralDomain(PeripheralDomain):
 
         :param UserPeripheral peripheral: The peripheral to add.
         """
+        self._check_not_frozen()
         if not isinstance(peripheral, UserPeripheral):
             raise ValueError("Peripheral is not a UserPeripheral")
         self._peripherals.append(peripheral)
@@ -163,6 +164,7 @@ class UserPeripheralDomain(PeripheralDomain):
 
         :param UserPeripheral peripheral: The peripheral to remove.
         """
+        self._check_not_frozen()
         if peripheral not in self._peripherals:
             print(
                 f"Warning : Peripheral {peripheral.get_name()} is not in the domain {self._name}"
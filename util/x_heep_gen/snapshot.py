@@ -0,0 +1,315 @@
+import hashlib
+import importlib
+import json
+import sys
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from jsonref import JsonRef
+
+
+SNAPSHOT_FORMAT = "x-heep-config-snapshot"
+"""Identifies the snapshot files"""
+
+SNAPSHOT_VERSION = 1
+"""Version of the snapshot schema, to be increased whenever the encoding changes"""
+
+
+class StaleSnapshotError(RuntimeError):
+    """
+    Raised when a snapshot was written with another schema version, or by a version of the
+    generator classes that differs from the one loading it.
+    """
+
+
+def _qualified_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _module_digest(module_name: str) -> Union[str, None]:
+    """
+    :return: the SHA-256 digest of the source file of a module, None if it has none.
+    """
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+    filename = getattr(module, "__file__", None)
+    if filename is None:
+        return None
+    with open(filename, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _object_state(obj) -> Dict[str, Any]:
+    """
+    :return: the attributes of obj, from its __dict__ and its __slots__.
+    """
+    state = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for slot in slots:
+            if slot not in ("__dict__", "__weakref__") and hasattr(obj, slot):
+                state[slot] = getattr(obj, slot)
+    return state
+
+
+class _Encoder:
+    """
+    Turns the mcu_gen template arguments into a JSON tree.
+
+    Plain values are stored as JSON values, containers are tagged with a single `$` key
+    and every other object is stored once in an object table and referenced by index,
+    which keeps shared objects (e.g. pads present in several pad lists) shared.
+    """
+
+    def __init__(self):
+        self.objects: List[Dict[str, Any]] = []
+        self.modules: Dict[str, Union[str, None]] = {}
+        self._refs: Dict[int, int] = {}
+        # Keeps the encoded objects alive so that their id is not reused
+        self._keep_alive: List[Any] = []
+
+    def _class_name(self, cls: type) -> str:
+        if cls.__module__ not in self.modules:
+            self.modules[cls.__module__] = _module_digest(cls.__module__)
+        return _qualified_name(cls)
+
+    def encode(self, value):
+        if value is None or type(value) in (bool, int, float, str):
+            return value
+        if isinstance(value, JsonRef):
+            return self.encode(value.__subject__)
+        if isinstance(value, Enum):
+            return {"$enum": [self._class_name(type(value)), value.name]}
+        if isinstance(value, Decimal):
+            return {"$decimal": str(value)}
+        if type(value) is list:
+            return [self.encode(v) for v in value]
+        if type(value) is tuple:
+            return {"$tuple": [self.encode(v) for v in value]}
+        if type(value) in (set, frozenset):
+            items = [self.encode(v) for v in value]
+            # Sorted so that the same configuration always gives the same snapshot
+            items.sort(key=lambda v: json.dumps(v, sort_keys=True))
+            return {f"${type(value).__name__}": items}
+        if isinstance(value, dict):
+            encoded = {
+                "$dict": [[self.encode(k), self.encode(v)] for k, v in value.items()]
+            }
+            if type(value) is not dict:
+                encoded["$class"] = self._class_name(type(value))
+            return encoded
+        if isinstance(value, (type, type(len), type(_qualified_name))):
+            raise TypeError(
+                f"{value!r} cannot be stored in an X-HEEP configuration snapshot"
+            )
+        if hasattr(value, "__dict__") or hasattr(type(value), "__slots__"):
+            return {"$ref": self._reference(value)}
+        raise TypeError(
+            f"Objects of type {type(value).__name__} cannot be stored in an X-HEEP configuration snapshot"
+        )
+
+    def _reference(self, obj) -> int:
+        index = self._refs.get(id(obj))
+        if index is not None:
+            return index
+
+        index = len(self.objects)
+        self._refs[id(obj)] = index
+        self._keep_alive.append(obj)
+        entry = {"class": self._class_name(type(obj))}
+        self.objects.append(entry)
+        entry["state"] = {
+            name: self.encode(value) for name, value in _object_state(obj).items()
+        }
+        return index
+
+
+def save_snapshot(kwargs: Dict[str, Any], path):
+    """
+    Writes the mcu_gen template arguments (including the XHeep object) to a snapshot file.
+
+    The same arguments always give the same file, so the digest of a snapshot can be used to
+    detect configuration changes.
+
+    :param dict kwargs: the template arguments, indexed by name.
+    :param path: path of the snapshot file.
+    :raise TypeError: when a value cannot be stored in a snapshot.
+    """
+    encoder = _Encoder()
+    encoded = {name: encoder.encode(value) for name, value in kwargs.items()}
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "modules": encoder.modules,
+        "objects": encoder.objects,
+        "kwargs": encoded,
+    }
+    with open(path, "w") as file:
+        json.dump(snapshot, file, separators=(",", ":"))
+
+
+class Snapshot:
+    """
+    Configuration snapshot written by save_snapshot.
+
+    Only the JSON tree is loaded when opening a snapshot. Template arguments, and the objects they
+    reference, are only rebuilt when requested, and at most once.
+
+    :param path: path of the snapshot file.
+    :raise StaleSnapshotError: when the file is not a snapshot of the supported version.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        try:
+            with open(path, "r") as file:
+                snapshot = json.load(file)
+        except ValueError:
+            raise StaleSnapshotError(
+                f"{path} is not an X-HEEP configuration snapshot, regenerate it (make mcu-gen)"
+            )
+
+        if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+            raise StaleSnapshotError(
+                f"{path} is not an X-HEEP configuration snapshot, regenerate it (make mcu-gen)"
+            )
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise StaleSnapshotError(
+                f"{path} uses snapshot version {snapshot.get('version')} instead of {SNAPSHOT_VERSION}, regenerate it (make mcu-gen)"
+            )
+
+        self._modules: Dict[str, Union[str, None]] = snapshot["modules"]
+        self._objects: List[Dict[str, Any]] = snapshot["objects"]
+        self._kwargs: Dict[str, Any] = snapshot["kwargs"]
+
+        self._checked_modules = set()
+        self._classes: Dict[str, type] = {}
+        self._materialized_objects: Dict[int, Any] = {}
+        self._materialized_kwargs: Dict[str, Any] = {}
+
+    def names(self) -> List[str]:
+        """
+        :return: the names of all the template arguments stored in the snapshot.
+        :rtype: List[str]
+        """
+        return list(self._kwargs.keys())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._kwargs
+
+    def get(self, name: str):
+        """
+        Rebuilds (once) and returns a template argument.
+
+        :param str name: name of the argument.
+        :raise KeyError: when there is no argument with this name.
+        :raise StaleSnapshotError: when the argument uses classes that changed since the snapshot was written.
+        """
+        if name not in self._materialized_kwargs:
+            self._materialized_kwargs[name] = self._decode(self._kwargs[name])
+        return self._materialized_kwargs[name]
+
+    def materialize(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Rebuilds the requested template arguments.
+
+        :param names: names of the arguments to rebuild, all of them if None. Names that are not in the snapshot are ignored.
+        :return: the arguments, indexed by name.
+        :rtype: dict
+        """
+        if names is None:
+            names = self._kwargs.keys()
+        return {name: self.get(name) for name in names if name in self._kwargs}
+
+    def _resolve_class(self, name: str) -> type:
+        cls = self._classes.get(name)
+        if cls is not None:
+            return cls
+
+        module_name, _, qualname = name.rpartition(".")
+        while module_name not in self._modules and "." in module_name:
+            # Nested classes: the module is a prefix of the qualified name
+            module_name, _, outer = module_name.rpartition(".")
+            qualname = f"{outer}.{qualname}"
+
+        if module_name not in self._checked_modules:
+            try:
+                digest = _module_digest(module_name)
+            except ImportError:
+                raise StaleSnapshotError(
+                    f"{self._path} uses the module {module_name} which cannot be imported, regenerate it (make mcu-gen)"
+                )
+            if digest != self._modules.get(module_name):
+                raise StaleSnapshotError(
+                    f"{module_name} changed since {self._path} was written, regenerate it (make mcu-gen)"
+                )
+            self._checked_modules.add(module_name)
+
+        cls = sys.modules[module_name]
+        try:
+            for attr in qualname.split("."):
+                cls = getattr(cls, attr)
+        except AttributeError:
+            raise StaleSnapshotError(
+                f"{name} used by {self._path} does not exist anymore, regenerate it (make mcu-gen)"
+            )
+        self._classes[name] = cls
+        return cls
+
+    def _object(self, index: int):
+        if index in self._materialized_objects:
+            return self._materialized_objects[index]
+
+        entry = self._objects[index]
+        cls = self._resolve_class(entry["class"])
+        obj = cls.__new__(cls)
+        # Registered before decoding the state, to support reference cycles
+        self._materialized_objects[index] = obj
+        for name, value in entry["state"].items():
+            if hasattr(obj, "__dict__"):
+                obj.__dict__[name] = self._decode(value)
+            else:
+                setattr(obj, name, self._decode(value))
+        return obj
+
+    def _decode(self, value):
+        if type(value) is list:
+            return [self._decode(v) for v in value]
+        if type(value) is not dict:
+            return value
+
+        if "$ref" in value:
+            return self._object(value["$ref"])
+        if "$dict" in value:
+            items = [(self._decode(k), self._decode(v)) for k, v in value["$dict"]]
+            if "$class" in value:
+                return self._resolve_class(value["$class"])(items)
+            return dict(items)
+        if "$tuple" in value:
+            return tuple(self._decode(v) for v in value["$tuple"])
+        if "$set" in value:
+            return set(self._decode(v) for v in value["$set"])
+        if "$frozenset" in value:
+            return frozenset(self._decode(v) for v in value["$frozenset"])
+        if "$decimal" in value:
+            return Decimal(value["$decimal"])
+        if "$enum" in value:
+            enum_class, member = value["$enum"]
+            return self._resolve_class(enum_class)[member]
+        raise StaleSnapshotError(f"Unknown value {value} in {self._path}")
+
+
+def load_snapshot(path) -> Snapshot:
+    """
+    Opens a snapshot written by save_snapshot.
+
+    :param path: path of the snapshot file.
+    :return: the snapshot, whose arguments are rebuilt on demand.
+    :rtype: Snapshot
+    :raise StaleSnapshotError: when the file is not a snapshot of the supported version.
+    """
+    return Snapshot(path)
@@ -1,4 +1,6 @@
 from copy import deepcopy
+from typing import Iterable, Optional, Tuple
+from .address_map import AddressMap
 from .bus_type import BusType
 from .memory_ss.memory_ss import MemorySS
 from .cpu.cpu import CPU
@@ -38,6 +40,9 @@ class XHeep:
         self._base_peripheral_domain = None
         self._user_peripheral_domain = None
 
+        self._address_windows = {}
+        self._address_map = None
+
         self._extensions = {}
 
     # ------------------------------------------------------------
@@ -140,14 +145,14 @@ class XHeep:
 
     def add_peripheral_domain(self, domain: PeripheralDomain):
         """
-        Add a peripheral domain to the system. The domain should already contain all peripherals well configured. When adding a domain, a deepcopy is made to avoid side effects.
+        Add a peripheral domain to the system. The domain should already contain all peripherals well configured. When adding a domain, a modifiable copy is made to avoid side effects.
 
         :param PeripheralDomain domain: The domain to add.
         """
         if isinstance(domain, BasePeripheralDomain):
-            self._base_peripheral_domain = deepcopy(domain)
+            self._base_peripheral_domain = domain.copy()
         elif isinstance(domain, UserPeripheralDomain):
-            self._user_peripheral_domain = deepcopy(domain)
+            self._user_peripheral_domain = domain.copy()
         else:
             raise ValueError(
                 "Domain is neither a BasePeripheralDomain nor a UserPeripheralDomain"
@@ -155,22 +160,63 @@ class XHeep:
 
     def get_user_peripheral_domain(self):
         """
-        Returns a deepcopy of the user peripheral domain.
+        Returns the user peripheral domain. After build(), the domain is frozen and returned without copy, so it can be queried repeatedly. Before, a deepcopy is returned.
 
         :return: The user peripheral domain.
         :rtype: UserPeripheralDomain
         """
+        if (
+            self._user_peripheral_domain is not None
+            and self._user_peripheral_domain.is_frozen()
+        ):
+            return self._user_peripheral_domain
         return deepcopy(self._user_peripheral_domain)
 
     def get_base_peripheral_domain(self):
         """
-        Returns a deepcopy of the base peripheral domain.
+        Returns the base peripheral domain. After build(), the domain is frozen and returned without copy, so it can be queried repeatedly. Before, a deepcopy is returned.
 
         :return: The base peripheral domain.
         :rtype: BasePeripheralDomain
         """
+        if (
+            self._base_peripheral_domain is not None
+            and self._base_peripheral_domain.is_frozen()
+        ):
+            return self._base_peripheral_domain
         return deepcopy(self._base_peripheral_domain)
 
+    # ------------------------------------------------------------
+    # Address map
+    # ------------------------------------------------------------
+
+    def add_address_window(self, name: str, start: int, length: int):
+        """
+        Adds a bus window that is not modelled by XHeep (e.g. debug, external slaves or flash) to the address map. A window with the same name is replaced.
+
+        :param str name: The name of the window.
+        :param int start: The start address.
+        :param int length: The size in Bytes.
+        :raise TypeError: when start or length are not int.
+        """
+        if type(start) is not int or type(length) is not int:
+            raise TypeError("start and length should be of type int")
+        self._address_windows[name] = (start, length)
+
+    def iter_address_windows(self) -> Iterable[Tuple[str, Tuple[int, int]]]:
+        """
+        :return: an iterator over the bus windows, as (name, (start, length)) tuples.
+        :rtype: Iterable[Tuple[str, Tuple[int, int]]]
+        """
+        return iter(self._address_windows.items())
+
+    def address_map(self) -> Optional[AddressMap]:
+        """
+        :return: the address map of the system, None before build().
+        :rtype: AddressMap
+        """
+        return self._address_map
+
     # ------------------------------------------------------------
     # Extensions
     # ------------------------------------------------------------
@@ -200,14 +246,16 @@ class XHeep:
 
     def build(self):
         """
-        Makes the system ready to be used.
+        Makes the system ready to be used. The peripheral domains are frozen afterwards, use add_peripheral_domain() with a copy to modify them.
+        The address map is built last, from the memory subsystem, the peripheral domains and the address windows.
         """
         if self.memory_ss():
             self.memory_ss().build()
-        if self.are_base_peripherals_configured():
-            self._base_peripheral_domain.build()
-        if self.are_user_peripherals_configured():
-            self._user_peripheral_domain.build()
+        for domain in (self._base_peripheral_domain, self._user_peripheral_domain):
+            if domain is not None and not domain.is_frozen():
+                domain.build()
+                domain.freeze()
+        self._address_map = AddressMap.from_xheep(self)
 
     def validate(self) -> bool:
         """
@@ -241,42 +289,11 @@ class XHeep:
         if self.are_user_peripherals_configured():
             self._user_peripheral_domain.validate()
 
-        # Check that peripherals domains do not overlap
-        ret = True
-        if (
-            self.are_base_peripherals_configured()
-            and self._base_peripheral_domain.get_start_address()
-            < self._user_peripheral_domain.get_start_address()
-            and self._base_peripheral_domain.get_start_address()
-            + self._base_peripheral_domain.get_length()
-            > self._user_peripheral_domain.get_start_address()
-        ):  # base peripheral domain comes before user peripheral domain
-            print(
-                f"The base peripheral domain (ends at {self._base_peripheral_domain.get_start_address() + self._base_peripheral_domain.get_length():#08X}) overflows over user peripheral domain (starts at {self._user_peripheral_domain.get_start_address():#08X})."
-            )
-            ret = False
-        if (
-            self.are_user_peripherals_configured()
-            and self._user_peripheral_domain.get_start_address()
-            < self._base_peripheral_domain.get_start_address()
-            and self._user_peripheral_domain.get_start_address()
-            + self._user_peripheral_domain.get_length()
-            > self._base_peripheral_domain.get_start_address()
-        ):  # user peripheral domain comes before base peripheral domain
-            print(
-                f"The user peripheral domain (ends at {self._user_peripheral_domain.get_start_address() + self._user_peripheral_domain.get_length():#08X}) overflows over base peripheral domain (starts at {self._base_peripheral_domain.get_start_address():#08X})."
-            )
-            ret = False
-        if (
-            self.are_user_peripherals_configured()
-            and self.are_base_peripherals_configured()
-            and self._user_peripheral_domain.get_start_address()
-            == self._base_peripheral_domain.get_start_address()
-        ):  # both domains start at the same address
-            print(
-                f"The base peripheral domain and the user peripheral domain should not start at the same address (current addresses are {self._base_peripheral_domain.get_start_address():#08X} and {self._user_peripheral_domain.get_start_address():#08X})."
-            )
-            ret = False
+        # Check that the memory, the peripheral domains and the address windows do not overlap
+        address_map = self._address_map
+        if address_map is None:
+            address_map = AddressMap.from_xheep(self)
+        ret = address_map.check_overlaps(nested=False)
         if (
             self.are_base_peripherals_configured()
             and self._base_peripheral_domain.get_start_address() < 0x10000